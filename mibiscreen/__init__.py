@@ -4,60 +4,115 @@ __author__ = "Alraune Zech"
 __email__ = "a.zech@uu.nl"
 __version__ = "0.7.0"
 
-# Add some commonly used functions as top-level imports
-from mibiscreen.data.load_data import load_excel, load_csv
-from mibiscreen.data.check_data import (
-    standardize,
-    standard_names,
-    check_columns,
-    check_units,
-    check_values
-)
-from mibiscreen.data.set_data import  (
-    determine_quantities,
-    merge_data,
-    extract_data
-)
-from mibiscreen.analysis.reduction.stable_isotope_regression import Lambda_regression
-from mibiscreen.analysis.reduction.stable_isotope_regression import extract_isotope_data
-from mibiscreen.analysis.reduction.transformation import filter_values, transform_values
-from mibiscreen.analysis.reduction.ordination import (
-    pca,
-    cca,
-    rda,
-)
-from mibiscreen.analysis.sample.screening_NA import (
-    reductors,
-    oxidators,
-    electron_balance,
-    sample_NA_traffic,
-    sample_NA_screening
-)
-from mibiscreen.analysis.sample.concentrations import (
-    total_concentration,
-    total_contaminant_concentration,
-    total_metabolites_concentration,
-    total_count,
-    total_contaminant_count,
-    total_metabolites_count,
-)
-from mibiscreen.analysis.sample.intervention import (
-    thresholds_for_intervention_traffic,
-    thresholds_for_intervention_ratio,
-)
+# Commonly used functions are available as top-level names. They are imported
+# lazily on first access, such that heavy dependencies (scikit-learn,
+# scikit-bio, matplotlib) are only loaded when ordination or plotting is used.
+_lazy_imports = {
+    'mibiscreen.data.load_data': [
+        'load_excel',
+        'load_excel_batch',
+        'load_csv',
+        'load_csv_chunks',
+        'save_standardized',
+        'load_standardized',
+    ],
+    'mibiscreen.data.check_data': [
+        'standardize',
+        'standardize_chunks',
+        'standard_names',
+        'check_columns',
+        'check_units',
+        'check_values',
+    ],
+    'mibiscreen.data.cache_data': [
+        'cached_standardize',
+        'clear_cache',
+    ],
+    'mibiscreen.data.set_data': [
+        'determine_quantities',
+        'merge_data',
+        'extract_data',
+    ],
+    'mibiscreen.analysis.reduction.stable_isotope_regression': [
+        'Lambda_regression',
+        'extract_isotope_data',
+    ],
+    'mibiscreen.analysis.reduction.transformation': [
+        'filter_values',
+        'transform_values',
+        'ValueTransformer',
+    ],
+    'mibiscreen.analysis.reduction.ordination': [
+        'pca',
+        'pca_incremental',
+        'cca',
+        'rda',
+        'permutation_test',
+        'ConstrainedOrdination',
+    ],
+    'mibiscreen.analysis.reduction.bootstrap': [
+        'ordination_bootstrap',
+    ],
+    'mibiscreen.analysis.sample.screening_NA': [
+        'reductors',
+        'oxidators',
+        'electron_balance',
+        'sample_NA_traffic',
+        'sample_NA_screening',
+        'sample_NA_monte_carlo',
+        'sample_NA_sweep',
+    ],
+    'mibiscreen.analysis.sample.concentrations': [
+        'total_concentration',
+        'total_contaminant_concentration',
+        'total_metabolites_concentration',
+        'total_count',
+        'total_contaminant_count',
+        'total_metabolites_count',
+        'total_groups',
+    ],
+    'mibiscreen.analysis.sample.intervention': [
+        'thresholds_for_intervention_traffic',
+        'thresholds_for_intervention_ratio',
+        'decode_intervention_contaminants',
+        'threshold_registry',
+        'thresholds_for_regulations',
+    ],
+    'mibiscreen.analysis.sample.session': [
+        'ScreeningSession',
+    ],
+    'mibiscreen.visualize.stable_isotope_plots': [
+        'Lambda_plot',
+        'Rayleigh_fractionation_plot',
+        'Keeling_plot',
+    ],
+    'mibiscreen.visualize.screening_plots': [
+        'contaminants_bar',
+        'electron_balance_bar_data_prep',
+        'electron_balance_bar',
+        'threshold_ratio_bar',
+        'activity_data_prep',
+        'activity_plot',
+    ],
+    'mibiscreen.visualize.ordination_plots': [
+        'ordination_plot',
+    ],
+}
 
-from mibiscreen.visualize.stable_isotope_plots import (
-    Lambda_plot,
-    Rayleigh_fractionation_plot,
-    Keeling_plot,
-)
-from mibiscreen.visualize.screening_plots import (
-    contaminants_bar,
-    electron_balance_bar_data_prep,
-    electron_balance_bar,
-    threshold_ratio_bar,
-    activity_data_prep,
-    activity_plot,
-)
+_lazy_names = {name: module for module, names in _lazy_imports.items() for name in names}
 
-from mibiscreen.visualize.ordination_plots import ordination_plot
+__all__ = list(_lazy_names)
+
+def __getattr__(name):
+    """Import top-level function from its module on first access."""
+    module_name = _lazy_names.get(name)
+    if module_name is None:
+        raise AttributeError("module 'mibiscreen' has no attribute '{}'".format(name))
+    import importlib
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    """List module attributes including lazily imported functions."""
+    return sorted(set(globals()) | set(__all__))
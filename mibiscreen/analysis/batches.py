@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Batched processing of random replicates (realizations, permutations, resamples).
+
+@author: Alraune Zech
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def _run_in_batches(batch_function,
+                    arguments,
+                    n_total,
+                    batch_size,
+                    seed = None,
+                    max_workers = 1,
+                    ):
+    """Run batch function on batches of random replicates, optionally in parallel.
+
+    The `n_total` replicates are split into batches of `batch_size`. Each
+    batch gets its own random generator seed, spawned from one seed sequence,
+    such that results are reproducible independent of the distribution of
+    batches over processes.
+
+    Input
+    -----
+        batch_function: callable
+            top-level function called as batch_function(*arguments, size, seed)
+            with size being the number of replicates of the batch and seed its
+            np.random.SeedSequence
+        arguments: tuple
+            arguments passed to each call of the batch function
+        n_total: int
+            total number of replicates
+        batch_size: int
+            number of replicates per batch
+        seed: int or None, default None
+            seed of random number generator for reproducible results
+        max_workers: int or None, default 1
+            number of processes the batches are distributed over;
+            1 processes all batches sequentially
+
+    Output
+    ------
+        batches: list
+            results of batch function, in order of the batches
+    """
+    batch_sizes = [batch_size] * (n_total // batch_size)
+    if n_total % batch_size:
+        batch_sizes.append(n_total % batch_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(batch_sizes))
+    calls = [tuple(arguments) + (size, seed_batch) for size, seed_batch in zip(batch_sizes, seeds)]
+
+    if max_workers == 1 or len(calls) == 1:
+        return [batch_function(*call) for call in calls]
+    with ProcessPoolExecutor(max_workers = max_workers) as executor:
+        return list(executor.map(batch_function, *zip(*calls)))
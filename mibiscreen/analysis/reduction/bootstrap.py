@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Routines for bootstrapping uncertainty of ordination results.
+
+@author: Alraune Zech
+"""
+
+import numpy as np
+from mibiscreen.analysis.batches import _run_in_batches
+from mibiscreen.analysis.reduction.ordination import ConstrainedOrdination
+from mibiscreen.analysis.reduction.ordination import _extract_variables
+from mibiscreen.analysis.reduction.ordination import _select_variables
+from mibiscreen.data.check_data import check_data_frame
+
+
+def ordination_bootstrap(data_frame,
+                         independent_variables = False,
+                         dependent_variables = False,
+                         method = 'pca',
+                         n_comp = 2,
+                         scaling = 2,
+                         n_bootstrap = 1000,
+                         confidence = 0.95,
+                         batch_size = 100,
+                         seed = None,
+                         max_workers = 1,
+                         return_replicates = False,
+                         verbose = False,
+                         ):
+    """Bootstrap confidence regions of ordination loadings and scores.
+
+    The ordination (PCA, CCA or RDA) is refitted on resampled sets of samples
+    (drawn with replacement). Each replicate is aligned to the reference
+    solution (ordination of the full data) by orthogonal Procrustes rotation
+    of the loadings, which removes arbitrary signs and rotations of axes.
+    From the aligned replicates, confidence ellipses are determined for the
+    loadings of all variables and for the scores of all samples (from the
+    replicates a sample is drawn in). Replicates with fewer constrained axes
+    than n_comp (CCA, RDA) are left out.
+
+    Replicates are computed in batches with batched linear algebra (PCA via
+    covariance matrices, CCA and RDA with 'ConstrainedOrdination'), optionally
+    distributed over a process pool (`max_workers`).
+
+    Input
+    -----
+        data_frame : pd.DataFrame
+            Tabular data containing variables to be evaluated with standard
+            column names and rows of sample data.
+        independent_variables : Boolean or list of strings; default False
+            list with column names data to be the independent variables (=environment);
+            optional for PCA (as in 'pca()')
+        dependent_variables : Boolean or list of strings; default False
+            list with column names data to be the dependent variables (=species)
+            optional for PCA (as in 'pca()')
+        method : string, default is 'pca'
+            ordination method, options: 'pca', 'cca' and 'rda'
+        n_comp : int, default is 2
+            number of components/axes to evaluate
+        scaling : int, default is 2
+            scaling type of scores (1 or 2) for CCA and RDA, as in
+            skbio.stats.ordination; not used for PCA
+        n_bootstrap : int, default is 1000
+            number of bootstrap replicates
+        confidence : float, default is 0.95
+            confidence level of ellipses
+        batch_size : int, default is 100
+            number of replicates per batch
+        seed : int or None, default is None
+            seed of random number generator for reproducible results
+        max_workers : int, default is 1
+            number of processes the batches are distributed over;
+            1 processes all batches sequentially
+        return_replicates : bool, default False
+            Whether to return the aligned replicates of loadings and scores.
+        verbose : Boolean, The default is False.
+            Set to True to get messages in the Console about the status of the run code.
+
+    Output
+    ------
+        results : Dictionary
+            ordination results of the full data (same structure as output of
+            'pca()' or 'constrained_ordination()') with in addition:
+                * n_bootstrap: number of bootstrap replicates (int)
+                * confidence: confidence level of ellipses (float)
+                * ellipses_independent: ellipses of loadings of independent variables
+                * ellipses_dependent: ellipses of loadings of dependent variables
+                * ellipses_scores: ellipses of scores of samples
+            ellipses are given as np.ndarray with one row per variable/sample and
+            columns: center on axis 1, center on axis 2, width, height and angle
+            (in degrees) of the confidence ellipse in the plane of the first two axes
+        replicates : Dictionary (only if return_replicates is True)
+            aligned replicates of 'loadings_independent', 'loadings_dependent'
+            and 'scores' (replicates x items x n_comp), scores are nan for
+            samples not drawn in a replicate
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'ordination_bootstrap()' on data")
+        print('==============================================================')
+
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence level needs to be between 0 and 1: {}".format(confidence))
+
+    data,cols= check_data_frame(data_frame)
+    if method == 'pca':
+        names_independent, names_dependent = _select_variables(cols,
+                                                               independent_variables,
+                                                               dependent_variables)
+    elif method in ['cca', 'rda']:
+        names_independent = _extract_variables(cols,
+                                               independent_variables,
+                                               name_variables = 'independent variables'
+                                               )
+        names_dependent = _extract_variables(cols,
+                                             dependent_variables,
+                                             name_variables = 'dependent variables'
+                                             )
+    else:
+        raise ValueError("Ordination method {} not a valid option.".format(method))
+
+    try:
+        values_independent = data[names_independent].to_numpy(dtype = float)
+        values_dependent = data[names_dependent].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise TypeError("Not all column values are numeric values. Consider standardizing data first.")
+    if not (np.all(np.isfinite(values_independent)) and np.all(np.isfinite(values_dependent))):
+        raise ValueError("Data contains missing or infinite values. Consider filtering data first.")
+    if data.shape[0] < len(names_independent + names_dependent):
+        raise ValueError("Ordination method {} not possible with more variables than samples.".format(method))
+
+    ### reference solution from full data
+    reference = _bootstrap_fit(method, values_independent[None], values_dependent[None], n_comp, scaling)
+    reference_loadings = np.concatenate([reference['loadings_independent'][0],
+                                         reference['loadings_dependent'][0]])
+
+    ### bootstrap replicates in batches
+    batches = _run_in_batches(_bootstrap_batch,
+                              (method, values_independent, values_dependent, n_comp, scaling, reference_loadings),
+                              n_bootstrap,
+                              batch_size,
+                              seed = seed,
+                              max_workers = max_workers,
+                              )
+    replicates = {key: np.concatenate([batch[key] for batch in batches]) for key in batches[0]}
+
+    results = {"method": method,
+               "loadings_dependent": reference['loadings_dependent'][0],
+               "loadings_independent": reference['loadings_independent'][0],
+               "names_independent" : names_independent,
+               "names_dependent" : names_dependent,
+               "scores": reference['scores'][0],
+               "sample_index" : list(data.index),
+               }
+    if method == 'pca':
+        results["percent_explained"] = reference['percent_explained'][0]
+        results["corr_PC1_PC2"] = np.corrcoef(results['scores'][:,0], results['scores'][:,1])[0,1]
+    results["n_bootstrap"] = n_bootstrap
+    results["confidence"] = confidence
+    results["ellipses_independent"] = _confidence_ellipses(replicates['loadings_independent'], confidence)
+    results["ellipses_dependent"] = _confidence_ellipses(replicates['loadings_dependent'], confidence)
+    results["ellipses_scores"] = _confidence_ellipses(replicates['scores'], confidence)
+
+    if verbose:
+        print("Confidence ellipses ({:.0f}%) from {} bootstrap replicates determined for".format(
+            100*confidence,n_bootstrap))
+        print("{} independent variables, {} dependent variables and {} samples.".format(
+            len(names_independent),len(names_dependent),data.shape[0]))
+        print('----------------------------------------------------------------')
+
+    if return_replicates:
+        return results, replicates
+    return results
+
+def _bootstrap_fit(method,
+                   values_independent,
+                   values_dependent,
+                   n_comp,
+                   scaling = 2,
+                   rank_deficient = 'raise',
+                   ):
+    """Ordination of stacks of data sets (replicates x samples x variables)."""
+    if method == 'pca':
+        values = np.concatenate([values_independent, values_dependent], axis = 2)
+        centered = values - values.mean(axis = 1, keepdims = True)
+        eigenvalues, eigenvectors = np.linalg.eigh(np.swapaxes(centered, 1, 2) @ centered)
+        eigenvalues, eigenvectors = eigenvalues[:, ::-1], eigenvectors[:, :, ::-1]
+        loadings = eigenvectors[:, :, :n_comp]
+
+        # signs as in sklearn: largest loading per component is positive
+        largest = np.take_along_axis(loadings, np.abs(loadings).argmax(axis = 1)[:,None,:], axis = 1)
+        loadings = loadings * np.where(largest < 0, -1., 1.)
+
+        n_independent = values_independent.shape[2]
+        eigenvalues = np.maximum(eigenvalues, 0.)
+        return dict(loadings_independent = loadings[:, :n_independent],
+                    loadings_dependent = loadings[:, n_independent:],
+                    scores = centered @ loadings,
+                    percent_explained = np.around(100*eigenvalues/eigenvalues.sum(axis = 1, keepdims = True),
+                                                  decimals = 2),
+                    )
+
+    ordination = ConstrainedOrdination(values_independent,
+                                       method = method,
+                                       n_comp = n_comp,
+                                       scaling = scaling,
+                                       rank_deficient = rank_deficient,
+                                       ).fit(values_dependent)
+    return dict(loadings_independent = ordination['biplot_scores'],
+                loadings_dependent = ordination['features'],
+                scores = ordination['samples'],
+                )
+
+def _bootstrap_batch(method,
+                     values_independent,
+                     values_dependent,
+                     n_comp,
+                     scaling,
+                     reference_loadings,
+                     size,
+                     seed,
+                     ):
+    """Aligned ordination results for one batch of bootstrap replicates."""
+    rng = np.random.default_rng(seed)
+    n_samples = values_independent.shape[0]
+    indices = rng.integers(0, n_samples, (size, n_samples))
+
+    # rank deficient replicates (e.g. constant constraint in resample) result in nan
+    fit = _bootstrap_fit(method, values_independent[indices], values_dependent[indices], n_comp,
+                         scaling = scaling, rank_deficient = 'nan')
+
+    loadings = np.concatenate([fit['loadings_independent'], fit['loadings_dependent']], axis = 1)
+    rotation = _procrustes_rotation(loadings, reference_loadings)
+
+    # scores of replicates assigned to the original samples, nan if not drawn
+    scores = np.full((size, n_samples, n_comp), np.nan)
+    scores[np.arange(size)[:,None], indices] = fit['scores'] @ rotation
+
+    return dict(loadings_independent = fit['loadings_independent'] @ rotation,
+                loadings_dependent = fit['loadings_dependent'] @ rotation,
+                scores = scores,
+                )
+
+def _procrustes_rotation(loadings, reference):
+    """Orthogonal rotations aligning stacked loadings (replicates x items x comp) to reference.
+
+    Loadings of NaN (variables without values in a replicate) are left out of the alignment.
+    """
+    vectors_left, _, vectors_right = np.linalg.svd(np.swapaxes(np.nan_to_num(loadings), 1, 2) @ reference)
+    return vectors_left @ vectors_right
+
+def _confidence_ellipses(replicates, confidence = 0.95):
+    """Confidence ellipses (center, width, height, angle) of replicates in plane of first two axes."""
+    points = replicates[:, :, :2]
+    valid = ~np.isnan(points[:, :, 0])
+    n_valid = valid.sum(axis = 0)
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        center = np.nansum(points, axis = 0) / n_valid[:,None]
+        deviation = np.where(valid[:,:,None], points - center, 0.)
+        covariance = np.einsum('bij,bik->ijk', deviation, deviation) / (n_valid - 1)[:,None,None]
+    covariance[n_valid < 3] = np.nan
+
+    ellipses = np.full((points.shape[1], 5), np.nan)
+    defined = ~np.isnan(covariance).any(axis = (1,2))
+    eigenvalues, eigenvectors = np.linalg.eigh(covariance[defined])
+    chi2_quantile = -2. * np.log(1. - confidence) # quantile of chi-square distribution with 2 dof
+    ellipses[:, :2] = center
+    ellipses[defined, 2] = 2 * np.sqrt(chi2_quantile * np.maximum(eigenvalues[:, 1], 0.))
+    ellipses[defined, 3] = 2 * np.sqrt(chi2_quantile * np.maximum(eigenvalues[:, 0], 0.))
+    ellipses[defined, 4] = np.degrees(np.arctan2(eigenvectors[:, 1, 1], eigenvectors[:, 0, 1]))
+
+    return ellipses
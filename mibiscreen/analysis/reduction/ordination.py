@@ -7,8 +7,10 @@
 
 import warnings
 import numpy as np
+import pandas as pd
 import skbio.stats.ordination as sciord
 from sklearn import decomposition
+from mibiscreen.analysis.batches import _run_in_batches
 from mibiscreen.data.check_data import check_data_frame
 from mibiscreen.data.set_data import compare_lists
 
@@ -17,6 +19,7 @@ def pca(data_frame,
         independent_variables = False,
         dependent_variables = False,
         n_comp = 2,
+        svd_solver = 'auto',
         verbose = False,
         ):
     """Function that performs Principal Component Analysis.
@@ -43,6 +46,15 @@ def pca(data_frame,
             being characterized as dependent variables (= species)
         n_comp : int, default is 2
             Number of components to report
+        svd_solver : str, default is 'auto'
+            Solver for the singular value decomposition:
+                - 'full': all components are computed (exact)
+                - 'randomized': only the first n_comp components are computed
+                   with randomized SVD (fixed seed for reproducible results)
+                - 'arpack': only the first n_comp components are computed
+                   with truncated SVD (requires n_comp < number of variables)
+                - 'auto': 'full' for small data sets or if n_comp is close to
+                   the number of variables, 'randomized' otherwise
         verbose : Boolean, The default is False.
            Set to True to get messages in the Console about the status of the run code.
 
@@ -50,7 +62,8 @@ def pca(data_frame,
     ------
         results : Dictionary
             containing the scores and loadings of the PCA,
-            the percentage of the variation explained by the first principal components,
+            the percentage of the variation explained by the first principal components
+            (all components for solver 'full', only the first n_comp otherwise),
             the correlation coefficient between the first two PCs,
             names of columns (same length as loadings)
             names of indices (same length as scores)
@@ -97,13 +110,26 @@ def pca(data_frame,
     if data_pca.shape[0] < data_pca.shape[1]:
         raise ValueError("PCA not possible with more variables than samples.")
 
+    svd_solver = _pca_solver(data_pca.shape, n_comp, svd_solver)
+    if verbose:
+        print("Singular value decomposition with solver '{}'.".format(svd_solver))
+
+    try:
+        data_values = data_pca.to_numpy(dtype = float)
+    except(ValueError,TypeError):
+        raise TypeError("Not all column values are numeric values (or NaN). Consider standardizing data first.")
+
     try:
-        # Using scikit.decomposoition.PCA with an amount of components equal
-        # to the amount of variables, then getting the loadings, scores and explained variance ratio.
-        pca = decomposition.PCA(n_components=len(data_pca.columns))
-        pca.fit(data_pca)
+        if svd_solver == 'full':
+            # Using scikit.decomposoition.PCA with an amount of components equal
+            # to the amount of variables, then getting the loadings, scores and explained variance ratio.
+            pca = decomposition.PCA(n_components=len(data_pca.columns),svd_solver = 'full')
+        else:
+            # only computing the reported components, explained variance ratio is
+            # relative to total variance of data
+            pca = decomposition.PCA(n_components=n_comp,svd_solver = svd_solver,random_state = 0)
+        PCAscores = pca.fit_transform(data_values)
         loadings = pca.components_.T
-        PCAscores = pca.transform(data_pca)
         variances = pca.explained_variance_ratio_
     except(ValueError,TypeError):
         raise TypeError("Not all column values are numeric values (or NaN). Consider standardizing data first.")
@@ -116,7 +142,10 @@ def pca(data_frame,
         loadings_independent = loadings[:-len(names_dependent), 0:n_comp]
         loadings_dependent = loadings[-len(names_dependent):, 0:n_comp]
     scores = PCAscores[:, 0:n_comp]
-    percent_explained = np.around(100*variances/np.sum(variances), decimals=2)
+    if svd_solver == 'full':
+        percent_explained = np.around(100*variances/np.sum(variances), decimals=2)
+    else:
+        percent_explained = np.around(100*variances, decimals=2)
     coef = np.corrcoef(scores[:,0], scores[:,1])[0,1]
 
     if verbose:
@@ -140,6 +169,148 @@ def pca(data_frame,
 
     return results
 
+def pca_incremental(chunks,
+                    independent_variables = False,
+                    dependent_variables = False,
+                    n_comp = 2,
+                    batch_size = 10000,
+                    verbose = False,
+                    ):
+    """Function that performs Principal Component Analysis on streamed data.
+
+    Out-of-core variant of 'pca()' for data not fitting into memory. Makes use
+    of routine sklearn.decomposition.IncrementalPCA: the decomposition is
+    updated chunk by chunk in a first pass over the data, the site scores are
+    determined in a second pass. All components are kept during the updates,
+    such that the decomposition agrees with 'pca()'; the memory required only
+    scales with the number of variables and the size of a chunk.
+
+    Chunks have to be numeric and without missing values (e.g. transformed
+    with a fitted 'ValueTransformer'). Since the data is passed twice, chunks
+    have to be provided in a form that can be iterated repeatedly.
+
+    Input
+    -----
+        chunks : callable, list of pd.DataFrames, pd.DataFrame or np.ndarray
+            Sample data in chunks of rows, given as:
+                - callable returning an iterable of pd.DataFrames (called once
+                  per pass), e.g. lambda: standardize_chunks(load_csv_chunks(file))
+                - list of pd.DataFrames
+                - pd.DataFrame or np.ndarray (incl. np.memmap), which is processed
+                  in chunks of 'batch_size' rows; columns of arrays are named by
+                  their position
+        independent_variables : Boolean or list of strings; default False
+            list with column names to select from data_frame
+            being characterized as independent variables (= environment)
+        dependent_variables : Boolean or list of strings; default is False
+            list with column names to select from data_frame
+            being characterized as dependent variables (= species)
+        n_comp : int, default is 2
+            Number of components to report
+        batch_size : int, default is 10000
+            Number of rows per chunk for data given as pd.DataFrame or np.ndarray
+        verbose : Boolean, The default is False.
+           Set to True to get messages in the Console about the status of the run code.
+
+    Output
+    ------
+        results : Dictionary
+            same structure as output of 'pca()'
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'pca_incremental()' on data")
+        print('==============================================================')
+
+    ipca = None
+    names_independent, names_dependent = None, None
+    n_samples, n_chunks = 0, 0
+    buffer = []
+
+    ### first pass: updating decomposition chunk by chunk
+    for chunk in _iterate_chunks(chunks, batch_size):
+        if names_independent is None:
+            names_independent, names_dependent = _select_variables(list(chunk.columns),
+                                                                   independent_variables,
+                                                                   dependent_variables)
+            n_variables = len(names_independent + names_dependent)
+            ipca = decomposition.IncrementalPCA(n_components = n_variables)
+        values = _chunk_values(chunk, names_independent + names_dependent)
+        n_samples += values.shape[0]
+        n_chunks += 1
+
+        # first update requires at least as many samples as components
+        buffer.append(values)
+        if not hasattr(ipca, 'components_') and sum(len(block) for block in buffer) < n_variables:
+            continue
+        ipca.partial_fit(np.concatenate(buffer))
+        buffer = []
+
+    if names_independent is None:
+        raise ValueError("No data provided in chunks.")
+    if n_samples < n_variables:
+        raise ValueError("PCA not possible with more variables than samples.")
+    if buffer:
+        ipca.partial_fit(np.concatenate(buffer))
+
+    ### second pass: determining scores of first n_comp components chunk by chunk
+    loadings = ipca.components_[:n_comp].T
+    scores, sample_index = [], []
+    for chunk in _iterate_chunks(chunks, batch_size):
+        scores.append((_chunk_values(chunk, names_independent + names_dependent) - ipca.mean_) @ loadings)
+        sample_index.extend(chunk.index)
+    scores = np.concatenate(scores)
+
+    if len(names_dependent) == 0:
+        loadings_independent = loadings
+        loadings_dependent = np.array([[],[]]).T
+    else:
+        loadings_independent = loadings[:-len(names_dependent), :]
+        loadings_dependent = loadings[-len(names_dependent):, :]
+    variances = ipca.explained_variance_ratio_
+    percent_explained = np.around(100*variances/np.sum(variances), decimals=2)
+    coef = np.corrcoef(scores[:,0], scores[:,1])[0,1]
+
+    if verbose:
+        print("Information about the success of the incremental PCA:")
+        print('----------------------------------------------------------------')
+        print('PCA on {} samples processed in {} chunks.'.format(n_samples,n_chunks))
+        for i in range(len(percent_explained)):
+            print('Principle component {} explains {}% of the total variance.'.format(i,percent_explained[i]))
+        print('\nThe correlation coefficient between PC1 and PC2 is {:.2e}.'.format(coef))
+        print('----------------------------------------------------------------')
+
+    results = {"method": 'pca',
+               "loadings_dependent": loadings_dependent,
+               "loadings_independent": loadings_independent,
+               "names_independent" : names_independent,
+               "names_dependent" : names_dependent,
+               "scores": scores,
+               "sample_index" : sample_index,
+               "percent_explained": percent_explained,
+               "corr_PC1_PC2": coef,
+               }
+
+    return results
+
+def _pca_solver(shape, n_comp, svd_solver = 'auto'):
+    """Select solver of singular value decomposition for PCA by data shape."""
+    n_samples, n_variables = shape
+    if svd_solver == 'auto':
+        if max(n_samples, n_variables) <= 500 or n_comp >= 0.8 * n_variables:
+            svd_solver = 'full'
+        else:
+            svd_solver = 'randomized'
+    elif svd_solver not in ['full', 'randomized', 'arpack']:
+        raise ValueError("Value of 'svd_solver' unknown: {}".format(svd_solver))
+
+    if svd_solver != 'full' and n_comp >= n_variables:
+        if svd_solver == 'arpack':
+            raise ValueError("Solver 'arpack' requires less components than variables.")
+        svd_solver = 'full'
+
+    return svd_solver
+
 def cca(data_frame,
         independent_variables,
         dependent_variables,
@@ -244,11 +415,13 @@ def constrained_ordination(data_frame,
                            dependent_variables,
                            method = 'cca',
                            n_comp = 2,
+                           engine = 'skbio',
         ):
     """Function that performs constrained ordination.
 
     Function makes use of skbio.stats.ordination on the input data and gives
-    the scores and loadings.
+    the scores and loadings. Alternatively, the numpy implementation
+    'ConstrainedOrdination' can be used.
 
     Input
     -----
@@ -263,6 +436,9 @@ def constrained_ordination(data_frame,
             specification of ordination method of choice. Options 'cca' & 'rda'
         n_comp : int, default is 2
             number of dimensions to return
+        engine : string, default is 'skbio'
+            implementation to use: 'skbio' (skbio.stats.ordination) or
+            'numpy' (ConstrainedOrdination, signs of axes may differ from skbio)
 
     Output
     ------
@@ -294,8 +470,25 @@ def constrained_ordination(data_frame,
         (data_independent_variables.shape[0] < data_independent_variables.shape[1]):
         raise ValueError("Ordination method {} not possible with more variables than samples.".format(method))
 
+    if engine == 'numpy':
+        try:
+            values_dependent = data_dependent_variables.to_numpy(dtype = float)
+            values_independent = data_independent_variables.to_numpy(dtype = float)
+        except(TypeError,ValueError):
+            raise TypeError("Not all column values are numeric values. Consider standardizing data first.")
+        ordination = ConstrainedOrdination(values_independent,
+                                           method = method,
+                                           n_comp = n_comp,
+                                           scaling = n_comp,
+                                           ).fit(values_dependent)
+        loadings_independent = ordination['biplot_scores']
+        loadings_dependent = ordination['features']
+        scores = ordination['samples']
+    elif engine != 'skbio':
+        raise ValueError("Engine {} not a valid option.".format(engine))
+
     # Performing constrained ordination using function from scikit-bio.
-    if method == 'cca':
+    elif method == 'cca':
         try:
             sci_ordination = sciord.cca(data_dependent_variables, data_independent_variables, scaling = n_comp)
         except(ValueError):
@@ -311,9 +504,10 @@ def constrained_ordination(data_frame,
     else:
         raise ValueError("Ordination method {} not a valid option.".format(method))
 
-    loadings_independent = sci_ordination.biplot_scores.to_numpy()[:,0:n_comp]
-    loadings_dependent = sci_ordination.features.to_numpy()[:,0:n_comp]
-    scores = sci_ordination.samples.to_numpy()[:,0:n_comp]
+    if engine == 'skbio':
+        loadings_independent = sci_ordination.biplot_scores.to_numpy()[:,0:n_comp]
+        loadings_dependent = sci_ordination.features.to_numpy()[:,0:n_comp]
+        scores = sci_ordination.samples.to_numpy()[:,0:n_comp]
 
     if loadings_independent.shape[1]<n_comp:
         raise ValueError("Number of dependent variables too small.")
@@ -329,6 +523,431 @@ def constrained_ordination(data_frame,
 
     return results
 
+class ConstrainedOrdination:
+    """Constrained ordination (CCA, RDA) implemented with numpy.
+
+    Linear-algebra implementation of the constrained ordination methods
+    skbio.stats.ordination.cca and skbio.stats.ordination.rda, designed for
+    repeated fits with the same independent variables (environment), e.g. for
+    bootstrapping, permutations or subsets of dependent variables (species).
+    The environmental matrix is prepared once and for RDA its orthonormal
+    basis (from its decomposition) is cached. The response can be a single
+    matrix (samples x species) or a stack of matrices (fits x samples x
+    species), all fitted in one batched computation. Results are returned as
+    raw arrays, only for the first n_comp constrained axes. Results agree with
+    skbio up to the sign of axes, which is fixed such that the largest
+    loading of dependent variables on each axis is positive.
+
+    For CCA, the constraints are weighted by the row sums of each response
+    matrix, such that their decomposition is computed per response (batched).
+    For resampled data sets (e.g. bootstrapping), a stack of independent
+    variables can be provided, matching the stack of response matrices.
+    In CCA, dependent variables with only zero values in a response matrix
+    are left out of its decomposition and get feature scores of NaN.
+
+    Attributes:
+    -------
+        method: str
+            ordination method, 'cca' or 'rda'
+        n_comp: int
+            number of constrained axes to return
+        scaling: int
+            scaling type of scores (1 or 2) as in skbio.stats.ordination
+        rank_deficient: str
+            handling of fits with fewer constrained axes than n_comp
+        deficient: np.ndarray
+            boolean per fit of last call of 'fit()', True for fits with
+            fewer constrained axes than n_comp
+
+    Example:
+    -------
+        >>> engine = ConstrainedOrdination(data[environment].to_numpy(), method = 'rda')
+        >>> results = engine.fit(np.stack([data[species].to_numpy()[index] for index in subsets]))
+        >>> results['samples'].shape   # fits x samples x n_comp
+    """
+
+    def __init__(self,
+                 values_independent,
+                 method = 'cca',
+                 n_comp = 2,
+                 scaling = 2,
+                 rank_deficient = 'raise',
+                 ):
+        """Initialize engine with values of independent variables.
+
+        Args:
+        -------
+            values_independent: np.ndarray
+                values of independent variables (samples x variables) or
+                stack of them (fits x samples x variables)
+            method: str, default 'cca'
+                ordination method, 'cca' or 'rda'
+            n_comp: int, default 2
+                number of constrained axes to return
+            scaling: int, default 2
+                scaling type of scores (1 or 2) as in skbio.stats.ordination
+            rank_deficient: str, default 'raise'
+                handling of fits with fewer constrained axes than n_comp:
+                'raise' for an error, 'nan' for results of NaN for these fits
+                (e.g. for resampled data sets)
+
+        Raises:
+        -------
+            ValueError: If method or scaling are not known or values are not finite
+        """
+        if method not in ['cca', 'rda']:
+            raise ValueError("Ordination method {} not a valid option.".format(method))
+        if scaling not in [1, 2]:
+            raise ValueError("Scaling {} not implemented.".format(scaling))
+        if rank_deficient not in ['raise', 'nan']:
+            raise ValueError("Option {} for rank deficient fits not valid.".format(rank_deficient))
+
+        self.values_independent = np.asarray(values_independent, dtype = float)
+        if not np.all(np.isfinite(self.values_independent)):
+            raise ValueError("Independent variables contain missing or infinite values.")
+        self.method = method
+        self.n_comp = n_comp
+        self.scaling = scaling
+        self.rank_deficient = rank_deficient
+        self.deficient = None
+
+        self._independent = self.values_independent
+        if self._independent.ndim == 2:
+            self._independent = self._independent[None]
+        if method == 'rda':
+            self._constraints = self._independent - self._independent.mean(axis = 1, keepdims = True)
+            self._basis = _orthonormal_basis(self._constraints)
+
+    def fit(self, values_dependent):
+        """Fit constrained ordination for one or several response matrices.
+
+        Args:
+        -------
+            values_dependent: np.ndarray
+                values of dependent variables (samples x species) or stack of
+                them (fits x samples x species)
+
+        Returns:
+        -------
+            results: dict of np.ndarray
+                for the first n_comp constrained axes (with leading fits
+                dimension for stacked input):
+                    * eigenvalues: eigenvalues as in skbio (CCA: inertia,
+                      RDA: singular values of fitted response)
+                    * samples: sample scores (samples x n_comp)
+                    * features: scores of dependent variables (species x n_comp)
+                    * biplot_scores: loadings of independent variables (variables x n_comp)
+
+        Raises:
+        -------
+            ValueError: If number of samples does not match or the
+                        number of constrained axes is smaller than n_comp
+                        (with rank_deficient = 'raise')
+        """
+        values = np.asarray(values_dependent, dtype = float)
+        single = values.ndim == 2
+        if single:
+            values = values[None]
+        if values.shape[1] != self._independent.shape[1]:
+            raise ValueError("Both data matrices must have the same number of rows.")
+        if self._independent.shape[0] > 1 and values.shape[0] != self._independent.shape[0]:
+            raise ValueError("Stacks of dependent and independent variables need to be of same size.")
+        if not np.all(np.isfinite(values)):
+            raise ValueError("Dependent variables contain missing or infinite values.")
+
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            if self.method == 'cca':
+                results = self._fit_cca(values)
+            else:
+                results = self._fit_rda(values)
+        for value in results.values():
+            value[self.deficient] = np.nan
+
+        if single:
+            results = {key: value[0] for key, value in results.items()}
+        return results
+
+    def _decompose(self, response, basis):
+        """SVD of fitted response, computed from the projection onto the basis."""
+        projection = np.swapaxes(basis, -1, -2) @ response
+        vectors, singular_values, vt = np.linalg.svd(projection, full_matrices = False)
+        u = basis @ vectors
+        tolerance = singular_values.max(axis = -1) * max(response.shape[1:]) * np.finfo(float).eps
+        rank = np.sum(singular_values > tolerance[:,None], axis = -1)
+        self.deficient = rank < self.n_comp
+        if self.rank_deficient == 'raise' and np.any(self.deficient):
+            raise ValueError("Number of dependent variables too small.")
+        n_comp = self.n_comp
+        u, singular_values, loadings = u[:,:,:n_comp], singular_values[:,:n_comp], np.swapaxes(vt[:,:n_comp,:], -1, -2)
+
+        # deterministic signs: largest loading of dependent variables per axis is positive
+        largest = np.take_along_axis(loadings, np.abs(loadings).argmax(axis = 1)[:,None,:], axis = 1)
+        signs = np.where(largest < 0, -1., 1.)
+        return u * signs, singular_values, loadings * signs
+
+    def _fit_rda(self, values):
+        """Batched RDA as in skbio.stats.ordination.rda."""
+        response = values - values.mean(axis = 1, keepdims = True)
+        basis = np.broadcast_to(self._basis, (response.shape[0],) + self._basis.shape[1:])
+        u, singular_values, loadings = self._decompose(response, basis)
+
+        scores = response @ loadings
+        const = np.sum(response**2, axis = (1,2))**0.25
+        if self.scaling == 1:
+            factor = const[:,None]
+        else:
+            factor = singular_values / const[:,None]
+
+        return dict(eigenvalues = singular_values,
+                    samples = scores / factor[:,None,:],
+                    features = loadings * factor[:,None,:],
+                    biplot_scores = _corr_columns(self._constraints, u),
+                    )
+
+    def _fit_cca(self, values):
+        """Batched CCA as in skbio.stats.ordination.cca."""
+        if np.any(values < 0):
+            raise ValueError("Dependent variables need to be non-negative.")
+        if np.any(values.max(axis = 2) <= 0):
+            raise ValueError("There are rows which only contain zero values.\
+                             Consider other option for data filtering and/or standardization.")
+
+        proportions = values / values.sum(axis = (1,2), keepdims = True)
+        column_marginals = proportions.sum(axis = 1)
+        row_marginals = proportions.sum(axis = 2)
+        expected = row_marginals[:,:,None] * column_marginals[:,None,:]
+        # dependent variables with only zeros (e.g. in resampled data) do not contribute
+        empty = column_marginals == 0
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            response = (proportions - expected) / np.sqrt(expected)
+        response[np.broadcast_to(empty[:,None,:], response.shape)] = 0.
+
+        # weighted standardization of constraints per response
+        independent = np.broadcast_to(self._independent, (values.shape[0],) + self._independent.shape[1:])
+        average = np.einsum('bn,bnm->bm', row_marginals, independent)
+        centered = independent - average[:,None,:]
+        std = np.sqrt(np.einsum('bn,bnm->bm', row_marginals, centered**2))
+        std[std == 0] = 1.
+        constraints = np.sqrt(row_marginals)[:,:,None] * centered / std[:,None,:]
+        basis = _orthonormal_basis(constraints)
+
+        u, singular_values, loadings = self._decompose(response, basis)
+        loadings_hat = response @ loadings / singular_values[:,None,:]
+        with np.errstate(divide = 'ignore', invalid = 'ignore'):
+            features = column_marginals[:,:,None]**-0.5 * loadings
+        features[empty] = np.nan
+        samples = row_marginals[:,:,None]**-0.5 * loadings_hat
+        if self.scaling == 1:
+            samples = samples * singular_values[:,None,:]
+        else:
+            features = features * singular_values[:,None,:]
+
+        return dict(eigenvalues = singular_values**2,
+                    samples = samples,
+                    features = features,
+                    biplot_scores = _corr_columns(constraints, u),
+                    )
+
+def permutation_test(data_frame,
+                     independent_variables,
+                     dependent_variables,
+                     method = 'cca',
+                     n_permutations = 999,
+                     batch_size = 100,
+                     seed = None,
+                     max_workers = 1,
+                     verbose = False,
+                     ):
+    """Permutation test on significance of constrained ordination (CCA, RDA).
+
+    Tests the significance of the relation between dependent variables
+    (species) and independent variables (environment) of the constrained
+    ordination, for the full model ('global') and for each constrained axis.
+    Rows of the (transformed) response matrix are permuted while the
+    decomposition of the constraint matrix is computed only once, such that
+    each permutation reduces to a small matrix product and singular value
+    decomposition. Permutations are processed in batches, optionally
+    distributed over a process pool (`max_workers`).
+
+    Test statistic is the pseudo-F ratio of constrained inertia (per degree of
+    freedom of the model) to residual inertia (per residual degree of freedom).
+    Axes are tested sequentially (as 'anova.cca(by = "axis")' in R vegan): for
+    axis k, the sample scores of axes 1 to k-1 are conditioning variables,
+    removed from response and constraints, and the statistic is the pseudo-F
+    of the first axis of this partial model.
+
+    Input
+    -----
+        data_frame : pd.DataFrame
+            Tabular data containing variables to be evaluated with standard
+            column names and rows of sample data.
+        independent_variables : list of strings
+           list with column names data to be the independent variables (=environment)
+        dependent_variables : list of strings
+           list with column names data to be the dependen variables (=species)
+        method : string, default is cca
+            specification of ordination method of choice. Options 'cca' & 'rda'
+        n_permutations : int, default is 999
+            number of permutations
+        batch_size : int, default is 100
+            number of permutations per batch
+        seed : int or None, default is None
+            seed of random number generator for reproducible results
+        max_workers : int, default is 1
+            number of processes the batches are distributed over;
+            1 processes all batches sequentially
+        verbose : Boolean, The default is False.
+            Set to True to get messages in the Console about the status of the run code.
+
+    Output
+    ------
+        results : pd.DataFrame
+            inertia (CCA: chi-square inertia, RDA: variance), pseudo-F
+            statistic and p-value for the full model (index 'global')
+            and each constrained axis (index 'axis_1', 'axis_2', ...)
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'permutation_test()' on data")
+        print('==============================================================')
+
+    data,cols= check_data_frame(data_frame)
+    names_independent = _extract_variables(cols,
+                          independent_variables,
+                          name_variables = 'independent variables'
+                          )
+    names_dependent = _extract_variables(cols,
+                          dependent_variables,
+                          name_variables = 'dependent variables'
+                          )
+    try:
+        values_dependent = data[names_dependent].to_numpy(dtype = float)
+        values_independent = data[names_independent].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise TypeError("Not all column values are numeric values. Consider standardizing data first.")
+
+    response, basis = _constrained_matrices(values_dependent, values_independent, method)
+    n_samples, rank = basis.shape
+    df_residual = n_samples - rank - 1
+    if df_residual < 1:
+        raise ValueError("Permutation test not possible with as many independent variables as samples.")
+
+    models = _permutation_models(response, basis)
+    statistic = np.concatenate([_permutation_statistic(basis_model.T @ response_model,
+                                                       np.sum(response_model**2),
+                                                       df_residual,
+                                                       first = i > 0)[None]
+                                for i, (response_model, basis_model) in enumerate(models)])
+
+    batches = _run_in_batches(_permutation_batch,
+                              (models, df_residual),
+                              n_permutations,
+                              batch_size,
+                              seed = seed,
+                              max_workers = max_workers,
+                              )
+    statistic_permuted = np.concatenate(batches, axis = 0)
+
+    p_values = (np.sum(statistic_permuted >= statistic * (1 - 1e-12), axis = 0) + 1) / (n_permutations + 1)
+
+    n_axes = statistic.shape[0] - 1
+    eigenvalues = np.linalg.svd(basis.T @ response, compute_uv = False)[:n_axes]**2
+    inertia = np.r_[np.sum(eigenvalues), eigenvalues]
+    if method == 'rda':
+        inertia = inertia / (n_samples - 1)
+
+    results = pd.DataFrame({'inertia' : inertia,
+                            'F' : statistic,
+                            'p_value' : p_values,
+                            },
+                           index = ['global'] + ['axis_{}'.format(i + 1) for i in range(n_axes)],
+                           )
+
+    if verbose:
+        print("Significance of constrained ordination {} from {} permutations:".format(
+            method,n_permutations))
+        print('----------------------------------------------------------------')
+        print(results)
+        print('----------------------------------------------------------------')
+
+    return results
+
+def _constrained_matrices(values_dependent,
+                          values_independent,
+                          method = 'cca',
+                          ):
+    """Transformed response matrix and orthonormal basis of constraints.
+
+    For CCA, the response is the matrix of contributions to chi-square and
+    the constraints are centered and weighted with the row weights; for RDA,
+    both matrices are centered (as in skbio.stats.ordination). The fitted
+    response is the projection of the response onto the basis.
+    """
+    if method == 'cca':
+        if np.any(values_dependent.sum(axis = 1) == 0):
+            raise ValueError("There are rows which only contain zero values.\
+                             Consider other option for data filtering and/or standardization.")
+        proportions = values_dependent / values_dependent.sum()
+        row_weights = proportions.sum(axis = 1)
+        expected = np.outer(row_weights, proportions.sum(axis = 0))
+        response = (proportions - expected) / np.sqrt(expected)
+        constraints = (values_independent - row_weights @ values_independent) * np.sqrt(row_weights)[:,None]
+    elif method == 'rda':
+        response = values_dependent - values_dependent.mean(axis = 0)
+        constraints = values_independent - values_independent.mean(axis = 0)
+    else:
+        raise ValueError("Ordination method {} not a valid option.".format(method))
+
+    if not (np.all(np.isfinite(response)) and np.all(np.isfinite(constraints))):
+        raise ValueError("Data contains missing or infinite values. Consider filtering data first.")
+
+    basis = _orthonormal_basis(constraints)
+    return response, basis[:, np.any(basis != 0, axis = 0)]
+
+def _permutation_models(response,
+                        basis,
+                        ):
+    """Responses and bases of constraints of full model and of partial models per axis.
+
+    First entry is the full model. For testing axis k, the sample scores of
+    axes 1 to k-1 are removed from the response, the basis of the constraints
+    is reduced to the remaining axes.
+    """
+    vectors = np.linalg.svd(basis.T @ response)[0]
+    n_axes = min(basis.shape[1], response.shape[1])
+    models = [(response, basis)]
+    for k in range(n_axes):
+        scores = basis @ vectors[:, :k]
+        models.append((response - scores @ (scores.T @ response), basis @ vectors[:, k:]))
+    return models
+
+def _permutation_statistic(projection,
+                           inertia_total,
+                           df_residual,
+                           first = False,
+                           ):
+    """Pseudo-F statistic of model (or of its first axis) from projected response(s)."""
+    eigenvalues = np.linalg.svd(projection, compute_uv = False)**2
+    inertia_constrained = eigenvalues.sum(axis = -1)
+    inertia_residual = (inertia_total - inertia_constrained) / df_residual
+    if first:
+        return eigenvalues[..., 0] / inertia_residual
+    return inertia_constrained / projection.shape[-2] / inertia_residual
+
+def _permutation_batch(models,
+                       df_residual,
+                       size,
+                       seed,
+                       ):
+    """Test statistics for one batch of permutations of response rows (size x models)."""
+    rng = np.random.default_rng(seed)
+    permutations = rng.permuted(np.tile(np.arange(models[0][0].shape[0]), (size, 1)), axis = 1)
+    statistic = np.empty((size, len(models)))
+    for i, (response, basis) in enumerate(models):
+        projection = np.einsum('nk,bnp->bkp', basis, response[permutations])
+        statistic[:, i] = _permutation_statistic(projection, np.sum(response**2), df_residual, first = i > 0)
+    return statistic
+
 def _extract_variables(columns,
                       variables,
                       name_variables = 'variables'
@@ -369,3 +988,69 @@ def _extract_variables(columns,
 
     return intersection
 
+def _select_variables(cols,
+                      independent_variables = False,
+                      dependent_variables = False,
+                      ):
+    """Names of independent and dependent variables selected for PCA."""
+    if independent_variables is False and dependent_variables is False:
+        return cols, []
+
+    names_independent, names_dependent = [], []
+    if independent_variables is not False:
+        names_independent = _extract_variables(cols,
+                                               independent_variables,
+                                               name_variables = 'independent variables'
+                                               )
+    if dependent_variables is not False:
+        names_dependent = _extract_variables(cols,
+                                             dependent_variables,
+                                             name_variables = 'dependent variables'
+                                             )
+    return names_independent, names_dependent
+
+def _iterate_chunks(chunks, batch_size = 10000):
+    """Iterate over chunks of data (as pd.DataFrames) for one pass."""
+    if callable(chunks):
+        yield from chunks()
+    elif isinstance(chunks, (pd.DataFrame, np.ndarray)):
+        for start in range(0, chunks.shape[0], batch_size):
+            if isinstance(chunks, pd.DataFrame):
+                yield chunks.iloc[start:start + batch_size]
+            else:
+                yield pd.DataFrame(np.asarray(chunks[start:start + batch_size]),
+                                   index = range(start, min(start + batch_size, chunks.shape[0])))
+    elif isinstance(chunks, (list, tuple)):
+        yield from chunks
+    else:
+        raise ValueError("Chunks need to be provided as callable, list, pd.DataFrame or np.ndarray \
+                         to be iterated twice, but are given as type {}".format(type(chunks)))
+
+def _chunk_values(chunk, variables):
+    """Numeric values of variables in chunk."""
+    try:
+        values = chunk[variables].to_numpy(dtype = float)
+    except (KeyError, ValueError, TypeError):
+        raise TypeError("Not all column values are numeric values. Consider standardizing data first.")
+    if np.isnan(values).any():
+        raise ValueError("Chunks contain missing values. Consider filtering/transforming data first.")
+    return values
+
+def _corr_columns(x, y):
+    """Correlation between columns of stacked matrices x and y (fits x samples x columns)."""
+    def standardize(a):
+        a = a - a.mean(axis = 1, keepdims = True)
+        std = a.std(axis = 1, keepdims = True)
+        std[std == 0] = 1.
+        return a / std
+    return np.swapaxes(standardize(x), -1, -2) @ standardize(y) / x.shape[1]
+
+def _orthonormal_basis(constraints):
+    """Orthonormal basis of column space of (stacked) constraint matrices.
+
+    Basis vectors beyond the rank of a matrix are set to zero, such that
+    projections onto the basis are correct for rank deficient constraints.
+    """
+    basis, singular_values, _ = np.linalg.svd(constraints, full_matrices = False)
+    tolerance = singular_values.max(axis = -1, keepdims = True) * max(constraints.shape[-2:]) * np.finfo(float).eps
+    return basis * (singular_values > tolerance)[..., None, :]
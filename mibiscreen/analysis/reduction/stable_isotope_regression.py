@@ -6,9 +6,7 @@
 """
 import numpy as np
 import mibiscreen.data.settings.standard_names as names
-from mibiscreen.data.check_data import _generate_dict_other_names
-from mibiscreen.data.settings.contaminants import properties_contaminants
-from mibiscreen.data.settings.isotopes import properties_isotopes
+from mibiscreen.data.check_data import alias_index
 
 
 def Lambda_regression(delta_C,
@@ -374,8 +372,9 @@ def extract_isotope_data(df,
         numeric isotope data
 
     """
-    other_names_contaminants = _generate_dict_other_names(properties_contaminants)
-    other_names_isotopes = _generate_dict_other_names(properties_isotopes)
+    index = alias_index()
+    other_names_contaminants = index.contaminants
+    other_names_isotopes = index.isotopes
 
     molecule_standard = other_names_contaminants.get(molecule.lower(), False)
     isotope_13C = other_names_isotopes.get(name_13C.lower(), False)
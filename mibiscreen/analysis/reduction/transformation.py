@@ -5,8 +5,8 @@
 @author: Alraune Zech, Jorrit Bakker
 """
 
+import json
 import numpy as np
-from scipy.stats import zscore
 from mibiscreen.data.check_data import check_data_frame
 from mibiscreen.data.set_data import determine_quantities
 
@@ -160,8 +160,292 @@ def transform_values(data_frame,
         elif how == 'center':
             data[quantity] =  data[quantity]-data[quantity].mean()
         elif how == 'standardize':
+            from scipy.stats import zscore  # imported on use, scipy.stats is slow to import
             data[quantity] = zscore(data[quantity].values)
         else:
             raise ValueError("Value of 'how' unknown: {}".format(how))
 
     return data
+
+class ValueTransformer:
+    """Transformation of values with parameters fitted on reference data.
+
+    Counterpart of 'filter_values()' and 'transform_values()' for applying
+    the same transformation to new data, e.g. further monitoring rounds or
+    chunks of data: the parameters (per column) are determined once from a
+    reference data set ('fit()') and stored as arrays. 'transform()' then
+    applies replacement of missing values and the transformation to the whole
+    block of selected columns in one vectorized step. Fitted transformers
+    can be saved to and loaded from json-files.
+
+    Attributes:
+    -------
+        how: str
+            Type of transformation: 'log_scale', 'center', 'standardize' or 'none'
+        replace_NaN: str, float or None
+            handling of missing/NaN values as in 'filter_values()'; None keeps them
+        quantities: list
+            names of quantities (columns) the transformer is fitted on
+        fill_values: np.ndarray
+            values replacing missing values per quantity
+        mean, scale: np.ndarray
+            per quantity: transformed value is (value - mean)/scale
+
+    Example:
+    -------
+        >>> transformer = ValueTransformer(how = 'standardize', replace_NaN = 'median')
+        >>> data_ref_trans = transformer.fit_transform(data_reference)
+        >>> data_new_trans = transformer.transform(data_new_round)
+        >>> transformer.save('transformer.json')
+    """
+
+    _hows = ['log_scale', 'center', 'standardize', 'none']
+
+    def __init__(self,
+                 how = 'standardize',
+                 name_list = 'all',
+                 replace_NaN = None,
+                 log_scale_A = 1,
+                 log_scale_B = 1,
+                 verbose = False,
+                 ):
+        """Initialize transformer (not fitted).
+
+        Args:
+        -------
+            how: string, default 'standardize'
+                Type of transformation:
+                    * standardize
+                    * log_scale
+                    * center
+                    * none (only replacement of missing values)
+            name_list: string or list of strings, default 'all'
+                list of quantities (column names) to perfrom transformation on
+            replace_NaN : string, float or None, default None
+                Keyword specifying how to handle missing/NaN/non-numeric values
+                (see 'filter_values()'): 'remove', 'zero', 'average', 'median',
+                float-value or None (missing values are kept)
+            log_scale_A : Integer or float, default 1
+                Log transformation parameter A: log10(Ax+B).
+            log_scale_B : Integer or float, default 1
+                Log transformation parameter B: log10(Ax+B).
+            verbose : Boolean, The default is False.
+               Set to True to get messages in the Console about the status of the run code.
+
+        Raises:
+        -------
+            ValueError: If 'how' or 'replace_NaN' are not known
+        """
+        if how not in self._hows:
+            raise ValueError("Value of 'how' unknown: {}".format(how))
+        if not (replace_NaN in [None, 'remove', 'zero', 'average', 'median']
+                or isinstance(replace_NaN, (float, int))):
+            raise ValueError("Value of 'replace_NaN' unknown: {}".format(replace_NaN))
+
+        self.how = how
+        self.name_list = name_list
+        self.replace_NaN = replace_NaN
+        self.log_scale_A = log_scale_A
+        self.log_scale_B = log_scale_B
+        self.verbose = verbose
+        self.quantities = None
+        self.fill_values = None
+        self.mean = None
+        self.scale = None
+
+    def fit(self, data_frame):
+        """Determine parameters of transformation from reference data.
+
+        Args:
+        -------
+            data_frame: pandas.DataFrames
+                dataframe with the measurements of reference data set
+
+        Returns:
+        -------
+            self: ValueTransformer
+                fitted transformer
+        """
+        data,cols= check_data_frame(data_frame,inplace = True)
+        quantities, _ = determine_quantities(cols,
+                                          name_list = self.name_list,
+                                          verbose = self.verbose)
+        self.quantities = [col for col in cols if col in quantities]
+        values = self._values(data)
+
+        if self.replace_NaN == 'zero':
+            self.fill_values = np.zeros(values.shape[1])
+        elif self.replace_NaN == 'average':
+            self.fill_values = np.nanmean(values, axis = 0)
+        elif self.replace_NaN == 'median':
+            self.fill_values = np.nanmedian(values, axis = 0)
+        elif isinstance(self.replace_NaN, (float, int)):
+            self.fill_values = np.full(values.shape[1], float(self.replace_NaN))
+        else:
+            self.fill_values = np.full(values.shape[1], np.nan)
+
+        values = self._fill(values)
+        if self.replace_NaN == 'remove':
+            values = values[~np.isnan(values).any(axis = 1)]
+
+        if self.how == 'log_scale':
+            values = np.log10(self.log_scale_A * values + self.log_scale_B)
+        if self.how in ['center','standardize']:
+            self.mean = np.nanmean(values, axis = 0)
+        else:
+            self.mean = np.zeros(values.shape[1])
+        if self.how == 'standardize':
+            self.scale = np.nanstd(values, axis = 0)
+        else:
+            self.scale = np.ones(values.shape[1])
+
+        if self.verbose:
+            print("Transformer '{}' fitted on {} samples of {} quantities.".format(
+                self.how,values.shape[0],len(self.quantities)))
+
+        return self
+
+    def transform(self,
+                  data_frame,
+                  inplace = False,
+                  ):
+        """Transform data with parameters fitted on reference data.
+
+        Args:
+        -------
+            data_frame: pandas.DataFrames
+                dataframe with the measurements, containing all quantities
+                the transformer is fitted on
+            inplace: bool, default False
+                If False, return a copy. Otherwise, do operation in place.
+
+        Returns:
+        -------
+            data: pd.DataFrame
+                dataframe with transformed values
+
+        Raises:
+        -------
+            ValueError: If transformer is not fitted or quantities are missing in data
+        """
+        if self.quantities is None:
+            raise ValueError("Transformer not fitted yet. Run 'fit()' first.")
+        data,cols= check_data_frame(data_frame,inplace = inplace)
+        missing = [quantity for quantity in self.quantities if quantity not in cols]
+        if missing:
+            raise ValueError("Quantities of fitted transformer not in data: {}".format(missing))
+
+        values = self._fill(self._values(data))
+        if self.how == 'log_scale':
+            values = np.log10(self.log_scale_A * values + self.log_scale_B)
+        values = (values - self.mean) / self.scale
+
+        data[self.quantities] = values
+        if self.replace_NaN == 'remove':
+            data.drop(data.index[np.isnan(values).any(axis = 1)], inplace = True)
+
+        return data
+
+    def fit_transform(self, data_frame):
+        """Fit transformer on data and transform it.
+
+        Args:
+        -------
+            data_frame: pandas.DataFrames
+                dataframe with the measurements of reference data set
+
+        Returns:
+        -------
+            data: pd.DataFrame
+                dataframe with transformed values
+        """
+        return self.fit(data_frame).transform(data_frame)
+
+    def transform_chunks(self, chunks):
+        """Transform a stream of data chunks, e.g. from 'standardize_chunks()'.
+
+        Args:
+        -------
+            chunks: iterable of pandas.DataFrames
+                chunks of data with the measurements
+
+        Returns:
+        -------
+            generator of pd.DataFrame
+                transformed chunks
+        """
+        for chunk in chunks:
+            yield self.transform(chunk, inplace = True)
+
+    def save(self, file_path):
+        """Save fitted transformer to json-file.
+
+        Args:
+        -------
+            file_path: str
+                path of json-file
+
+        Returns:
+        -------
+            None
+        """
+        if self.quantities is None:
+            raise ValueError("Transformer not fitted yet. Run 'fit()' first.")
+        state = dict(how = self.how,
+                     name_list = self.name_list,
+                     replace_NaN = self.replace_NaN,
+                     log_scale_A = self.log_scale_A,
+                     log_scale_B = self.log_scale_B,
+                     quantities = self.quantities,
+                     fill_values = _to_json_list(self.fill_values),
+                     mean = _to_json_list(self.mean),
+                     scale = _to_json_list(self.scale),
+                     )
+        with open(file_path, 'w') as file:
+            json.dump(state, file, indent = 2)
+
+    @classmethod
+    def load(cls, file_path):
+        """Load fitted transformer from json-file.
+
+        Args:
+        -------
+            file_path: str
+                path of json-file written by 'save()'
+
+        Returns:
+        -------
+            transformer: ValueTransformer
+                fitted transformer
+        """
+        with open(file_path, 'r') as file:
+            state = json.load(file)
+
+        transformer = cls(how = state['how'],
+                          name_list = state['name_list'],
+                          replace_NaN = state['replace_NaN'],
+                          log_scale_A = state['log_scale_A'],
+                          log_scale_B = state['log_scale_B'],
+                          )
+        transformer.quantities = state['quantities']
+        for key in ['fill_values','mean','scale']:
+            setattr(transformer, key, np.array(state[key], dtype = float))
+
+        return transformer
+
+    def _values(self, data):
+        """Numeric block of fitted quantities, with inf treated as missing."""
+        try:
+            values = data[self.quantities].to_numpy(dtype = float, copy = True)
+        except (TypeError, ValueError):
+            raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+        values[np.isinf(values)] = np.nan
+        return values
+
+    def _fill(self, values):
+        """Replace missing values by fill values per quantity."""
+        return np.where(np.isnan(values), self.fill_values, values)
+
+def _to_json_list(array):
+    """Array as list for json, with nan as None."""
+    return [None if np.isnan(value) else float(value) for value in array]
@@ -6,15 +6,60 @@
 """
 
 import numpy as np
+import pandas as pd
 import mibiscreen.data.settings.standard_names as names
 from mibiscreen.data.check_data import check_data_frame
 from mibiscreen.data.set_data import determine_quantities
+from mibiscreen.data.set_data import group_membership
+from mibiscreen.data.settings.contaminants import properties_contaminants
+
+_molar_mass_carbon = 12.011 # [g/mol]
+
+_basis_prefix = dict(mass = 'concentration',
+                     molar = 'molar_concentration',
+                     carbon = 'carbon_concentration',
+                     )
+
+def _conversion_table():
+    """Factors converting mass concentrations in [ug/l] of contaminants.
+
+    Columns are the basis of the total:
+        - 'mass': mass concentration in [ug/l] (factor 1)
+        - 'molar': molar concentration in [umol/l], i.e. divided by molecular mass
+        - 'carbon': carbon-equivalent concentration in [ug C/l], i.e. molar
+          concentration times number of carbon atoms and molar mass of carbon
+    Contaminants without molecular mass (or number of carbon atoms) have nan.
+    """
+    table = {}
+    for name, prop in properties_contaminants.items():
+        molecular_mass = prop.get('molecular_mass') or np.nan
+        carbon_atoms = prop.get('carbon_atoms') or np.nan
+        table[name] = dict(mass = 1.,
+                           molar = 1./molecular_mass,
+                           carbon = carbon_atoms*_molar_mass_carbon/molecular_mass,
+                           )
+    return pd.DataFrame.from_dict(table, orient = 'index', dtype = float)
+
+_conversion_factors = _conversion_table()
+
+def _basis_factors(quantities, basis):
+    """Conversion vector for quantities to basis, nan where not available."""
+    if basis not in _basis_prefix:
+        raise ValueError("Basis '{}' not known. Choose from {}.".format(basis,list(_basis_prefix)))
+    if basis == 'mass':
+        return np.ones(len(quantities))
+    factors = _conversion_factors[basis].reindex(quantities).to_numpy()
+    if np.isnan(factors).any():
+        print("WARNING: No molecular mass or carbon atoms for quantities (excluded from {} total): {}".format(
+            basis,[quantities[i] for i in np.flatnonzero(np.isnan(factors))]))
+    return factors
 
 
 def total_concentration(
         data_frame,
         name_list = "all",
         include_as = False,
+        basis = 'mass',
         verbose = False,
         **kwargs,
         ):
@@ -33,13 +78,20 @@ def total_concentration(
             or list of strings with names of quantities to use
         include_as: str or False, default is 'False'
             optional name of column to include new pd.series to data_frame
+        basis: str, default 'mass'
+            basis of total concentration:
+                - 'mass': total mass concentration in [ug/l]
+                - 'molar': total molar concentration in [umol/l]
+                - 'carbon': total carbon-equivalent concentration in [ug C/l]
+            molar and carbon totals are based on molecular mass and number of
+            carbon atoms of contaminants, quantities without are excluded
         verbose: Boolean
             verbose flag (default False)
 
     Output
     ------
         tot_conc: pd.Series
-            Total concentration of contaminants in [ug/l]
+            Total concentration of contaminants in [ug/l] (or [umol/l], [ug C/l])
 
     """
     if verbose:
@@ -62,13 +114,16 @@ def total_concentration(
 
     ### actually performing summation
     # try:
-    tot_conc = data[quantities].sum(axis = 1)
+    if basis == 'mass':
+        tot_conc = data[quantities].sum(axis = 1)
+    else:
+        tot_conc = data[quantities].mul(_basis_factors(quantities, basis), axis = 1).sum(axis = 1)
     # except TypeError:
     #     raise ValueError("Data not in standardized format. Run 'standardize()' first.")
 
     if verbose:
         print('________________________________________________________________')
-        print("total concentration in [ug/l] is:\n{}".format(tot_conc))
+        print("total {} concentration is:\n{}".format(basis,tot_conc))
         print('--------------------------------------------------')
 
     ### additing series to data frame
@@ -353,3 +408,95 @@ def total_metabolites_count(
         )
 
     return tot_count
+
+def total_groups(
+        data_frame,
+        groups = ['BTEX','BTEXIIN','MAH','PAH','phenols','metabolites'],
+        threshold = 0.,
+        basis = 'mass',
+        verbose = False,
+        ):
+    """Calculate total concentrations and counts for several groups at once.
+
+    Instead of selecting and summing each group separately (as in
+    'total_concentration()' and 'total_count()'), the numeric block of all
+    quantities of the groups is extracted once and totals and counts of all
+    groups are determined as matrix product with the group membership matrix
+    (see 'group_membership()'). Values 'inf' are treated like NaN for the
+    concentration summation and as non-zero concentration for the count.
+
+    Input
+    -----
+        data: pd.DataFrame
+            Contaminant concentrations in [ug/l], i.e. microgram per liter
+        groups: list of str, default ['BTEX','BTEXIIN','MAH','PAH','phenols','metabolites']
+            short names for groups of quantities to use
+        threshold: float, default 0
+            threshold concentration value in [ug/l] to test on exceedence for count
+        basis: str or list of str, default 'mass'
+            basis of total concentrations, one or several of:
+                - 'mass': total mass concentration in [ug/l] ('concentration_<group>')
+                - 'molar': total molar concentration in [umol/l] ('molar_concentration_<group>')
+                - 'carbon': total carbon-equivalent concentration in [ug C/l]
+                  ('carbon_concentration_<group>')
+            molar and carbon totals are based on molecular mass and number of
+            carbon atoms of contaminants, quantities without are excluded
+        verbose: Boolean
+            verbose flag (default False)
+
+    Output
+    ------
+        totals: pd.DataFrame
+            total concentrations per group and basis and number of
+            quantities exceeding the threshold ('count_<group>') per group
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'total_groups()' on data")
+        print('==============================================================')
+
+    threshold = float(threshold)
+    if threshold<0:
+        raise ValueError("Threshold value '{}' not valid.".format(threshold))
+    if isinstance(groups, str):
+        groups = [groups]
+    if isinstance(basis, str):
+        basis = [basis]
+
+    ### check on correct data input format and extracting column names as list
+    data,cols= check_data_frame(data_frame,inplace = True)
+
+    ### membership matrix: quantities x groups
+    membership = group_membership(cols, groups, verbose = verbose)
+
+    try:
+        values = data[membership.index].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+
+    if np.isinf(values).any():
+        print("Warning: DataFrame contains 'inf'. These values are treated like NaN for concentration summation")
+        print("         and are considered as non-zero concentration for count.")
+
+    matrix = membership.to_numpy()
+    quantities = membership.index.to_list()
+    values_finite = np.where(np.isfinite(values), values, 0.)
+
+    totals = pd.DataFrame(index = data.index)
+    for basis_i in basis:
+        factors = _basis_factors(quantities, basis_i)
+        tot_conc = values_finite @ (np.nan_to_num(factors)[:,None] * matrix)
+        for j,group in enumerate(membership.columns):
+            totals['{}_{}'.format(_basis_prefix[basis_i],group)] = tot_conc[:,j]
+
+    tot_count = (values > threshold) @ matrix
+    for j,group in enumerate(membership.columns):
+        totals['count_{}'.format(group)] = tot_count[:,j].astype(int)
+
+    if verbose:
+        print('________________________________________________________________')
+        print("total concentrations in [ug/l] and counts of quantities exceeding \
+              concentration of {:.2f} ug/l :\n{}".format(threshold,totals))
+        print('--------------------------------------------------')
+
+    return totals
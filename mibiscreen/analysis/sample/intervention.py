@@ -3,11 +3,12 @@
 @author: Alraune Zech
 """
 
+import gc
 import numpy as np
 import pandas as pd
-from IPython.display import display
 import mibiscreen.data.settings.standard_names as names
 from mibiscreen.data.check_data import check_data_frame
+from mibiscreen.data.check_data import standard_names
 from mibiscreen.data.set_data import determine_quantities
 from mibiscreen.data.set_data import extract_settings
 from .properties import properties
@@ -75,6 +76,7 @@ def thresholds_for_intervention_ratio(
         list_names.append(cont+'_thr_ratio')
 
     if verbose:
+        from IPython.display import display  # imported on use, IPython is slow to import
         print("Evaluting ratio of contaminant concentration to intervention threshold {}:".format(
             contaminant_group))
         display(data_thresh[list_names])
@@ -87,6 +89,7 @@ def thresholds_for_intervention_traffic(
         data_frame,
         contaminant_group = "BTEXIIN",
         include = False,
+        decode = True,
         verbose = False,
         ):
     """Function to evalute intervention threshold exceedance.
@@ -94,6 +97,11 @@ def thresholds_for_intervention_traffic(
         Determines which contaminants exceed concentration thresholds set by
         the Dutch government for intervention.
 
+        Exceedance is evaluated at once for all samples and contaminants as
+        boolean matrix (samples x contaminants), which is stored per sample as
+        packed bitmask. A sample without exceedance but missing concentration
+        values of contaminants gets a yellow traffic light (no decision).
+
     Input
     -----
         data_frame: pd.DataFrame
@@ -104,6 +112,11 @@ def thresholds_for_intervention_traffic(
                                   indene, indane and naphthaline)
         include: bool, default False
             Whether to modify the DataFrame rather than creating a new one.
+        decode: bool, default True
+            Whether to provide the contaminants above the threshold as list
+            of names per sample; if False the packed bitmask (integer) is
+            provided instead, which can be decoded with
+            'decode_intervention_contaminants()'
         verbose: Boolean, default False
             verbose flag
 
@@ -115,6 +128,9 @@ def thresholds_for_intervention_traffic(
                 - traffic light if well requires intervention
                 - number of contaminants exceeding the intervention value
                 - list of contaminants above the threshold of intervention
+                  (or bitmask with bit i set if contaminant i is above threshold)
+            The evaluated contaminants (in order of bits) are listed in
+            intervention.attrs['intervention_contaminants'].
     """
     if verbose:
         print('==============================================================')
@@ -134,25 +150,28 @@ def thresholds_for_intervention_traffic(
     else:
         intervention= extract_settings(data)
 
-    nr_samples = data.shape[0] # number of samples
-    traffic_nr = np.zeros(nr_samples,dtype=int)
-    traffic_list = [[] for _ in range(nr_samples)]
-
+    thresholds = np.array([properties[cont]['thresholds_for_intervention_NL'] for cont in quantities],
+                          dtype = float)
     try:
-        for cont in quantities:
-            th_value = properties[cont]['thresholds_for_intervention_NL']
-            traffic_nr += (data[cont].values > th_value)
-            for i in range(nr_samples):
-                if data[cont].values[i] > th_value:
-                    traffic_list[i].append(cont)
-    except TypeError:
+        values = data[quantities].to_numpy(dtype = float)
+    except (TypeError, ValueError):
         raise ValueError("Data not in standardized format. Run 'standardize()' first.")
 
+    ### exceedance matrix: samples x contaminants
+    exceedance = values > thresholds
+    missing = np.isnan(values)
+
+    traffic_nr = exceedance.sum(axis = 1)
     traffic_light = np.where(traffic_nr>0,"red","green")
-    traffic_light[np.isnan(traffic_nr)] = 'y'
+    traffic_light[(traffic_nr == 0) & missing.any(axis = 1)] = 'y'
+
     intervention[names.name_intervention_traffic] = traffic_light
     intervention[names.name_intervention_number] = traffic_nr
-    intervention[names.name_intervention_contaminants] = traffic_list
+    if decode:
+        intervention[names.name_intervention_contaminants] = _exceedance_names(exceedance, quantities)
+    else:
+        intervention[names.name_intervention_contaminants] = _pack_exceedance(exceedance)
+    intervention.attrs['intervention_contaminants'] = list(quantities)
 
     if verbose:
         print("Evaluation of contaminant concentrations exceeding intervention values for {}:".format(
@@ -161,9 +180,244 @@ def thresholds_for_intervention_traffic(
         print("Red light: Intervention values exceeded for {} out of {} locations".format(
             np.sum(traffic_nr >0),data.shape[0]))
         print("green light: Concentrations below intervention values at {} out of {} locations".format(
-            np.sum(traffic_nr == 0),data.shape[0]))
+            np.sum(traffic_light == 'green'),data.shape[0]))
         print("Yellow light: No decision possible at {} out of {} locations".format(
-            np.sum(np.isnan(traffic_nr)),data.shape[0]))
+            np.sum(traffic_light == 'y'),data.shape[0]))
         print('________________________________________________________________')
 
     return intervention
+
+def threshold_registry(
+        file_path = None,
+        verbose = False,
+        ):
+    """Registry of concentration thresholds of contaminants per regulation.
+
+        Table of thresholds with contaminants as rows and regulations (limit
+        sets) as columns, in [ug/l]. Default registry contains the Dutch
+        intervention values ('intervention_NL') from the contaminant
+        properties. Further regulations, e.g. target values or limits of other
+        jurisdictions, can be provided as csv-file: first column with names
+        of contaminants (transformed to standard names), one column per
+        regulation and header with names of regulations. Empty entries mark
+        contaminants not regulated by a limit set.
+
+    Input
+    -----
+        file_path: str or None, default None
+            path to csv-file with thresholds; if None the default registry
+            with Dutch intervention values is returned
+        verbose: Boolean, default False
+            verbose flag
+
+    Output
+    ------
+        registry: pd.DataFrame
+            thresholds with standard names of contaminants as index and
+            names of regulations as columns
+    """
+    if file_path is None:
+        registry = pd.DataFrame({'intervention_NL': {cont: values['thresholds_for_intervention_NL']
+                                                     for cont, values in properties.items()
+                                                     if 'thresholds_for_intervention_NL' in values}},
+                                dtype = float)
+    else:
+        registry = pd.read_csv(file_path, index_col = 0)
+        try:
+            registry = registry.astype(float)
+        except ValueError:
+            raise ValueError("Threshold registry contains non-numeric values: {}".format(file_path))
+
+        _, names_known, names_unknown, names_transform = standard_names(
+            registry.index.astype(str).to_list(),
+            standardize = False,
+            verbose = False,
+            )
+        if len(names_unknown) > 0:
+            print("WARNING: Contaminants in threshold registry not identified and skipped: {}".format(
+                names_unknown))
+        registry = registry.loc[names_known].rename(index = names_transform)
+        if registry.index.duplicated().any():
+            raise ValueError("Contaminants listed multiple times in threshold registry: {}".format(
+                registry.index[registry.index.duplicated()].to_list()))
+        registry.index.name = None
+
+    if verbose:
+        print("Threshold registry with {} contaminants and regulations: {}".format(
+            registry.shape[0],registry.columns.to_list()))
+
+    return registry
+
+def thresholds_for_regulations(
+        data_frame,
+        contaminant_group = "BTEXIIN",
+        registry = None,
+        return_ratio = False,
+        verbose = False,
+        ):
+    """Evaluate threshold exceedance for all regulations at once.
+
+        Ratios of contaminant concentrations to thresholds of all regulations
+        of the threshold registry are computed as one 3-D array (samples x
+        contaminants x regulations) instead of evaluating each limit set
+        separately. From the exceedances, traffic light and number of
+        contaminants above threshold are determined per regulation (in the
+        same way as in 'thresholds_for_intervention_traffic()').
+
+    Input
+    -----
+        data_frame: pd.DataFrame
+            Contaminant contentrations in [ug/l], i.e. microgram per liter
+        contaminant_group: str
+            Short name for group of contaminants to use
+            default is 'BTEXIIN' (for benzene, toluene, ethylbenzene, xylene,
+                                  indene, indane and naphthaline)
+        registry: pd.DataFrame, str or None, default None
+            threshold registry (contaminants x regulations) or path to csv-file
+            of it; if None, the default registry is used (see 'threshold_registry()')
+        return_ratio: bool, default False
+            Whether to return the 3-D array of ratios of concentration to threshold.
+        verbose: Boolean, default False
+            verbose flag
+
+    Output
+    ------
+        intervention: pd.DataFrame
+            DataFrame of similar format as input data with well specification and
+            per regulation two columns on threshold exceedance:
+                - traffic light if well exceeds thresholds ('intervention_traffic_<regulation>')
+                - number of contaminants exceeding the threshold ('intervention_number_<regulation>')
+            Evaluated contaminants and regulations (in order of axes of ratio)
+            are listed in intervention.attrs['intervention_contaminants']
+            and intervention.attrs['regulations'].
+        ratio: np.ndarray (only if return_ratio is True)
+            ratios of concentration to threshold (samples x contaminants x regulations),
+            nan for contaminants not regulated
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'thresholds_for_regulations()' on data")
+        print('==============================================================')
+
+    ### check on correct data input format and extracting column names as list
+    data,cols= check_data_frame(data_frame,inplace = False)
+
+    if registry is None or isinstance(registry, str):
+        registry = threshold_registry(registry)
+
+    ### sorting out which columns in data to evaluate
+    quantities, _ = determine_quantities(cols,
+                                      name_list = contaminant_group,
+                                      verbose = verbose)
+    quantities_registered = [cont for cont in registry.index if cont in quantities]
+    if len(quantities_registered) < len(quantities) and verbose:
+        print("WARNING: No thresholds in registry for contaminants: {}".format(
+            [cont for cont in quantities if cont not in registry.index]))
+    if len(quantities_registered) == 0:
+        raise ValueError("No thresholds in registry for contaminants of group '{}'.".format(
+            contaminant_group))
+
+    try:
+        values = data[quantities_registered].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+    thresholds = registry.loc[quantities_registered].to_numpy(dtype = float)
+
+    ### ratios and exceedance: samples x contaminants x regulations
+    ratio = values[:,:,None] / thresholds[None,:,:]
+    exceedance = ratio > 1
+    missing = np.isnan(values)[:,:,None] & ~np.isnan(thresholds)[None,:,:]
+
+    traffic_nr = exceedance.sum(axis = 1)
+    traffic_light = np.where(traffic_nr>0,"red","green")
+    traffic_light[(traffic_nr == 0) & missing.any(axis = 1)] = 'y'
+
+    intervention = extract_settings(data)
+    for j,regulation in enumerate(registry.columns):
+        intervention['{}_{}'.format(names.name_intervention_traffic,regulation)] = traffic_light[:,j]
+        intervention['{}_{}'.format(names.name_intervention_number,regulation)] = traffic_nr[:,j]
+    intervention.attrs['intervention_contaminants'] = quantities_registered
+    intervention.attrs['regulations'] = registry.columns.to_list()
+
+    if verbose:
+        print("Evaluation of contaminant concentrations exceeding thresholds of regulations:")
+        print('______________________________________________________________')
+        for j,regulation in enumerate(registry.columns):
+            print("{}: red light at {}, green light at {}, yellow light at {} out of {} locations".format(
+                regulation,
+                np.sum(traffic_light[:,j] == 'red'),
+                np.sum(traffic_light[:,j] == 'green'),
+                np.sum(traffic_light[:,j] == 'y'),
+                data.shape[0]))
+        print('______________________________________________________________')
+
+    if return_ratio:
+        return intervention, ratio
+    return intervention
+
+def decode_intervention_contaminants(
+        bitmask,
+        contaminants,
+        ):
+    """Decode bitmask of intervention threshold exceedance into names.
+
+    Input
+    -----
+        bitmask: array-like of int
+            bitmask per sample, with bit i set if contaminant i exceeds the
+            threshold of intervention, e.g. column 'intervention_contaminants'
+            from 'thresholds_for_intervention_traffic(..., decode = False)'
+        contaminants: list of str
+            names of contaminants in order of bits, e.g. as given in
+            intervention.attrs['intervention_contaminants']
+
+    Output
+    ------
+        contaminants_list: list of lists
+            names of contaminants above the threshold of intervention per sample
+    """
+    bitmask = np.asarray(bitmask)
+    if bitmask.dtype.kind in 'iu' and len(contaminants) <= 64:
+        bits = np.arange(len(contaminants), dtype = np.uint64)
+        exceedance = ((bitmask.astype(np.uint64)[:,None] >> bits[None,:]) & np.uint64(1)) != 0
+    else:
+        bits = np.array([1 << i for i in range(len(contaminants))], dtype = object)
+        exceedance = (bitmask.astype(object)[:,None] & bits[None,:]) != 0
+
+    return _exceedance_names(exceedance, contaminants)
+
+def _exceedance_names(exceedance, contaminants):
+    """Lists of names of contaminants per row of boolean exceedance matrix.
+
+    Names are selected once per distinct pattern of exceedance (rows are
+    grouped by their packed bits), each sample gets its own list.
+    """
+    names_array = np.array(contaminants, dtype = object)
+    packed = np.packbits(exceedance, axis = 1)
+    if packed.shape[1] == 0:
+        return [[] for _ in range(exceedance.shape[0])]
+    if packed.shape[1] <= 8:
+        packed = np.pad(packed, ((0,0),(0,8 - packed.shape[1])))
+    patterns = np.ascontiguousarray(packed).view(np.dtype((np.void, packed.shape[1])))[:,0]
+    if packed.shape[1] == 8:
+        patterns = patterns.view(np.uint64)
+    _, first, inverse = np.unique(patterns, return_index = True, return_inverse = True)
+    names_pattern = [tuple(names_array[exceedance[i]]) for i in first]
+
+    # cyclic garbage collection is not needed for (acyclic) lists of strings,
+    # it would otherwise be triggered repeatedly when creating one list per sample
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return list(map(list, map(names_pattern.__getitem__, inverse.ravel().tolist())))
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+def _pack_exceedance(exceedance):
+    """Pack boolean exceedance matrix (samples x contaminants) into one integer per sample."""
+    packed = np.packbits(exceedance, axis = 1, bitorder = 'little')
+    if packed.shape[1] <= 8:
+        packed = np.pad(packed, ((0,0),(0,8 - packed.shape[1])))
+        return np.ascontiguousarray(packed).view('<u8')[:,0]
+    return np.array([int.from_bytes(row.tobytes(), 'little') for row in packed], dtype = object)
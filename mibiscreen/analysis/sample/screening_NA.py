@@ -5,15 +5,51 @@
 @author: Alraune Zech
 """
 
+import re
 import numpy as np
 import pandas as pd
 import mibiscreen.data.settings.standard_names as names
+from mibiscreen.analysis.batches import _run_in_batches
 from mibiscreen.data.check_data import check_data_frame
 from mibiscreen.data.set_data import determine_quantities
 from mibiscreen.data.set_data import extract_settings
+from mibiscreen.data.set_data import group_membership
+from mibiscreen.data.settings.contaminants import properties_contaminants
 from .properties import properties
 
 
+def _electron_equivalents_table():
+    """Electron equivalents of quantities in [mmol e-/mg].
+
+    Given by the stoichiometric factor of the redox reaction divided by the
+    molecular mass. Factors are taken from the NA screening properties; for
+    further contaminants they are derived from the chemical formula
+    (CxHyOz: 4x + y - 2z electrons for complete oxidation to CO2).
+    """
+    table = {name: prop['factor_stoichiometry']/prop['molecular_mass']
+             for name, prop in properties.items()
+             if 'factor_stoichiometry' in prop and 'molecular_mass' in prop}
+    for name, prop in properties_contaminants.items():
+        if name in table or None in (prop.get('chemical_formula'),prop.get('molecular_mass'),
+                                     prop.get('carbon_atoms'),prop.get('hydrogen_atoms')):
+            continue
+        oxygen_atoms = sum(int(n or 1) for n in re.findall(r'o(\d*)',prop['chemical_formula'].lower()))
+        factor = 4*prop['carbon_atoms'] + prop['hydrogen_atoms'] - 2*oxygen_atoms
+        table[name] = factor/prop['molecular_mass']
+    return pd.Series(table, dtype = float)
+
+_electron_equivalents = _electron_equivalents_table()
+
+def _with_electron_equivalents(quantities):
+    """Select quantities with known electron equivalents, skip others with warning."""
+    known = [name for name in quantities if name in _electron_equivalents.index]
+    if len(known) < len(quantities):
+        print("WARNING: No electron equivalents (chemical formula) for quantities (excluded): {}".format(
+            [name for name in quantities if name not in _electron_equivalents.index]))
+    if not known:
+        raise ValueError("No electron equivalents known for quantities: {}".format(quantities))
+    return known
+
 def reductors(
     data_frame,
     ea_group = 'ONS',
@@ -58,15 +94,11 @@ def reductors(
     ### sorting out which columns in data to use for summation of electrons available
     quantities,_ = determine_quantities(cols,name_list = ea_group, verbose = verbose)
 
-    ### actually performing summation
-    try:
-        tot_reduct = 0.
-        for ea in quantities:
-            tot_reduct += properties[ea]['factor_stoichiometry']* data[ea]/properties[ea]['molecular_mass']
-    except TypeError:
-        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
-
-    tot_reduct.rename(names.name_total_reductors,inplace = True)
+    ### actually performing summation: concentrations [mg/l] times electron equivalents
+    tot_reduct = pd.Series(_electron_sum(data,quantities),
+                           index = data.index,
+                           name = names.name_total_reductors,
+                           )
     if verbose:
         print("Total amount of electron reductors per well in [mmol e-/l] is:\n{}".format(tot_reduct))
         print('----------------------------------------------------------------')
@@ -123,18 +155,14 @@ def oxidators(
     ### sorting out which columns in data to use for summation of electrons available
     quantities,_ = determine_quantities(cols,name_list = contaminant_group, verbose = verbose)
 
-    try:
-        tot_oxi = 0.
-        for cont in quantities:
-            cm_cont = data[cont]* 0.001/properties[cont]['molecular_mass'] # molar concentration in mmol/l
-            tot_oxi += cm_cont *  properties[cont]['factor_stoichiometry']
-    except TypeError:
-        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
-
     if name_column is False:
         name_column = names.name_total_oxidators + '_'+ contaminant_group
 
-    tot_oxi.rename(name_column,inplace = True)
+    ### concentrations in [ug/l] --> [mg/l] times electron equivalents
+    tot_oxi = pd.Series(_electron_sum(data,quantities,unit_factor = 0.001),
+                        index = data.index,
+                        name = name_column,
+                        )
 
     if verbose:
         print("Total amount of oxidators per well in [mmol e-/l] is:\n{}".format(tot_oxi))
@@ -312,6 +340,12 @@ def sample_NA_screening(
 
         Sufficient supply of electrons is a prerequite for biodegradation and thus the
     potential of natural attenuation (NA) as remediation strategy.
+
+    Columns are resolved once and all quantities are calculated in one vectorized
+    pass on a single block of concentrations (same results as 'reductors()',
+    'oxidators()', 'electron_balance()' and 'sample_NA_traffic()' for the
+    specified groups), without copying the data.
+
     Input
     -----
         data_frame: pd.DataFrame
@@ -341,32 +375,387 @@ def sample_NA_screening(
         print('==============================================================')
 
     ### check on correct data input format and extracting column names as list
-    data,_= check_data_frame(data_frame,inplace = include)
-
-    tot_reduct = reductors(data,
-                           ea_group = ea_group,
-                           include = include,
-                           verbose = verbose)
-    tot_oxi = oxidators(data,
-                        contaminant_group = contaminant_group,
-                        include = include,
-                        verbose = verbose)
-    e_bal = electron_balance(data,
-                             include = include,
-                             verbose = verbose)
-    na_traffic = sample_NA_traffic(data,
-                            contaminant_group = contaminant_group,
-                            include = include,
-                            verbose = verbose)
-
-    list_new_quantities = [tot_reduct,tot_oxi,e_bal,na_traffic]
+    ### data is only modified (no copy needed) when results are included
+    data,cols= check_data_frame(data_frame,inplace = True)
+
+    ### sorting out which columns in data to use, done once for all quantities
+    ea_quantities,_ = determine_quantities(cols,name_list = ea_group, verbose = verbose)
+    cont_quantities,_ = determine_quantities(cols,name_list = contaminant_group, verbose = verbose)
+
+    ### single float block of all quantities, electrons from one matrix-vector product each
+    ea_quantities = _with_electron_equivalents(ea_quantities)
+    cont_quantities = _with_electron_equivalents(cont_quantities)
+    quantities = ea_quantities + cont_quantities
+    coefficients = np.concatenate([_electron_equivalents.loc[ea_quantities].to_numpy(),
+                                   _electron_equivalents.loc[cont_quantities].to_numpy() * 0.001])
+    try:
+        values = data[quantities].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+    n_ea = len(ea_quantities)
+    tot_reduct = values[:,:n_ea] @ coefficients[:n_ea]
+    tot_oxi = values[:,n_ea:] @ coefficients[n_ea:]
 
-    if include is False:
-       na_data = extract_settings(data)
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        e_bal = tot_reduct / tot_oxi
+
+    traffic = np.where(e_bal<1,"red","green")
+    traffic[np.isnan(e_bal)] = "y"
+
+    results = {names.name_total_reductors : tot_reduct,
+               names.name_total_oxidators + '_'+ contaminant_group : tot_oxi,
+               names.name_e_balance : e_bal,
+               names.name_na_traffic_light : traffic,
+               }
+
+    if verbose:
+        print("Total amount of electron reductors per well in [mmol e-/l] is:\n{}".format(tot_reduct))
+        print('----------------------------------------------------------------')
+        print("Total amount of oxidators per well in [mmol e-/l] is:\n{}".format(tot_oxi))
+        print('-----------------------------------------------------')
+        print("Electron balance e_red/e_cont is:\n{}".format(e_bal))
+        print('---------------------------------')
+        print("Evaluation if natural attenuation (NA) is ongoing:")
+        print('--------------------------------------------------')
+        print("Red light: Reduction is limited at {} out of {} locations".format(
+            np.sum(traffic == "red"),len(e_bal)))
+        print("Green light: Reduction is limited at {} out of {} locations".format(
+            np.sum(traffic == "green"),len(e_bal)))
+        print("Yellow light: No decision possible at {} out of {} locations".format(
+            np.sum(np.isnan(e_bal)),len(e_bal)))
+        print('________________________________________________________________')
 
-       for add in list_new_quantities:
-           na_data.insert(na_data.shape[1], add.name, add)
+    if include is False:
+        na_data = extract_settings(data)
+        for name, result in results.items():
+            na_data.insert(na_data.shape[1], name, result)
     else:
+        for name, result in results.items():
+            data[name] = result
         na_data = data
 
     return na_data
+
+def sample_NA_sweep(
+    data_frame,
+    ea_groups = ['ONS','ONSFe','all_ea'],
+    contaminant_groups = ['BTEX','BTEXIIN','MAH','PAH'],
+    verbose = False,
+    ):
+    """Screening of NA potential for combinations of groups in one pass.
+
+    Evaluates the NA screening (see 'sample_NA_screening()') for all pairs of
+    groups of electron acceptors and contaminants at once. The electron
+    contributions of all quantities are calculated once and summed up per group
+    with a single matrix product each, using the membership matrix of
+    quantities in groups. As for the single screening, a missing value of a
+    group member results in a missing total for that group.
+
+    Input
+    -----
+        data_frame: pd.DataFrame
+            Concentration values of
+                - electron acceptors in [mg/l]
+                - contaminants in [ug/l]
+        ea_groups: list of str, default ['ONS','ONSFe','all_ea']
+            Short names for groups of electron acceptors to use
+        contaminant_groups: list of str, default ['BTEX','BTEXIIN','MAH','PAH']
+            Short names for groups of contaminants to use
+        verbose: Boolean, default False
+            verbose flag
+
+    Output
+    ------
+        na_sweep: pd.DataFrame
+            Tidy table with one row per sample and scenario, containing the
+            settings, names of the groups ('ea_group', 'contaminant_group'),
+            total reductors and oxidators, electron balance and traffic light;
+            rows are ordered by scenario (ea_group, then contaminant_group)
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'sample_NA_sweep()' on data")
+        print('==============================================================')
+
+    data,cols= check_data_frame(data_frame,inplace = True)
+
+    if isinstance(ea_groups, str):
+        ea_groups = [ea_groups]
+    if isinstance(contaminant_groups, str):
+        contaminant_groups = [contaminant_groups]
+
+    membership_ea = group_membership(cols, ea_groups, verbose = verbose)
+    membership_cont = group_membership(cols, contaminant_groups, verbose = verbose)
+
+    tot_reduct = _electron_sum_groups(data, membership_ea)
+    tot_oxi = _electron_sum_groups(data, membership_cont, unit_factor = 0.001)
+
+    ### electron balance for all scenarios: samples x ea_groups x contaminant_groups
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        e_bal = tot_reduct[:,:,None] / tot_oxi[:,None,:]
+
+    traffic = np.where(e_bal<1,"red","green")
+    traffic[np.isnan(e_bal)] = "y"
+
+    n_samples, n_ea, n_cont = e_bal.shape
+    settings = extract_settings(data)
+    na_sweep = pd.concat([settings] * (n_ea * n_cont))
+    na_sweep['ea_group'] = np.repeat(np.repeat(membership_ea.columns.to_numpy(), n_cont), n_samples)
+    na_sweep['contaminant_group'] = np.repeat(np.tile(membership_cont.columns.to_numpy(), n_ea), n_samples)
+    na_sweep[names.name_total_reductors] = np.repeat(tot_reduct.T, n_cont, axis = 0).ravel()
+    na_sweep[names.name_total_oxidators] = np.tile(tot_oxi.T, (n_ea, 1)).ravel()
+    na_sweep[names.name_e_balance] = e_bal.transpose(1, 2, 0).ravel()
+    na_sweep[names.name_na_traffic_light] = traffic.transpose(1, 2, 0).ravel()
+
+    if verbose:
+        print("Number of samples with green traffic light per scenario:")
+        print('--------------------------------------------------')
+        print(pd.DataFrame(np.sum(traffic == "green", axis = 0),
+                           index = membership_ea.columns,
+                           columns = membership_cont.columns))
+        print('________________________________________________________________')
+
+    return na_sweep
+
+def _electron_sum_groups(data,
+                         membership,
+                         unit_factor = 1.,
+                         ):
+    """Total amount of electrons [mmol e-/l] per sample and group.
+
+    Electron contributions of all quantities are summed per group by matrix
+    product with the membership matrix (quantities x groups). Missing values
+    are handled by a second product of the mask of missing values with the
+    membership matrix: groups with a missing member value get NaN.
+
+    Output
+    ------
+        electrons: np.ndarray
+            total amount of electrons (samples x groups)
+    """
+    quantities = _with_electron_equivalents(membership.index.to_list())
+    membership = membership.loc[quantities]
+    coefficients = _electron_equivalents.loc[quantities].to_numpy() * unit_factor
+    try:
+        values = data[quantities].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+
+    contributions = values * coefficients
+    missing = np.isnan(contributions)
+    contributions[missing] = 0.
+    matrix = membership.to_numpy()
+    electrons = contributions @ matrix
+    electrons[(missing.astype(float) @ matrix) > 0] = np.nan
+    electrons[:, matrix.sum(axis = 0) == 0] = np.nan # groups not in data
+
+    return electrons
+
+def sample_NA_monte_carlo(
+    data_frame,
+    ea_group = 'ONS',
+    contaminant_group = "BTEXIIN",
+    relative_error = 0.1,
+    detection_limits = None,
+    n_realizations = 1000,
+    batch_size = 1000,
+    seed = None,
+    max_workers = 1,
+    return_realizations = False,
+    verbose = False,
+    ):
+    """Uncertainty of NA screening from analytical errors of concentrations.
+
+    Monte Carlo propagation of the uncertainty of measured concentrations
+    of electron acceptors and contaminants to the electron balance and the
+    NA traffic light (see 'sample_NA_screening()'). For each sample,
+    `n_realizations` realizations of the concentrations are drawn:
+        - from a normal distribution with the measured value as mean and
+          standard deviation given by the relative error (truncated at zero),
+        - uniformly between zero and the detection limit for values at or
+          below the detection limit (if provided).
+    Missing values remain missing, resulting in a yellow traffic light.
+
+    Realizations are processed in batches (samples x realizations), each with
+    its own random generator spawned from one seed, such that results are
+    reproducible independent of the batch distribution over processes.
+
+    Input
+    -----
+        data_frame: pd.DataFrame
+            Concentration values of
+                - electron acceptors in [mg/l]
+                - contaminants in [ug/l]
+        ea_group: str, default 'ONS'
+            Short name for group of electron acceptors to use
+        contaminant_group: str, default 'BTEXIIN'
+            Short name for group of contaminants to use
+        relative_error: float or dict, default 0.1
+            relative analytical error (standard deviation / value), either for
+            all quantities or as dictionary per quantity (others get 0.1)
+        detection_limits: float or dict or None, default None
+            detection limits in unit of the quantity, either for all quantities
+            or as dictionary per quantity; if None, no detection limits are used
+        n_realizations: int, default 1000
+            number of Monte Carlo realizations
+        batch_size: int, default 1000
+            number of realizations drawn and processed at once
+        seed: int or None, default None
+            seed of the random number generation for reproducible results
+        max_workers: int or None, default 1
+            number of processes the batches are distributed over;
+            1 processes all batches sequentially
+        return_realizations: bool, default False
+            Whether to return the realizations of the electron balance.
+        verbose: Boolean, default False
+            verbose flag
+
+    Output
+    ------
+        na_data: pd.DataFrame
+            Tabular data with settings, mean and percentiles (5%, 50%, 95%) of
+            the electron balance and probabilities of each traffic light color
+            per sample
+        e_bal: np.ndarray (optional)
+            realizations of electron balance (samples x realizations)
+    """
+    if verbose:
+        print('==============================================================')
+        print(" Running function 'sample_NA_monte_carlo()' on data")
+        print('==============================================================')
+
+    if n_realizations < 1 or batch_size < 1:
+        raise ValueError("Number of realizations and batch size need to be positive.")
+
+    data,cols= check_data_frame(data_frame,inplace = True)
+
+    ea_quantities,_ = determine_quantities(cols,name_list = ea_group, verbose = verbose)
+    cont_quantities,_ = determine_quantities(cols,name_list = contaminant_group, verbose = verbose)
+    ea_quantities = _with_electron_equivalents(ea_quantities)
+    cont_quantities = _with_electron_equivalents(cont_quantities)
+    quantities = ea_quantities + cont_quantities
+
+    coefficients = np.concatenate([_electron_equivalents.loc[ea_quantities].to_numpy(),
+                                   _electron_equivalents.loc[cont_quantities].to_numpy() * 0.001])
+    try:
+        values = data[quantities].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+
+    errors = _per_quantity(relative_error, quantities, default = 0.1)
+    limits = _per_quantity(detection_limits, quantities, default = 0.)
+    if np.any(errors < 0) or np.any(limits < 0):
+        raise ValueError("Relative errors and detection limits need to be non-negative.")
+
+    batches = _run_in_batches(_monte_carlo_batch,
+                              (values, coefficients, errors, limits, len(ea_quantities)),
+                              n_realizations,
+                              batch_size,
+                              seed = seed,
+                              max_workers = max_workers,
+                              )
+    e_bal = np.concatenate(batches, axis = 1)
+
+    with np.errstate(invalid = 'ignore'):
+        percentiles = np.percentile(e_bal, [5, 50, 95], axis = 1)
+        prob_yellow = np.mean(np.isnan(e_bal), axis = 1)
+        prob_red = np.mean(e_bal < 1, axis = 1)
+    results = {names.name_e_balance + '_mean' : np.mean(e_bal, axis = 1),
+               names.name_e_balance + '_p05' : percentiles[0],
+               names.name_e_balance + '_p50' : percentiles[1],
+               names.name_e_balance + '_p95' : percentiles[2],
+               names.name_na_traffic_light + '_p_green' : 1. - prob_red - prob_yellow,
+               names.name_na_traffic_light + '_p_red' : prob_red,
+               names.name_na_traffic_light + '_p_yellow' : prob_yellow,
+               }
+
+    na_data = extract_settings(data)
+    for name, result in results.items():
+        na_data.insert(na_data.shape[1], name, result)
+
+    if verbose:
+        print("Probability of traffic light colors from {} realizations:".format(n_realizations))
+        print('--------------------------------------------------')
+        print(na_data[list(results)[4:]])
+        print('________________________________________________________________')
+
+    if return_realizations:
+        return na_data, e_bal
+    return na_data
+
+def _monte_carlo_batch(values,
+                       coefficients,
+                       errors,
+                       limits,
+                       n_ea,
+                       size,
+                       seed,
+                       ):
+    """Electron balance for one batch of realizations (samples x size).
+
+    Realizations of concentrations are generated quantity by quantity and
+    directly accumulated to electrons of reductors and oxidators, such that
+    memory is bounded by a few arrays of size samples x realizations.
+    """
+    rng = np.random.default_rng(seed)
+    n_samples = values.shape[0]
+    tot_reduct = np.zeros((n_samples, size))
+    tot_oxi = np.zeros((n_samples, size))
+
+    for j in range(values.shape[1]):
+        value = values[:, j:j+1]
+        realization = value * (1. + errors[j] * rng.standard_normal((n_samples, size)))
+        np.maximum(realization, 0., out = realization)
+        if limits[j] > 0:
+            below_limit = (value <= limits[j])[:, 0]
+            realization[below_limit] = rng.uniform(0., limits[j], (np.sum(below_limit), size))
+        if j < n_ea:
+            tot_reduct += coefficients[j] * realization
+        else:
+            tot_oxi += coefficients[j] * realization
+
+    with np.errstate(divide = 'ignore', invalid = 'ignore'):
+        e_bal = tot_reduct / tot_oxi
+
+    return e_bal
+
+def _per_quantity(value, quantities, default = 0.):
+    """Array of parameter values per quantity from scalar or dictionary."""
+    if value is None:
+        return np.full(len(quantities), default)
+    if isinstance(value, dict):
+        return np.array([value.get(quantity, default) for quantity in quantities], dtype = float)
+    return np.full(len(quantities), float(value))
+
+def _electron_sum(data,
+                  quantities,
+                  unit_factor = 1.,
+                  ):
+    """Total amount of electrons [mmol e-/l] of quantities per sample.
+
+    Calculated as a single matrix-vector product of the block of
+    concentrations (samples x quantities) with the vector of electron
+    equivalents of the quantities. Missing values result in NaN.
+
+    Input
+    -----
+        data: pd.DataFrame
+            concentration values of quantities
+        quantities: list
+            names of quantities to sum up
+        unit_factor: float, default 1.
+            factor to transform concentrations to [mg/l], e.g. 0.001 for [ug/l]
+
+    Output
+    ------
+        electrons: np.ndarray
+            total amount of electrons per sample
+    """
+    quantities = _with_electron_equivalents(quantities)
+    coefficients = _electron_equivalents.loc[quantities].to_numpy() * unit_factor
+    try:
+        values = data[quantities].to_numpy(dtype = float)
+    except (TypeError, ValueError):
+        raise ValueError("Data not in standardized format. Run 'standardize()' first.")
+
+    return values @ coefficients
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Incremental screening of samples for growing data sets.
+
+@author: Alraune Zech
+"""
+
+import pandas as pd
+import mibiscreen.data.settings.standard_names as names
+from mibiscreen.data.check_data import check_data_frame
+from .concentrations import total_concentration
+from .intervention import thresholds_for_intervention_traffic
+from .screening_NA import sample_NA_screening
+
+
+class ScreeningSession:
+    """Screening session keeping results per sample for incremental updates.
+
+    Results of the NA screening ('sample_NA_screening()'), the evaluation of
+    intervention thresholds ('thresholds_for_intervention_traffic()') and the
+    total contaminant concentration ('total_concentration()') are stored per
+    sample, keyed by the sample name. With every update, a fingerprint (hash)
+    of each row of data is compared to the stored one: only appended or
+    modified samples are recomputed, results of unchanged samples are reused
+    and results of samples no longer in the data are removed.
+
+    Attributes:
+    -------
+        ea_group: str
+            Short name for group of electron acceptors to use
+        contaminant_group: str
+            Short name for group of contaminants to use
+        results: pd.DataFrame
+            results of all screenings, index is the sample name
+        fingerprints: pd.Series
+            hash of data row per sample name the results are based on
+        recomputed: list
+            sample names recomputed at last update
+
+    Example:
+    -------
+        >>> session = ScreeningSession(contaminant_group = 'BTEX')
+        >>> results = session.update(data)
+        >>> results = session.update(pd.concat([data, data_new_round]))
+        >>> session.recomputed   # names of samples of new round
+    """
+
+    def __init__(self,
+                 ea_group = 'ONS',
+                 contaminant_group = 'BTEXIIN',
+                 verbose = False,
+                 ):
+        """Initialize empty screening session.
+
+        Args:
+        -------
+            ea_group: str, default 'ONS'
+                Short name for group of electron acceptors to use
+            contaminant_group: str, default 'BTEXIIN'
+                Short name for group of contaminants to use
+            verbose: Boolean, default False
+                verbose flag
+        """
+        self.ea_group = ea_group
+        self.contaminant_group = contaminant_group
+        self.verbose = verbose
+        self.results = pd.DataFrame()
+        self.fingerprints = pd.Series(dtype = 'uint64')
+        self.recomputed = []
+
+    def update(self,
+               data_frame,
+               ):
+        """Update screening results for (partially) new or modified data.
+
+        Args:
+        -------
+            data_frame: pd.DataFrame
+                data in standard format with all samples of the site,
+                including column with sample names ('sample_nr')
+
+        Returns:
+        -------
+            results: pd.DataFrame
+                results of all samples in order of provided data,
+                index is the sample name
+
+        Raises:
+        -------
+            ValueError: If data does not contain unique sample names
+        """
+        data,cols = check_data_frame(data_frame, inplace = True)
+
+        if names.name_sample not in cols:
+            raise ValueError("Data does not contain sample names ('{}').".format(names.name_sample))
+        sample_names = data[names.name_sample]
+        if sample_names.duplicated().any():
+            raise ValueError("Sample names are not unique: {}".format(
+                sample_names[sample_names.duplicated()].to_list()))
+
+        fingerprints = pd.Series(pd.util.hash_pandas_object(data, index = False).to_numpy(),
+                                 index = sample_names.to_numpy())
+
+        unchanged = fingerprints.index.isin(self.fingerprints.index)
+        unchanged[unchanged] = (self.fingerprints.reindex(fingerprints.index[unchanged]).to_numpy()
+                                == fingerprints.to_numpy()[unchanged])
+        changed = ~unchanged
+
+        self.recomputed = fingerprints.index[changed].to_list()
+        results_kept = self.results.reindex(fingerprints.index[unchanged])
+        if changed.any():
+            results_new = self._screening(data[changed])
+            results = pd.concat([results_kept, results_new]) if unchanged.any() else results_new
+        else:
+            results = results_kept
+
+        self.results = results.reindex(fingerprints.index)
+        self.fingerprints = fingerprints
+
+        if self.verbose:
+            print('==============================================================')
+            print(" Screening session updated: {} of {} samples recomputed".format(
+                len(self.recomputed),len(fingerprints)))
+            print('==============================================================')
+
+        return self.results
+
+    def _screening(self, data):
+        """Compute all screening results for given rows of data."""
+        na_data = sample_NA_screening(data,
+                                      ea_group = self.ea_group,
+                                      contaminant_group = self.contaminant_group,
+                                      )
+        intervention = thresholds_for_intervention_traffic(data,
+                                                           contaminant_group = self.contaminant_group,
+                                                           )
+        tot_conc = total_concentration(data,
+                                       name_list = self.contaminant_group,
+                                       )
+
+        results = na_data.join(intervention.drop(columns = intervention.columns.intersection(na_data.columns)))
+        results['concentration_' + self.contaminant_group] = tot_conc
+        results.index = data[names.name_sample].to_numpy()
+        results.index.name = names.name_sample
+
+        return results
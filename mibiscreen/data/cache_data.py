@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Functions for caching standardized data on disk.
+
+@author: Alraune Zech
+"""
+import hashlib
+import json
+import os
+import os.path
+import tempfile
+import pandas as pd
+import mibiscreen
+from mibiscreen.data.check_data import alias_index
+from mibiscreen.data.check_data import standardize
+from mibiscreen.data.load_data import load_csv
+from mibiscreen.data.load_data import load_excel
+from mibiscreen.data.load_data import load_standardized
+from mibiscreen.data.load_data import save_standardized
+
+_excel_extensions = ['.xlsx', '.xlsm', '.xls', '.ods']
+_cache_extension = '.parquet'
+
+def cached_standardize(
+        file_path = None,
+        cache_dir = None,
+        max_cache_size = 500,
+        reduce = True,
+        dl_factor = None,
+        verbose = True,
+        **kwargs,
+        ):
+    """Function loading and standardizing data with on-disk cache.
+
+    Standardized data and units are stored in a cache directory, keyed on
+    the hash of the content of the input file, the settings of the name and
+    unit dictionaries, the versions of mibiscreen and pandas and the
+    arguments of loading and standardization. When the same (unchanged) file
+    is processed again, the result is taken from the cache, skipping the
+    parsing and cleaning of values entirely.
+
+    Entries are stored in Parquet format with 'save_standardized()' (requires
+    the optional dependency 'pyarrow'; without it, nothing is cached). Any
+    entry that cannot be read is treated as missing and recomputed.
+
+    The cache is bounded in size: when exceeding `max_cache_size`, least
+    recently used entries are removed.
+
+    Args:
+    -------
+        file_path: str
+            Name of the path to the file (excel or csv)
+        cache_dir: str or None, default None
+            directory for storing cached data; if None, the environment
+            variable 'MIBISCREEN_CACHE_DIR' is used or else
+            '~/.cache/mibiscreen'
+        max_cache_size: float, default 500
+            maximal size of cache directory in MB
+        reduce: Boolean, default True
+            whether to reduce data to known quantities (default True),
+            otherwise full dataframe with renamed columns (for those identifyable) is returned
+        dl_factor: float or None, default None
+            scaling factor for value given at detection limit.
+            Default is None, so detection limit values are replaced by nan.
+        verbose: Boolean, default True
+            verbose statement
+        **kwargs: optional keyword arguments to pass to the loading routine
+            'load_excel()' or 'load_csv()', e.g. sheet_name = 1
+
+    Returns:
+    -------
+        data_numeric, units: pandas.DataFrames
+            Tabular data with standardized column names, values in numerics etc
+            and table with units for standardized column names
+
+    Raises:
+    -------
+        ValueError: If `file_path` is not a valid file location
+
+    Example:
+    -------
+        >>> data, units = cached_standardize('site_data.xlsx', sheet_name = 0)
+    """
+    if file_path is None:
+        raise ValueError('Specify file path and file name!')
+    if not os.path.isfile(file_path):
+        raise OSError('Cannot access file at : ',file_path)
+
+    cache_dir = _cache_directory(cache_dir)
+    key = _cache_key(file_path,
+                     reduce = reduce,
+                     dl_factor = dl_factor,
+                     **kwargs)
+    cache_file = os.path.join(cache_dir, key + _cache_extension)
+
+    if os.path.isfile(cache_file):
+        try:
+            data, units = load_standardized(cache_file, file_format = 'parquet')
+        except Exception:
+            data = None # unreadable entry (e.g. corrupt or written by other versions)
+        if data is not None:
+            os.utime(cache_file) # mark as recently used
+            if verbose:
+                print('================================================================')
+                print(" Loaded standardized data of file {} from cache".format(file_path))
+                print('================================================================')
+            return data, units
+
+    if os.path.splitext(str(file_path))[1].lower() in _excel_extensions:
+        data_raw, units_raw = load_excel(file_path, verbose = verbose, **kwargs)
+    else:
+        data_raw, units_raw = load_csv(file_path, verbose = verbose, **kwargs)
+
+    data, units = standardize(data_raw,
+                              reduce = reduce,
+                              verbose = verbose,
+                              units = units_raw if kwargs.get('units_as_metadata', False) else None,
+                              dl_factor = dl_factor,
+                              )
+
+    _store_in_cache(cache_dir, cache_file, data, units)
+    _evict_cache(cache_dir, max_cache_size)
+
+    return data, units
+
+def clear_cache(cache_dir = None):
+    """Function removing all entries from cache of standardized data.
+
+    Args:
+    -------
+        cache_dir: str or None, default None
+            directory of cached data; if None, default directory is used
+            (see 'cached_standardize()')
+
+    Returns:
+    -------
+        None
+    """
+    cache_dir = _cache_directory(cache_dir, create = False)
+    for path, _, _ in _cache_entries(cache_dir):
+        os.remove(path)
+
+def _cache_directory(cache_dir = None, create = True):
+    """Determine (and create) directory of the cache."""
+    if cache_dir is None:
+        cache_dir = os.environ.get('MIBISCREEN_CACHE_DIR',
+                                   os.path.join(os.path.expanduser('~'), '.cache', 'mibiscreen'))
+    if create:
+        os.makedirs(cache_dir, exist_ok = True)
+    return cache_dir
+
+def _file_hash(file_path, block_size = 1 << 20):
+    """Hash of the content of a file."""
+    hash_file = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            hash_file.update(block)
+    return hash_file.hexdigest()
+
+def _cache_key(file_path, **kwargs):
+    """Key of cache entry from file content, settings and arguments."""
+    key = dict(file = _file_hash(file_path),
+               settings = alias_index().fingerprint,
+               version = mibiscreen.__version__,
+               version_pandas = pd.__version__,
+               arguments = {name: repr(value) for name, value in sorted(kwargs.items())},
+               )
+    return hashlib.sha256(json.dumps(key, sort_keys = True).encode('utf-8')).hexdigest()
+
+def _store_in_cache(cache_dir, cache_file, data, units):
+    """Write cache entry atomically, such that no partial entries are read."""
+    file_descriptor, temp_file = tempfile.mkstemp(dir = cache_dir, suffix = '.tmp')
+    os.close(file_descriptor)
+    try:
+        save_standardized(data, units, temp_file, file_format = 'parquet')
+        os.replace(temp_file, cache_file)
+    except ImportError as error:
+        print("WARNING: data not cached: {}".format(error))
+    except Exception:
+        print("WARNING: data could not be stored in cache directory: {}".format(cache_dir))
+    finally:
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+def _cache_entries(cache_dir):
+    """List of cache entries (path, time of last use, size)."""
+    entries = []
+    if not os.path.isdir(cache_dir):
+        return entries
+    for entry in os.scandir(cache_dir):
+        if entry.is_file() and entry.name.endswith(_cache_extension):
+            stat = entry.stat()
+            entries.append((entry.path, stat.st_mtime, stat.st_size))
+    return entries
+
+def _evict_cache(cache_dir, max_cache_size):
+    """Remove least recently used entries until cache fits max size (in MB)."""
+    entries = sorted(_cache_entries(cache_dir), key = lambda entry: entry[1])
+    total_size = sum(entry[2] for entry in entries)
+    max_bytes = max_cache_size * 1024 * 1024
+    while entries and total_size > max_bytes:
+        path, _, size = entries.pop(0)
+        try:
+            os.remove(path)
+        except OSError:
+            continue
+        total_size -= size
@@ -4,6 +4,10 @@
 
 @author: Alraune Zech
 """
+import hashlib
+from types import MappingProxyType
+from typing import Mapping
+from typing import NamedTuple
 import numpy as np
 import pandas as pd
 import mibiscreen.data.settings.standard_names as names
@@ -17,6 +21,100 @@ from mibiscreen.data.settings.unit_settings import all_units
 from mibiscreen.data.settings.unit_settings import properties_units
 
 
+class AliasIndex(NamedTuple):
+    """Immutable lookup tables for resolving names and units of quantities.
+
+    Attributes:
+    -------
+        version: int
+            counter increased every time the index is rebuilt
+        signature: tuple
+            sizes of the settings dictionaries the index was built from
+        fingerprint: str
+            hash of the content of all lookup tables, identifying the settings
+        names: mapping
+            alternative names of all quantities --> standard name
+        contaminants: mapping
+            alternative names of contaminants --> standard name
+        isotopes: mapping
+            alternative names of isotopes (prefixes) --> standard name
+        standard_units: mapping
+            standard name of quantity --> standard unit
+        unit_names: mapping
+            standard unit --> frozenset of alternative unit names
+        sample_settings: frozenset
+            standard names of sample settings
+    """
+
+    version: int
+    signature: tuple
+    fingerprint: str
+    names: Mapping
+    contaminants: Mapping
+    isotopes: Mapping
+    standard_units: Mapping
+    unit_names: Mapping
+    sample_settings: frozenset
+
+_alias_index = None
+_alias_index_version = 0
+
+def alias_index():
+    """Provides the shared index for name and unit resolution.
+
+    The index is built once per process from the settings dictionaries and
+    reused by all routines resolving names of quantities, isotope prefixes
+    and units. It is rebuilt automatically when quantities are added to or
+    removed from the settings dictionaries. When alternative names or units
+    of existing quantities are modified, call 'invalidate_alias_index()'.
+
+    Returns:
+    -------
+        index: AliasIndex
+            immutable lookup tables for names and units
+    """
+    global _alias_index, _alias_index_version
+
+    signature = _settings_signature()
+    if _alias_index is None or _alias_index.signature != signature:
+        properties_all = _properties_all()
+        tables = dict(
+            names = _generate_dict_other_names(properties_all),
+            contaminants = _generate_dict_other_names(properties_contaminants),
+            isotopes = _generate_dict_other_names(properties_isotopes),
+            standard_units = {key: value['standard_unit'] for key, value in properties_all.items()
+                              if 'standard_unit' in value},
+            unit_names = {key: frozenset(value['other_names']) for key, value in properties_units.items()},
+            sample_settings = frozenset(properties_sample_settings.keys()),
+            )
+        _alias_index_version += 1
+        _alias_index = AliasIndex(
+            version = _alias_index_version,
+            signature = signature,
+            fingerprint = _tables_fingerprint(tables),
+            names = MappingProxyType(tables['names']),
+            contaminants = MappingProxyType(tables['contaminants']),
+            isotopes = MappingProxyType(tables['isotopes']),
+            standard_units = MappingProxyType(tables['standard_units']),
+            unit_names = MappingProxyType(tables['unit_names']),
+            sample_settings = tables['sample_settings'],
+            )
+
+    return _alias_index
+
+def invalidate_alias_index():
+    """Discards the shared name index, forcing a rebuild on next use.
+
+    Call this after modifying alternative names or units of quantities in
+    the settings dictionaries (e.g. 'properties_contaminants').
+
+    Returns:
+    -------
+        None
+    """
+    global _alias_index
+    _alias_index = None
+
 def standard_names(name_list,
                    standardize = True,
                    reduce = False,
@@ -69,16 +167,10 @@ def standard_names(name_list,
             if not isinstance(name, str):
                 raise ValueError("Entry in provided list of names is not a string:", name)
 
-    properties_all = {**properties_sample_settings,
-                      **properties_geochemicals,
-                      **properties_contaminants,
-                      **properties_metabolites,
-                      **properties_isotopes,
-                      **contaminants_analysis,
-    }
-    dict_names=_generate_dict_other_names(properties_all)
-    other_names_contaminants = _generate_dict_other_names(properties_contaminants)
-    other_names_isotopes = _generate_dict_other_names(properties_isotopes)
+    index = alias_index()
+    dict_names = index.names
+    other_names_contaminants = index.contaminants
+    other_names_isotopes = index.isotopes
 
     for x in name_list:
         y = dict_names.get(x, False)
@@ -349,28 +441,22 @@ def check_units(data,
     col_check_list= []
     col_not_checked  = []
 
-    properties_all = {**properties_sample_settings,
-                      **properties_geochemicals,
-                      **properties_contaminants,
-                      **properties_metabolites,
-                      **properties_isotopes,
-                      **contaminants_analysis,
-    }
+    index = alias_index()
 
     ### run through all quantity columns and check their units
     for quantity in units.columns:
         ### identify standard unit for each column idenfied:
-        if quantity in properties_all.keys():# test on standard column name
-            standard_unit = properties_all[quantity]['standard_unit']
-        elif quantity.split('-')[0] in properties_all.keys(): # test on isotopes
-            standard_unit = properties_all[quantity.split('-')[0]]['standard_unit']
+        if quantity in index.standard_units:# test on standard column name
+            standard_unit = index.standard_units[quantity]
+        elif quantity.split('-')[0] in index.standard_units: # test on isotopes
+            standard_unit = index.standard_units[quantity.split('-')[0]]
         else:
             col_not_checked.append(quantity)
             continue
 
         ### check on given unit (also considering alternative unit names)
         if standard_unit != names.unit_less:
-            other_names_unit = properties_units[standard_unit]['other_names']
+            other_names_unit = index.unit_names[standard_unit]
             if str(units[quantity][0]).lower() not in other_names_unit:
                 col_check_list.append(quantity)
                 if verbose:
@@ -427,7 +513,9 @@ def check_values(data_frame,
     Returns:
     -------
         cleaned: pandas.DataFrame
-            Cleaned dataframe without units
+            Cleaned dataframe without units; names of quantities with values
+            given by detection limits are listed in
+            cleaned.attrs['detection_limit_columns']
 
     """
     if verbose:
@@ -448,83 +536,12 @@ def check_values(data_frame,
             df.drop(labels = 0,inplace = True)
             break
 
-    for sign in to_replace_list:
-        df.iloc[:,:] = df.iloc[:,:].replace(to_replace=sign, value=to_replace_value)
-
-    detection_limit_columns = []
-    failed_conversion_columns = []
-
-    def clean_quantity(quantity_series,quantity_name):
-        """Cleans a pandas Series of quantity values.
-
-        Cleaning is by parsing strings, handling detection limits,
-        and converting to floats where possible.
-
-        Parameters:
-        ----------
-        quantity_series : pandas.Series
-            The input Series containing quantity values that may include strings, numbers, or
-            special characters (e.g., '<' for values below detection limits).
-
-        quantity_name : str
-            Column name of quantity being cleaned.
-
-        Returns:
-        -------
-        cleaned_series : pandas.Series
-            The cleaned version of the input series, where:
-                - Strings like '<0.05' are converted to floats and optionally adjusted by `dl_factor`
-                - Commas are replaced with periods for decimal conversion
-                - Non-convertible values are returned as-is
-                - Flags are set for values that are below detection limits or failed conversion
-
-        """
-        flags = {'found_dl': False, 'found_failed': False}
-        def clean_value(val):
-            """Detecting and cleaning special special values.
-
-            Parameters
-            ----------
-            val : str
-                values within a pandas.series
-
-            Returns
-            -------
-            val: str or float
-                either original string or float when conversion to number possible.
-
-            """
-            if isinstance(val, str):
-                val = val.strip().replace(',', '.')
-                if val.startswith('<'):
-                    try:
-                        number = float(val[1:])
-                        flags['found_dl'] = True
-                        if dl_factor is not None:
-                            return number * dl_factor
-                        else:
-                            return np.nan
-                    except ValueError:
-                        flags['found_failed'] = True
-                        return val
-                try:
-                    return float(val)
-                except ValueError:
-                    flags['found_failed'] = True
-                    return val
-            return val
-
-        cleaned = quantity_series.apply(clean_value)
-
-        if flags['found_dl']:
-            detection_limit_columns.append(quantity_name)
-        if flags['found_failed']:
-            failed_conversion_columns.append(quantity_name)
-
-        return cleaned
-
-    for quantity in cols:
-        df[quantity] = clean_quantity(df[quantity], quantity)
+    detection_limit_columns, failed_conversion_columns = _clean_values(df,
+                                                                       dl_factor = dl_factor,
+                                                                       to_replace_list = to_replace_list,
+                                                                       to_replace_value = to_replace_value,
+                                                                       )
+    df.attrs['detection_limit_columns'] = detection_limit_columns
 
     if verbose:
         if detection_limit_columns:
@@ -550,6 +567,7 @@ def standardize(data_frame,
                 reduce = True,
                 store_csv = False,
                 verbose=True,
+                units = None,
                 **kwargs,
                 ):
     """Function providing condensed data frame with standardized names.
@@ -572,6 +590,9 @@ def standardize(data_frame,
             whether to save dataframe in standard format to csv-file
         verbose: Boolean, default True
             verbose statement
+        units: pandas.DataFrame or None, default None
+            table with units, when data does not contain units in first row,
+            e.g. from loading with keyword 'units_as_metadata'
         **kwargs: Optional keyword arguments.
             dl_factor (float, optional): scaling factor for value given at detection limit.
                Default is None, so detection limit values are replaced by nan.
@@ -603,16 +624,27 @@ def standardize(data_frame,
                   verbose = verbose)
 
     # general unit check
-    units = data.drop(labels = np.arange(1,data.shape[0]))
+    if units is None:
+        units = data.drop(labels = np.arange(1,data.shape[0]))
+        data_values = data.drop(labels = 0)
+    else:
+        units,_ = check_data_frame(units, inplace = False)
+        check_columns(units,
+                      standardize = True,
+                      reduce = reduce,
+                      verbose = False)
+        data_values = data
     col_check_list,_ = check_units(units,
                                  verbose = verbose)
 
     # transform data to numeric values
-    data_numeric = check_values(data.drop(labels = 0),
-                                inplace = False,
+    data_numeric = check_values(data_values,
+                                inplace = True,
                                 verbose = verbose,
                                 **kwargs,
                                 )
+    if data_values is data:
+        data = pd.concat([units,data_numeric])
 
     # store standard data to file
     if store_csv:
@@ -632,6 +664,77 @@ def standardize(data_frame,
 
     return data_numeric, units
 
+def standardize_chunks(chunks,
+                       units,
+                       reduce = True,
+                       verbose = True,
+                       dl_factor = None,
+                       ):
+    """Generator providing standardized data chunk by chunk.
+
+    Column names and units are checked once on the units table, the resulting
+    mapping to standard names is then applied to each chunk of data, which is
+    cleaned and transformed to numeric values. Memory use is thus bounded by
+    the size of the chunks. Concatenating all chunks gives the same data as
+    'standardize()' on the full data.
+
+    Args:
+    -------
+        chunks: iterable of pandas.DataFrames
+            chunks of data without units row, e.g. from 'load_csv_chunks()'
+        units: pandas.DataFrame
+            table with (original) column names and units
+        reduce: Boolean, default True
+            whether to reduce data to known quantities (default True),
+            otherwise full dataframe with renamed columns (for those identifyable) is returned
+        verbose: Boolean, default True
+            verbose statement
+        dl_factor: float or None, default None
+            scaling factor for value given at detection limit.
+            Default is None, so detection limit values are replaced by nan.
+
+    Yields:
+    -------
+        data_numeric: pandas.DataFrame
+            chunk of tabular data with standardized column names, values in numerics etc
+
+    """
+    if dl_factor is not None and (dl_factor>1 or dl_factor<0):
+        raise ValueError("Factor needs to be between 0 and 1 or 'nan'")
+
+    if verbose:
+        print('================================================================')
+        print(" Running function 'standardize_chunks()' on data")
+        print('================================================================')
+
+    units,_ = check_data_frame(units, inplace = False)
+    names_known,names_unknown,names_standard = check_columns(units,
+                                                             standardize = True,
+                                                             reduce = reduce,
+                                                             verbose = verbose)
+    names_transform = dict(zip(names_known,names_standard))
+    check_units(units, verbose = verbose)
+
+    offset = 1 # row index as in 'standardize()' where row 0 contains the units
+    for chunk in chunks:
+        chunk.columns = [names_transform.get(x, x) for x in chunk.columns]
+        if reduce:
+            chunk.drop(labels = names_unknown, axis = 1, inplace = True)
+        chunk.index = chunk.index + offset
+
+        detection_limit_columns, failed_conversion_columns = _clean_values(chunk,
+                                                                           dl_factor = dl_factor)
+        integer_columns = chunk.select_dtypes(include = 'integer').columns
+        chunk[integer_columns] = chunk[integer_columns].astype(float)
+
+        if verbose and failed_conversion_columns:
+            print("Rows {} to {}: not all values could be transformed to numerical for:".format(
+                chunk.index[0],chunk.index[-1]))
+            print(*failed_conversion_columns, sep='\n')
+
+        chunk.attrs['detection_limit_columns'] = detection_limit_columns
+        yield chunk
+
 def _generate_dict_other_names(name_dict,
                                selection = False):
     """Function creating dictionary for mapping alternative names.
@@ -663,6 +766,150 @@ def _generate_dict_other_names(name_dict,
 
     return other_names_dict
 
+def _clean_values(df,
+                  dl_factor = None,
+                  to_replace_list = ["-",'--','',' ','  ',np.inf,-np.inf],
+                  to_replace_value = np.nan,
+                  ):
+    """Cleans values of a DataFrame column-wise (in place).
+
+    Each column is handled in a few vectorized passes: placeholder values are
+    replaced (before and after conversion), all entries are converted to
+    numerics at once and only the remaining (string) entries are parsed further:
+        - strings are stripped and decimal commas replaced by periods
+        - strings like '<0.05' are converted to floats and multiplied
+          with `dl_factor` (or set to NaN if `dl_factor` is None)
+        - non-convertible strings are kept (stripped) as they are
+
+    Args:
+    -------
+        df: pandas.DataFrame
+            dataframe with the measurements (without units row)
+        dl_factor: float or None, default None
+            if set, values with '<' are replaced by (value * dl_factor)
+        to_replace_list: list, default ["-",'--','',' ','  ',np.inf,-np.inf]
+            list of values to replace before cleaning
+        to_replace_value: float or np.nan, default: np.nan
+            value to replace values of to_replace_list with
+
+    Returns:
+    -------
+        detection_limit_columns: list
+            names of columns containing values given by detection limit
+        failed_conversion_columns: list
+            names of columns with values that could not be converted to numerics
+    """
+    detection_limit_columns = []
+    failed_conversion_columns = []
+
+    for quantity in df.columns:
+        series = df[quantity]
+        replace = series.isin(to_replace_list)
+        if replace.any():
+            series = series.mask(replace, to_replace_value)
+            df[quantity] = series
+
+        if pd.api.types.is_numeric_dtype(series):
+            continue
+        if pd.api.types.infer_dtype(series, skipna = True) not in ['string','mixed','mixed-integer']:
+            df[quantity] = series.infer_objects()
+            continue
+
+        ### fast conversion of all entries being plain numbers
+        numbers = pd.to_numeric(series, errors = 'coerce').astype(float)
+        remaining = numbers.isna() & series.notna()
+
+        if not remaining.any():
+            cleaned = numbers
+        else:
+            ### parsing of remaining entries (detection limits, decimal commas, text)
+            # non-string entries become NaN under the string accessor
+            strings = series[remaining].astype(object).str.strip().str.replace(',', '.', regex = False)
+            is_string = strings.notna()
+            is_dl = strings.str.startswith('<').fillna(False).astype(bool)
+            values = strings.where(~is_dl, strings.str[1:])
+            parsed = pd.to_numeric(values, errors = 'coerce').astype(float)
+            converted = parsed.notna() | values.str.lower().isin(['nan','+nan','-nan'])
+            is_dl = is_dl & converted
+
+            if is_dl.any():
+                detection_limit_columns.append(quantity)
+                if dl_factor is not None:
+                    parsed = parsed.mask(is_dl, parsed * dl_factor)
+                else:
+                    parsed = parsed.mask(is_dl, np.nan)
+
+            unconverted = ~(is_string & converted)
+            if not unconverted.any():
+                numbers[remaining] = parsed
+                cleaned = numbers
+            else:
+                if (is_string & ~converted).any():
+                    failed_conversion_columns.append(quantity)
+                cleaned = series.astype(object)
+                cleaned[~remaining & series.notna()] = numbers[~remaining & series.notna()]
+                cleaned[remaining] = parsed.astype(object).where(~unconverted, strings.where(is_string,
+                                                                                             series[remaining]))
+                cleaned = cleaned.infer_objects()
+
+        ### replacing values converted to e.g. infinity
+        replace = cleaned.isin(to_replace_list)
+        if replace.any():
+            cleaned = cleaned.mask(replace, to_replace_value)
+        df[quantity] = cleaned
+
+    return detection_limit_columns, failed_conversion_columns
+
+def _properties_all():
+    """Function merging the properties of all quantities with known names.
+
+    Returns:
+    -------
+        properties_all: dict
+            dictionary of dictionaries with properties for each quantity
+    """
+    properties_all = {**properties_sample_settings,
+                      **properties_geochemicals,
+                      **properties_contaminants,
+                      **properties_metabolites,
+                      **properties_isotopes,
+                      **contaminants_analysis,
+    }
+    return properties_all
+
+def _tables_fingerprint(tables):
+    """Hash of the content of the lookup tables, independent of their order."""
+    hash_tables = hashlib.sha256()
+    for name in sorted(tables):
+        table = tables[name]
+        if isinstance(table, dict):
+            items = sorted((str(key), str(sorted(map(str, value))) if isinstance(value, frozenset) else str(value))
+                           for key, value in table.items())
+        else:
+            items = sorted(str(value) for value in table)
+        hash_tables.update(repr((name, items)).encode('utf-8'))
+    return hash_tables.hexdigest()
+
+def _settings_signature():
+    """Function providing the sizes of the settings dictionaries.
+
+    Used to detect extension of the settings dictionaries for rebuilding
+    the shared name index.
+
+    Returns:
+    -------
+        signature: tuple
+            number of entries per settings dictionary
+    """
+    return (len(properties_sample_settings),
+            len(properties_geochemicals),
+            len(properties_contaminants),
+            len(properties_metabolites),
+            len(properties_isotopes),
+            len(contaminants_analysis),
+            len(properties_units),
+            )
+
 def _check_duplicates_in_list(name_list):
     """Finds duplicate strings in a list and returns their indices.
 
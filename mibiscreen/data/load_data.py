@@ -4,10 +4,25 @@
 
 @author: Alraune Zech
 """
+import glob
+import json
 import os.path
 import re
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
 import pandas as pd
+from mibiscreen.data.check_data import alias_index
+from mibiscreen.data.check_data import standard_names
+from mibiscreen.data.check_data import standardize
+from mibiscreen.data.set_data import merge_data
+from mibiscreen.data.settings.contaminants import contaminant_groups
+from mibiscreen.data.settings.environment import environment_groups
+from mibiscreen.data.settings.metabolites import metabolites
+from mibiscreen.data.settings.unit_settings import all_units
+
+_sniff_separators = [",", ";", "\t"]
+_decimal_comma_pattern = re.compile(r"^[+-]?\d+,\d+$")
+_decimal_point_pattern = re.compile(r"^[+-]?\d*\.\d+$")
 
 
 def load_excel(
@@ -15,10 +30,16 @@ def load_excel(
         sheet_name = 0,
         verbose = False,
         store_provenance = False,
+        units_as_metadata = False,
+        name_list = None,
         **kwargs,
         ):
     """Function to load data from excel file.
 
+    By default, the units are kept as first row of the data (as in the file).
+    With `units_as_metadata`, the units row is read separately and the
+    remaining rows are parsed directly to numerical columns.
+
     Args:
     -------
         file_path: str
@@ -29,6 +50,16 @@ def load_excel(
             verbose flag
         store_provenance: Boolean
             To add!
+        units_as_metadata: Boolean, default False
+            if True, data does not contain the units row; columns of
+            quantities are parsed to numerical values at load time
+            (index of data starts at 1, as with units in row 0);
+            use 'standardize()' with keyword argument 'units' on the result
+        name_list: str or list of str or None, default None
+            if given, only columns of these quantities (plus sample settings)
+            are read from file; names of quantities or of groups as in
+            'determine_quantities()', e.g. 'BTEXIIN', 'ONS' or 'all_cont'.
+            Columns are identified from the header only, via their standard names.
         **kwargs: optional keyword arguments to pass to pandas' routine
             read_excel(), e.g. sep = ',' or sep = ';'
 
@@ -41,7 +72,8 @@ def load_excel(
 
     Raises:
     -------
-        ValueError: If `file_path` is not a valid file location
+        ValueError: If `file_path` is not a valid file location or, with
+            `units_as_metadata`, no units are detected in second row
 
     Example:
     -------
@@ -62,9 +94,31 @@ def load_excel(
     if not os.path.isfile(file_path):
         raise OSError('Cannot access file at : ',file_path)
 
-    data = pd.read_excel(file_path,
-                         sheet_name = sheet_name,
-                         **kwargs)
+    if name_list is not None:
+        header = pd.read_excel(file_path,
+                               sheet_name = sheet_name,
+                               nrows = 0,
+                               **kwargs)
+        kwargs['usecols'] = _select_columns(header.columns, name_list, verbose = verbose)
+
+    if units_as_metadata:
+        units = pd.read_excel(file_path,
+                              sheet_name = sheet_name,
+                              nrows = 1,
+                              **kwargs)
+        if units.shape[0] == 0 or not _is_units_row(units.iloc[0]):
+            raise ValueError("No units detected in second row of file {}. ".format(file_path) +
+                             "Load data with 'units_as_metadata = False'.")
+        data = pd.read_excel(file_path,
+                             sheet_name = sheet_name,
+                             skiprows = [1],
+                             dtype = _settings_dtypes(units.columns),
+                             **kwargs)
+        _numeric_quantities(data)
+    else:
+        data = pd.read_excel(file_path,
+                             sheet_name = sheet_name,
+                             **kwargs)
 
     if verbose:
         print("Reading data from file: {}".format(file_path))
@@ -72,7 +126,8 @@ def load_excel(
 
     _check_duplicates_in_df(data)
 
-    units = data.drop(labels = np.arange(1,data.shape[0]))
+    if not units_as_metadata:
+        units = data.drop(labels = np.arange(1,data.shape[0]))
 
     if verbose:
         print("Unit of quantities:")
@@ -86,13 +141,156 @@ def load_excel(
 
     return data, units
 
+def load_excel_batch(
+        file_paths = None,
+        sheet_names = None,
+        reduce = True,
+        dl_factor = None,
+        max_workers = None,
+        verbose = False,
+        **kwargs,
+        ):
+    """Function to load, standardize and merge data from multiple excel files.
+
+    All requested sheets of all files are loaded and standardized in parallel
+    in a pool of processes. Data of the same sheet from different files is
+    concatenated (rows), data of different sheets is then merged on the sample
+    name (columns) with 'merge_data()'. Files are processed in sorted order and
+    columns are ordered by first appearance, so the result is deterministic.
+
+    Args:
+    -------
+        file_paths: str or list of str
+            Names of the paths to the files; may contain wildcards, e.g.
+            'site_data/*.xlsx'
+        sheet_names: list of str/int or None, default None
+            Names or numbers of the sheets to load from every file;
+            if None, all sheets of each file are loaded
+        reduce: Boolean, default True
+            whether to reduce data to known quantities (default True),
+            otherwise full dataframe with renamed columns (for those identifyable) is returned
+        dl_factor: float or None, default None
+            scaling factor for value given at detection limit.
+            Default is None, so detection limit values are replaced by nan.
+        max_workers: int or None, default None
+            number of processes; if None, the number of processors is used;
+            with max_workers = 1 the files are processed sequentially
+        verbose: Boolean
+            verbose flag
+        **kwargs: optional keyword arguments to pass to 'load_excel()'
+
+    Returns:
+    -------
+        data: pd.DataFrame
+            Tabular data in standard format of all files and sheets
+        units: pd.DataFrame
+            Tabular data on units
+
+    Raises:
+    -------
+        ValueError: If no files are found at `file_paths` or units of a
+            quantity differ between files
+
+    Example:
+    -------
+        >>> data, units = load_excel_batch('site_data/*.xlsx',
+        >>>                                sheet_names = ['contaminants','environment'])
+    """
+    if verbose:
+        print('===================================')
+        print(" Running function 'load_excel_batch()'")
+        print('===================================')
+
+    if file_paths is None:
+        raise ValueError('Specify file path and file name!')
+    if isinstance(file_paths, (str, os.PathLike)):
+        file_paths = [file_paths]
+
+    files = []
+    for file_path in file_paths:
+        matches = sorted(glob.glob(str(file_path))) or [str(file_path)]
+        for match in matches:
+            if not os.path.isfile(match):
+                raise OSError('Cannot access file at : ',match)
+            if match not in files:
+                files.append(match)
+    if not files:
+        raise ValueError('No files found at: {}'.format(file_paths))
+
+    tasks = []
+    for file_path in files:
+        if sheet_names is None:
+            with pd.ExcelFile(file_path) as excel_file:
+                sheets = excel_file.sheet_names
+        else:
+            sheets = sheet_names
+        tasks.extend((file_path, sheet) for sheet in sheets)
+
+    if verbose:
+        print("Loading {} sheets from {} files".format(len(tasks),len(files)))
+        print('------------------------------------------------------------------')
+
+    arguments = [(file_path, sheet, reduce, dl_factor, kwargs) for file_path, sheet in tasks]
+    if max_workers == 1 or len(tasks) == 1:
+        results = [_load_standardize_sheet(*argument) for argument in arguments]
+    else:
+        with ProcessPoolExecutor(max_workers = max_workers) as executor:
+            results = list(executor.map(_load_standardize_sheet, *zip(*arguments)))
+
+    sheets_data = {}
+    units_all = {}
+    units_origin = {}
+    for (file_path, sheet), (data, units) in zip(tasks, results):
+        sheets_data.setdefault(sheet, []).append(data)
+        for name, unit in units.iloc[0].items():
+            if name not in units_all:
+                units_all[name] = unit
+                units_origin[name] = (file_path, sheet)
+            elif _unit_key(unit) != _unit_key(units_all[name]):
+                raise ValueError("Unit of '{}' in file {} (sheet {}) is '{}', but '{}' in file {} (sheet {}).".format(
+                    name, file_path, sheet, unit, units_all[name], *units_origin[name]))
+
+    data_sheets = [pd.concat(data_list, ignore_index = True) for data_list in sheets_data.values()]
+    if len(data_sheets) > 1:
+        data = merge_data(data_sheets)
+    else:
+        data = data_sheets[0]
+
+    units = pd.DataFrame([[units_all[name] for name in data.columns]],
+                         columns = data.columns)
+
+    if verbose:
+        print("Units of quantities:")
+        print('-------------------')
+        print(units)
+        print('________________________________________________________________')
+        print("Loaded data as pandas DataFrame:")
+        print('--------------------------------')
+        print(data)
+        print('================================================================')
+
+    return data, units
+
 def load_csv(
         file_path = None,
         verbose = False,
         store_provenance = False,
+        units_as_metadata = False,
+        name_list = None,
+        **kwargs,
         ):
     """Function to load data from csv file.
 
+    The dialect of the file (delimiter, decimal separator, encoding) is
+    detected from the first few KB of the file, such that the file is parsed
+    exactly once, e.g. also for semicolon delimited files with decimal comma.
+    If characters further down in the file are not utf-8 encoded, the file is
+    read with encoding 'latin-1' instead.
+
+    By default, the units are kept as first row of the data (as in the file).
+    With `units_as_metadata`, the units row is read separately and the
+    remaining rows are parsed directly to numerical columns.
+
     Args:
     -------
         file_path: str
@@ -101,6 +299,19 @@ def load_csv(
             verbose flag
         store_provenance: Boolean
             To add!
+        units_as_metadata: Boolean, default False
+            if True, data does not contain the units row; columns of
+            quantities are parsed to numerical values at load time
+            (index of data starts at 1, as with units in row 0);
+            use 'standardize()' with keyword argument 'units' on the result
+        name_list: str or list of str or None, default None
+            if given, only columns of these quantities (plus sample settings)
+            are read from file; names of quantities or of groups as in
+            'determine_quantities()', e.g. 'BTEXIIN', 'ONS' or 'all_cont'.
+            Columns are identified from the header only, via their standard names.
+        **kwargs: optional keyword arguments to pass to pandas' routine
+            read_csv(), e.g. sep = ';' or decimal = ',', overruling the
+            detected dialect
 
     Returns:
     -------
@@ -111,7 +322,8 @@ def load_csv(
 
     Raises:
     -------
-        ValueError: If `file_path` is not a valid file location
+        ValueError: If `file_path` is not a valid file location or, with
+            `units_as_metadata`, no units are detected in second row
 
     Example:
     -------
@@ -136,13 +348,34 @@ def load_csv(
         print("Reading data from file: {}".format(file_path))
         print('------------------------------------------------------------------')
 
-    data = pd.read_csv(file_path, encoding="unicode_escape")
-    if ";" in data.iloc[1].iloc[0]:
-        data = pd.read_csv(file_path, sep=";", encoding="unicode_escape")
+    dialect = _sniff_csv(file_path)
+    if verbose:
+        _print_dialect(dialect)
+
+    read_kwargs = dict(sep = dialect['sep'],
+                       decimal = dialect['decimal'],
+                       encoding = dialect['encoding'],
+                       low_memory = False,
+                       )
+    read_kwargs.update(kwargs)
+    if units_as_metadata and not dialect['units_row']:
+        raise ValueError("No units detected in second line of file {}. ".format(file_path) +
+                         "Load data with 'units_as_metadata = False'.")
+    try:
+        data, units = _read_csv(file_path, read_kwargs, name_list, units_as_metadata, verbose)
+    except UnicodeDecodeError:
+        # encoding detected from start of file only, non utf-8 characters further down
+        if 'encoding' in kwargs:
+            raise
+        if verbose:
+            print("WARNING: File is not utf-8 encoded, reading it with encoding 'latin-1'.")
+        read_kwargs['encoding'] = 'latin-1'
+        data, units = _read_csv(file_path, read_kwargs, name_list, units_as_metadata, verbose)
 
     _check_duplicates_in_df(data)
 
-    units = data.drop(labels = np.arange(1,data.shape[0]))
+    if not units_as_metadata:
+        units = data.drop(labels = np.arange(1,data.shape[0]))
 
     if verbose:
         print("Units of quantities:")
@@ -156,6 +389,563 @@ def load_csv(
 
     return data, units
 
+def load_csv_chunks(
+        file_path = None,
+        chunksize = 100000,
+        verbose = False,
+        ):
+    """Function to load data from csv file in chunks.
+
+    Header and units row are read once, the remaining rows are provided
+    chunk-wise, keeping memory use bounded for large files. The chunks
+    can be standardized with 'standardize_chunks()'.
+
+    Args:
+    -------
+        file_path: str
+            Name of the path to the file
+        chunksize: int, default 100000
+            Number of rows (samples) per chunk
+        verbose: Boolean
+            verbose flag
+
+    Returns:
+    -------
+        chunks: iterator of pd.DataFrame
+            Tabular data (without units) in chunks of rows
+        units: pd.DataFrame
+            Tabular data on units
+
+    Raises:
+    -------
+        ValueError: If `file_path` is not a valid file location or no units
+            are detected in second line of file
+
+    Example:
+    -------
+        >>> chunks, units = load_csv_chunks(example_data.csv, chunksize = 1000)
+        >>> for data in standardize_chunks(chunks, units):
+        >>>     ...
+    """
+    if verbose:
+        print('==================================')
+        print(" Running function 'load_csv_chunks()'")
+        print('==================================')
+
+    if file_path is None:
+        raise ValueError('Specify file path and file name!')
+    if not os.path.isfile(file_path):
+        raise OSError('Cannot access file at : ',file_path)
+
+    if verbose:
+        print("Reading data from file: {}".format(file_path))
+        print('------------------------------------------------------------------')
+
+    dialect = _sniff_csv(file_path)
+    if verbose:
+        _print_dialect(dialect)
+
+    read_kwargs = dict(sep = dialect['sep'],
+                       decimal = dialect['decimal'],
+                       encoding = dialect['encoding'],
+                       )
+    if not dialect['units_row']:
+        raise ValueError("No units detected in second line of file {}. ".format(file_path) +
+                         "Units are required for loading data in chunks.")
+    units = pd.read_csv(file_path, nrows = 1, **read_kwargs)
+
+    _check_duplicates_in_df(units)
+
+    if verbose:
+        print("Units of quantities:")
+        print('-------------------')
+        print(units)
+        print('================================================================')
+
+    chunks = _read_csv_chunks(file_path, chunksize, read_kwargs)
+
+    return chunks, units
+
+def save_standardized(
+        data,
+        units,
+        file_path = None,
+        file_format = None,
+        detection_limit_columns = None,
+        verbose = False,
+        ):
+    """Function to store standardized data in columnar binary file.
+
+    Numeric data as returned by 'standardize()' is written to a Parquet or
+    Feather file, preserving the data types of all columns. The units and
+    the names of quantities with values given by detection limits are
+    stored as metadata in the same file, such that 'load_standardized()'
+    returns data and units without any parsing or cleaning of values.
+
+    Columns with values that could not be transformed to numerics (e.g.
+    'n.a.' next to numeric values) are stored as text and recorded in the
+    metadata, such that numeric values are restored when loading.
+
+    Requires the optional dependency 'pyarrow'.
+
+    Args:
+    -------
+        data: pd.DataFrame
+            Tabular data in standard format, as returned by 'standardize()'
+        units: pd.DataFrame
+            Tabular data on units, as returned by 'standardize()'
+        file_path: str
+            Name of the path to the file
+        file_format: str or None, default None
+            'parquet' or 'feather'; if None, it is derived from the file
+            extension ('.feather' or '.arrow' for Feather, else Parquet)
+        detection_limit_columns: list or None, default None
+            names of quantities with values given by detection limits;
+            if None, they are taken from data.attrs (set by 'check_values()')
+        verbose: Boolean
+            verbose flag
+
+    Returns:
+    -------
+        None
+
+    Raises:
+    -------
+        ValueError: If `file_path` or `file_format` is not valid
+
+    Example:
+    -------
+        >>> data, units = standardize(data_raw)
+        >>> save_standardized(data, units, 'site_standard.parquet')
+    """
+    if file_path is None:
+        raise ValueError('Specify file path and file name!')
+
+    file_format = _binary_file_format(file_path, file_format)
+    pa, pa_io = _import_pyarrow(file_format)
+
+    if detection_limit_columns is None:
+        detection_limit_columns = data.attrs.get('detection_limit_columns', [])
+
+    units_row = units.iloc[0] if isinstance(units, pd.DataFrame) else units
+    metadata = dict(units = {str(name): (None if pd.isna(unit) else str(unit))
+                             for name, unit in units_row.items()},
+                    detection_limit_columns = list(detection_limit_columns),
+                    mixed_columns = [],
+                    )
+
+    data_store = data.copy(deep = False)
+    data_store.attrs = {}
+    for column in data_store.columns:
+        if pd.api.types.is_object_dtype(data_store[column]) and _is_mixed(data_store[column]):
+            data_store[column] = data_store[column].map(_to_text)
+            metadata['mixed_columns'].append(str(column))
+    table = pa.Table.from_pandas(data_store, preserve_index = True)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[_metadata_key] = json.dumps(metadata).encode('utf-8')
+    table = table.replace_schema_metadata(schema_metadata)
+
+    if file_format == 'parquet':
+        pa_io.write_table(table, file_path)
+    else:
+        pa_io.write_feather(table, file_path)
+
+    if verbose:
+        print('________________________________________________________________')
+        print("Save standardized dataframe to {} file:\n".format(file_format), file_path)
+        print('================================================================')
+
+def load_standardized(
+        file_path = None,
+        file_format = None,
+        verbose = False,
+        ):
+    """Function to load standardized data from columnar binary file.
+
+    Counterpart of 'save_standardized()': reads data with their original
+    data types and reconstructs the units table. The names of quantities
+    with values given by detection limits are provided in
+    data.attrs['detection_limit_columns'].
+
+    Requires the optional dependency 'pyarrow'.
+
+    Args:
+    -------
+        file_path: str
+            Name of the path to the file
+        file_format: str or None, default None
+            'parquet' or 'feather'; if None, it is derived from the file
+            extension ('.feather' or '.arrow' for Feather, else Parquet)
+        verbose: Boolean
+            verbose flag
+
+    Returns:
+    -------
+        data: pd.DataFrame
+            Tabular data in standard format
+        units: pd.DataFrame
+            Tabular data on units
+
+    Raises:
+    -------
+        ValueError: If `file_path` is not a valid file location or file does
+            not contain standardized data
+
+    Example:
+    -------
+        >>> data, units = load_standardized('site_standard.parquet')
+    """
+    if verbose:
+        print('==================================')
+        print(" Running function 'load_standardized()'")
+        print('==================================')
+
+    if file_path is None:
+        raise ValueError('Specify file path and file name!')
+    if not os.path.isfile(file_path):
+        raise OSError('Cannot access file at : ',file_path)
+
+    file_format = _binary_file_format(file_path, file_format)
+    pa, pa_io = _import_pyarrow(file_format)
+
+    if file_format == 'parquet':
+        table = pa_io.read_table(file_path)
+    else:
+        table = pa_io.read_table(file_path, memory_map = True)
+
+    schema_metadata = table.schema.metadata or {}
+    if _metadata_key not in schema_metadata:
+        raise ValueError("File does not contain standardized data. Store data with 'save_standardized()'.")
+    metadata = json.loads(schema_metadata[_metadata_key].decode('utf-8'))
+
+    data = table.to_pandas()
+    for column in metadata.get('mixed_columns', []):
+        data[column] = data[column].astype(object).map(_from_text)
+    data.attrs['detection_limit_columns'] = metadata['detection_limit_columns']
+
+    units = pd.DataFrame([metadata['units']], index = [0])
+
+    if verbose:
+        print("Reading data from file: {}".format(file_path))
+        print('------------------------------------------------------------------')
+        print("Units of quantities:")
+        print('-------------------')
+        print(units)
+        print('________________________________________________________________')
+        print("Loaded data as pandas DataFrame:")
+        print('--------------------------------')
+        print(data)
+        print('================================================================')
+
+    return data, units
+
+_metadata_key = b'mibiscreen'
+
+def _unit_key(unit):
+    """Unit in comparable form (missing units as empty string)."""
+    if unit is None or (isinstance(unit, float) and np.isnan(unit)):
+        return ''
+    return str(unit).strip().lower()
+
+def _read_csv(file_path,
+              read_kwargs,
+              name_list = None,
+              units_as_metadata = False,
+              verbose = False,
+              ):
+    """Read data (and units if given separately) from csv file, worker of 'load_csv()'."""
+    read_kwargs = dict(read_kwargs)
+    if name_list is not None:
+        header = pd.read_csv(file_path, nrows = 0, **read_kwargs)
+        read_kwargs['usecols'] = _select_columns(header.columns, name_list, verbose = verbose)
+
+    units = None
+    if units_as_metadata:
+        units = pd.read_csv(file_path, nrows = 1, **read_kwargs)
+        data = pd.read_csv(file_path,
+                           skiprows = [1],
+                           dtype = _settings_dtypes(units.columns),
+                           **read_kwargs)
+        _numeric_quantities(data)
+    else:
+        data = pd.read_csv(file_path, **read_kwargs)
+
+    return data, units
+
+def _read_csv_chunks(file_path,
+                     chunksize,
+                     read_kwargs,
+                     ):
+    """Iterate over chunks of csv file (without units row).
+
+    The encoding is detected from the start of the file only. When non utf-8
+    characters occur further down, reading continues with encoding 'latin-1'
+    after the rows already provided.
+    """
+    n_read = 0
+    try:
+        for chunk in pd.read_csv(file_path, skiprows = [1], chunksize = chunksize, **read_kwargs):
+            n_read += chunk.shape[0]
+            yield chunk
+    except UnicodeDecodeError:
+        if read_kwargs['encoding'] == 'latin-1':
+            raise
+        read_kwargs = dict(read_kwargs, encoding = 'latin-1')
+        for chunk in pd.read_csv(file_path,
+                                 skiprows = lambda row: 0 < row <= n_read + 1,
+                                 chunksize = chunksize,
+                                 **read_kwargs):
+            chunk.index = chunk.index + n_read
+            yield chunk
+
+def _load_standardize_sheet(file_path,
+                            sheet_name,
+                            reduce,
+                            dl_factor,
+                            kwargs,
+                            ):
+    """Load and standardize a single sheet, worker of 'load_excel_batch()'."""
+    data, units = load_excel(file_path,
+                             sheet_name = sheet_name,
+                             **kwargs)
+    data, units = standardize(data,
+                              reduce = reduce,
+                              verbose = False,
+                              units = units if kwargs.get('units_as_metadata', False) else None,
+                              dl_factor = dl_factor,
+                              )
+    return data, units
+
+def _select_columns(columns,
+                    name_list,
+                    verbose = False,
+                    ):
+    """Select columns of requested quantities from header of file.
+
+    Column names are transformed to standard names, groups of quantities
+    (e.g. 'BTEXIIN', 'ONS') are resolved to the names of the group members.
+    Columns of sample settings are always selected.
+
+    Args:
+    -------
+        columns: list
+            column names as given in header of file
+        name_list: str or list of str
+            names of quantities or groups of quantities to select
+        verbose: Boolean
+            verbose flag (default False)
+
+    Returns:
+    -------
+        positions: list of int
+            positions of selected columns in header
+
+    Raises:
+    -------
+        ValueError: If no quantities of name list are in header
+    """
+    if isinstance(name_list, str):
+        name_list = [name_list]
+    elif not isinstance(name_list, list) or not all(isinstance(item, str) for item in name_list):
+        raise ValueError("Keyword 'name_list' needs to be a string or a list of strings.")
+
+    if 'all' in name_list:
+        return list(range(len(columns)))
+
+    requested = set()
+    for name in name_list:
+        if name in contaminant_groups:
+            requested.update(contaminant_groups[name])
+        elif name in environment_groups:
+            requested.update(environment_groups[name])
+        elif name == 'metabolites':
+            requested.update(metabolites)
+        else:
+            requested.update(standard_names(name))
+
+    names_transform = standard_names([str(column) for column in columns],
+                                     standardize = False)[3]
+    settings = alias_index().sample_settings
+    positions, quantities = [], []
+    for i,column in enumerate(columns):
+        name = names_transform.get(str(column), None)
+        if name in settings:
+            positions.append(i)
+        elif name in requested:
+            positions.append(i)
+            quantities.append(column)
+
+    if not quantities:
+        raise ValueError("No quantities from name list '{}' provided in file.".format(name_list))
+
+    if verbose:
+        print("Reading {} of {} columns for quantities:".format(len(positions),len(columns)))
+        print(*quantities,sep='\n')
+        print('------------------------------------------------------------------')
+
+    return positions
+
+def _settings_dtypes(columns):
+    """Data types for reading columns of sample settings as text."""
+    index = alias_index()
+    dtypes = {}
+    for column in columns:
+        if index.names.get(str(column).lower(), None) in index.sample_settings:
+            dtypes[column] = str
+    return dtypes
+
+def _numeric_quantities(data):
+    """Prepare data read without units row, in place.
+
+    The index is shifted to start at 1 (as with units in row 0) and integer
+    columns are transformed to float, matching the output of 'check_values()'.
+    """
+    data.index = data.index + 1
+    integer_columns = data.select_dtypes(include = 'integer').columns
+    if len(integer_columns) > 0:
+        data[integer_columns] = data[integer_columns].astype(float)
+
+def _binary_file_format(file_path, file_format = None):
+    """Determine binary file format from argument or file extension."""
+    if file_format is None:
+        extension = os.path.splitext(str(file_path))[1].lower()
+        file_format = 'feather' if extension in ['.feather', '.arrow'] else 'parquet'
+    if file_format not in ['parquet', 'feather']:
+        raise ValueError("File format '{}' not supported. Use 'parquet' or 'feather'.".format(file_format))
+    return file_format
+
+def _import_pyarrow(file_format):
+    """Import pyarrow and the module for reading/writing the file format."""
+    try:
+        import pyarrow as pa
+        if file_format == 'parquet':
+            import pyarrow.parquet as pa_io
+        else:
+            import pyarrow.feather as pa_io
+    except ImportError as error:
+        raise ImportError("Storing data in {} format requires the package 'pyarrow'. ".format(file_format) +
+                          "Install it with 'pip install pyarrow'.") from error
+    return pa, pa_io
+
+def _is_mixed(column):
+    """Check if object column contains both text and non-text values."""
+    values = column.dropna()
+    is_text = values.map(lambda value: isinstance(value, str))
+    return bool(is_text.any() and not is_text.all())
+
+def _to_text(value):
+    """Transform value of mixed column to text, keeping missing values."""
+    if isinstance(value, str):
+        return value
+    if pd.isna(value):
+        return None
+    try:
+        return repr(float(value))
+    except (TypeError, ValueError):
+        return str(value)
+
+def _from_text(value):
+    """Restore numeric value from text, keeping non-numeric text."""
+    if not isinstance(value, str):
+        return np.nan if value is None else value
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def _sniff_csv(file_path,
+               sample_size = 65536,
+               ):
+    """Detect the dialect of a csv file from the first bytes of the file.
+
+    Only the first `sample_size` bytes are inspected to determine the
+    encoding, the delimiter, the decimal separator and whether the second
+    line of the file contains the units of the quantities.
+
+    Args:
+    -------
+        file_path: str
+            Name of the path to the file
+        sample_size: int, default 65536
+            Number of bytes read from the start of the file
+
+    Returns:
+    -------
+        dialect: dict
+            with keys 'sep', 'decimal', 'encoding' and 'units_row'
+    """
+    with open(file_path, 'rb') as file:
+        sample = file.read(sample_size)
+        complete = len(file.read(1)) == 0
+
+    if sample.startswith(b'\xef\xbb\xbf'):
+        encoding = 'utf-8-sig'
+    else:
+        encoding = 'utf-8'
+    try:
+        text = sample.decode(encoding)
+    except UnicodeDecodeError as error:
+        # a multibyte character cut off at the end of the sample is fine
+        if not complete and error.start >= len(sample) - 3:
+            text = sample[:error.start].decode(encoding)
+        else:
+            encoding = 'latin-1'
+            text = sample.decode(encoding)
+
+    lines = text.splitlines()
+    if not complete and len(lines) > 1:
+        lines = lines[:-1] # last line might be truncated
+    header = lines[0] if lines else ''
+
+    sep = max(_sniff_separators, key = header.count)
+    if header.count(sep) == 0:
+        sep = ','
+
+    fields = [field.strip().strip('"') for line in lines[1:] for field in line.split(sep)]
+    decimal = '.'
+    if sep != ',':
+        if any(_decimal_comma_pattern.match(field) for field in fields) and \
+                not any(_decimal_point_pattern.match(field) for field in fields):
+            decimal = ','
+
+    units_row = False
+    if len(lines) > 1:
+        units_row = _is_units_row([field.strip().strip('"') for field in lines[1].split(sep)],
+                                  decimal = decimal)
+
+    dialect = dict(sep = sep,
+                   decimal = decimal,
+                   encoding = encoding,
+                   units_row = units_row,
+                   )
+
+    return dialect
+
+def _is_units_row(fields,
+                  decimal = '.',
+                  ):
+    """Check if fields of a row are units (at least one known unit, no numbers)."""
+    unit_names = set(unit.lower() for unit in all_units)
+    fields = [str(field).strip().lower() for field in fields if not pd.isna(field)]
+    return any(field in unit_names for field in fields) and \
+        not any(_is_number(field.replace(decimal,'.')) for field in fields)
+
+def _is_number(value):
+    """Check if string can be interpreted as number."""
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+def _print_dialect(dialect):
+    """Print detected dialect of csv file."""
+    print("Detected csv dialect: delimiter '{}', decimal '{}', encoding '{}'".format(
+        dialect['sep'],dialect['decimal'],dialect['encoding']))
+    if not dialect['units_row']:
+        print("WARNING: No units detected in second line of file.")
+    print('------------------------------------------------------------------')
+
 def _check_duplicates_in_df(data):
     """Detects duplicate column names in a pandas DataFrame.
 
@@ -4,12 +4,14 @@
 
 @author: Alraune Zech
 """
+import numpy as np
 import pandas as pd
 import mibiscreen.data.settings.standard_names as names
+from mibiscreen.data.check_data import alias_index
 from mibiscreen.data.check_data import check_data_frame
 from mibiscreen.data.settings.contaminants import contaminant_groups
 from mibiscreen.data.settings.environment import environment_groups
-from mibiscreen.data.settings.sample_settings import sample_settings
+from mibiscreen.data.settings.metabolites import metabolites
 
 
 def determine_quantities(cols,
@@ -32,7 +34,9 @@ def determine_quantities(cols,
                     - 'BTEX' (for benzene, toluene, ethylbenzene, xylene)
                     - 'BTEXIIN' (for benzene, toluene, ethylbenzene, xylene,
                                   indene, indane and naphthaline)
+                    - 'phenols' (for phenol and alkylphenols)
                     - 'all_cont' (for all contaminant in name list)
+                - 'metabolites' (for all metabolites in name list)
                 - short name for group of environmental parameters/geochemicals:
                     - 'environmental_conditions'
                     - 'geochemicals'
@@ -47,14 +51,16 @@ def determine_quantities(cols,
     Output
     ------
         quantities: list
-            list of strings with names of selected quantities present in dataframe
+            list of strings with names of selected quantities present in dataframe,
+            in order of the name list (or of the column names for 'all')
         remainder: list
             list of strings with names of selected quantities not present in dataframe
 
     """
     if name_list == 'all':
         ### choosing all column names except those of settings
-        list_names = list(set(cols) - set(sample_settings))
+        settings = alias_index().sample_settings
+        list_names = [name for name in cols if name not in settings]
         if verbose:
             print("Selecting all data columns except for those with settings.")
 
@@ -62,9 +68,16 @@ def determine_quantities(cols,
         if name_list in contaminant_groups.keys():
             verbose_text = "Selecting specific group of contaminants:"
             list_names = contaminant_groups[name_list].copy()
-            if (names.name_o_xylene in cols) and (names.name_pm_xylene in cols):
+            if (names.name_o_xylene in cols) and (names.name_pm_xylene in cols) \
+                    and names.name_xylene in list_names:
                 list_names.remove(names.name_xylene) # handling of xylene isomeres
+            if name_list == 'phenols' and all(cresol in cols for cresol in
+                    [names.name_m_cresol,names.name_o_cresol,names.name_p_cresol]):
+                list_names.remove(names.name_cresol) # handling of cresol isomeres
 
+        elif name_list == 'metabolites':
+            verbose_text = "Selecting group of metabolites:"
+            list_names = metabolites.copy()
         elif name_list in environment_groups.keys():
             verbose_text = "Selecting specific group of geochemicals:"
             list_names = environment_groups[name_list].copy()
@@ -88,6 +101,10 @@ def determine_quantities(cols,
         raise ValueError("Keyword 'name_list' needs to be a string or a list of strings.")
 
     quantities,_,remainder_list2 = compare_lists(cols,list_names)
+    # order of quantities as in name list, independent of hashing of set
+    list_names = list(dict.fromkeys(list_names))
+    quantities = [name for name in list_names if name in quantities]
+    remainder_list2 = [name for name in list_names if name in remainder_list2]
 
     if not quantities:
         raise ValueError("No quantities from name list '{}' provided in data.\
@@ -109,6 +126,54 @@ def determine_quantities(cols,
 
     return quantities,remainder_list2
 
+def group_membership(cols,
+                     name_lists,
+                     verbose = False,
+                     ):
+    """Matrix of membership of quantities (column names) in groups of quantities.
+
+    For each group (as used in 'determine_quantities()') the quantities
+    present in the column names are identified. Sums over groups can then be
+    calculated for all groups at once as matrix product of data and
+    membership matrix.
+
+    Input
+    -----
+        cols: list
+            Names of quantities (column names) from pd.DataFrame
+        name_lists: list of str
+            short names of groups of quantities, e.g. ['BTEX','BTEXIIN','MAH']
+        verbose: Boolean
+            verbose flag (default False)
+
+    Output
+    ------
+        membership: pd.DataFrame
+            matrix (quantities x groups) with 1 if quantity is member of group
+            and 0 otherwise; quantities are ordered as in column names;
+            groups without any quantity in the data have a column of zeros
+    """
+    groups = {}
+    for name_list in name_lists:
+        try:
+            groups[name_list],_ = determine_quantities(cols,
+                                                       name_list = name_list,
+                                                       verbose = verbose)
+        except ValueError:
+            print("WARNING: No quantities of group '{}' in data.".format(name_list))
+            groups[name_list] = []
+
+    members = set().union(*groups.values())
+    quantities = [col for col in cols if col in members]
+    membership = pd.DataFrame(np.zeros((len(quantities),len(groups))),
+                              index = quantities,
+                              columns = list(groups),
+                              )
+    for name_list,group in groups.items():
+        membership.loc[group,name_list] = 1.
+
+    return membership
+
 def extract_settings(data_frame,
                      verbose = False,
                      ):
@@ -138,7 +203,7 @@ def extract_settings(data_frame,
     ### check on correct data input format and extracting column names as list
     data,cols= check_data_frame(data_frame,inplace = False)
 
-    settings,r1,r2 = compare_lists(cols,sample_settings)
+    settings,r1,r2 = compare_lists(cols,alias_index().sample_settings)
 
     if verbose:
         print("Settings available in data: ", settings)
@@ -186,7 +251,7 @@ def extract_data(data_frame,
                                       verbose = verbose)
 
     if keep_setting_data:
-        settings,_,_ = compare_lists(cols,sample_settings)
+        settings,_,_ = compare_lists(cols,alias_index().sample_settings)
         i1,quantities_without_settings,_ = compare_lists(quantities,settings)
         columns_names = settings + quantities_without_settings
 
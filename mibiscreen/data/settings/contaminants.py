@@ -1308,5 +1308,24 @@ contaminant_groups = dict(
                     names.name_dibenz_ah_anthracene,
                     names.name_benzo_ghi_perylene,
                     ],
+    phenols = [names.name_phenol,
+               names.name_cresol,
+               names.name_m_cresol,
+               names.name_o_cresol,
+               names.name_p_cresol,
+               names.name_2_ethylphenol,
+               names.name_3_ethylphenol,
+               names.name_4_ethylphenol,
+               names.name_23_dimethylphenol,
+               names.name_24_dimethylphenol,
+               names.name_25_dimethylphenol,
+               names.name_26_dimethylphenol26,
+               names.name_34_dimethylphenol,
+               names.name_35_dimethylphenol,
+               names.name_235_trimethylphenol,
+               names.name_345_trimethylphenol,
+               names.name_2_isopropylphenol,
+               names.name_ptertbutylphenol,
+               ],
     all_cont = list(properties_contaminants.keys())
 )
@@ -0,0 +1,25 @@
+"""Shared test data for the mibiscreen test suite.
+
+@author: Alraune Zech
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture(scope = 'module')
+def ordination_data():
+    """Synthetic data with species concentrations depending exponentially on oxygen.
+
+    Returns data, names of independent variables (environment) and names of
+    dependent variables (species).
+    """
+    rng = np.random.default_rng(0)
+    environment = ['oxygen','nitrate','sulfate']
+    species = ['benzene','toluene','ethylbenzene','pm_xylene','o_xylene']
+    data = pd.DataFrame(rng.normal(size = (40,3)),columns = environment)
+    for i,name in enumerate(species):
+        data[name] = rng.uniform(1,2,size = 40) + 5 * np.exp((i-2) * 0.5 * data['oxygen'])
+
+    return data, environment, species
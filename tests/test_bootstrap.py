@@ -0,0 +1,129 @@
+"""Tests for the mibiscreen.analysis.reduction.bootstrap module.
+
+@author: Alraune Zech
+"""
+
+import numpy as np
+import pytest
+from mibiscreen.analysis.reduction.bootstrap import ordination_bootstrap
+from mibiscreen.analysis.reduction.ordination import constrained_ordination
+from mibiscreen.analysis.reduction.ordination import pca
+
+
+class Test_Ordination_Bootstrap:
+    """Class for testing bootstrap of ordination results."""
+
+    def test_ordination_bootstrap_01(self,ordination_data):
+        """Testing routine ordination_bootstrap().
+
+        Check that reference solution agrees with pca() and constrained_ordination()
+        and ellipses are provided in correct shapes.
+        """
+        data, environment, species = ordination_data
+        out = ordination_bootstrap(data,environment,method = 'pca',
+                                   n_bootstrap = 50,seed = 1)
+        out_pca = pca(data,environment,svd_solver = 'full')
+
+        assert np.allclose(out['loadings_independent'],out_pca['loadings_independent'])
+        assert np.allclose(out['scores'],out_pca['scores'])
+        assert np.allclose(out['percent_explained'],out_pca['percent_explained'])
+        assert out['ellipses_independent'].shape == (3,5)
+        assert out['ellipses_dependent'].shape == (0,5)
+        assert out['ellipses_scores'].shape == (40,5)
+
+        for method in ['cca','rda']:
+            out = ordination_bootstrap(data,environment,species,method = method,
+                                       n_bootstrap = 50,seed = 1)
+            out_ord = constrained_ordination(data,environment,species,
+                                             method = method,engine = 'numpy')
+
+            assert np.allclose(out['scores'],out_ord['scores'])
+            assert np.allclose(out['loadings_dependent'],out_ord['loadings_dependent'])
+            assert out['ellipses_independent'].shape == (3,5)
+            assert out['ellipses_dependent'].shape == (5,5)
+            assert np.all(out['ellipses_scores'][:,2] >= out['ellipses_scores'][:,3])
+
+    def test_ordination_bootstrap_02(self,ordination_data):
+        """Testing routine ordination_bootstrap().
+
+        Check that aligned replicates scatter around reference solution and
+        scores are only taken from replicates containing the sample.
+        """
+        data, environment, species = ordination_data
+        out, replicates = ordination_bootstrap(data,environment,species,
+                                               method = 'rda',n_bootstrap = 200,seed = 2,
+                                               return_replicates = True)
+
+        assert replicates['loadings_dependent'].shape == (200,5,2)
+        assert np.allclose(out['ellipses_dependent'][:,:2],out['loadings_dependent'],
+                           atol = 0.2*np.abs(out['loadings_dependent']).max())
+        assert np.allclose(out['ellipses_dependent'][:,:2],
+                           replicates['loadings_dependent'].mean(axis = 0))
+        assert np.all(np.isnan(replicates['scores']).any(axis = 1))
+
+    def test_ordination_bootstrap_03(self,ordination_data):
+        """Testing routine ordination_bootstrap().
+
+        Check reproducibility of results with seed independent of number of processes.
+        """
+        data, environment, species = ordination_data
+        out_1 = ordination_bootstrap(data,environment,species,method = 'cca',
+                                     n_bootstrap = 60,batch_size = 25,seed = 3)
+        out_2 = ordination_bootstrap(data,environment,species,method = 'cca',
+                                     n_bootstrap = 60,batch_size = 25,seed = 3,max_workers = 2)
+
+        for key in ['ellipses_independent','ellipses_dependent','ellipses_scores']:
+            assert np.array_equal(out_1[key],out_2[key],equal_nan = True)
+
+    def test_ordination_bootstrap_04(self,ordination_data):
+        """Testing routine ordination_bootstrap().
+
+        Correct error message when ordination method or confidence level is not valid.
+        """
+        data, environment, species = ordination_data
+        with pytest.raises(ValueError):
+            ordination_bootstrap(data,environment,species,method = 'test')
+        with pytest.raises(ValueError):
+            ordination_bootstrap(data,environment,species,method = 'cca',
+                                 confidence = 1.5)
+
+    def test_ordination_bootstrap_05(self,ordination_data):
+        """Testing routine ordination_bootstrap().
+
+        Check that CCA replicates without any non-zero value of a sparse species
+        give NaN loadings for it instead of failing.
+        """
+        data, environment, species = ordination_data
+        data_test = data.copy()
+        data_test['naphthalene'] = 0.
+        data_test.loc[5,'naphthalene'] = 3.
+        out, replicates = ordination_bootstrap(data_test,environment,species + ['naphthalene'],
+                                               method = 'cca',n_bootstrap = 200,seed = 1,
+                                               return_replicates = True)
+        index = out['names_dependent'].index('naphthalene')
+        missing = np.isnan(replicates['loadings_dependent'][:,:,0])
+
+        assert missing[:,index].any() and not missing[:,index].all()
+        assert missing.sum() == missing[:,index].sum()
+        assert np.all(np.isfinite(out['ellipses_dependent']))
+
+    def test_ordination_bootstrap_06(self,ordination_data):
+        """Testing routine ordination_bootstrap().
+
+        Check that more than two axes can be evaluated independent of scaling
+        and that rank deficient replicates (constraint constant in resample)
+        are left out instead of failing.
+        """
+        data, environment, species = ordination_data
+        data_test = data.copy()
+        data_test['nitrate'] = 0.
+        data_test.loc[3,'nitrate'] = 1.
+        for method in ['cca','rda']:
+            out, replicates = ordination_bootstrap(data_test,environment,species,method = method,
+                                                   n_comp = 3,n_bootstrap = 100,seed = 1,
+                                                   return_replicates = True)
+            deficient = np.isnan(replicates['loadings_independent']).all(axis = (1,2))
+
+            assert out['loadings_dependent'].shape == (5,3)
+            assert deficient.any() and not deficient.all()
+            assert np.all(np.isfinite(out['ellipses_dependent']))
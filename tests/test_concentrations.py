@@ -12,6 +12,7 @@ from mibiscreen.analysis.sample.concentrations import total_concentration
 from mibiscreen.analysis.sample.concentrations import total_contaminant_concentration
 from mibiscreen.analysis.sample.concentrations import total_contaminant_count
 from mibiscreen.analysis.sample.concentrations import total_count
+from mibiscreen.analysis.sample.concentrations import total_groups
 from mibiscreen.analysis.sample.concentrations import total_metabolites_concentration
 from mibiscreen.analysis.sample.concentrations import total_metabolites_count
 from mibiscreen.data.example_data.example_data import example_data
@@ -86,6 +87,25 @@ class TestTotalConcentration:
 
         assert len(out)>0
 
+    def test_total_concentration_06(self):
+        """Testing routine total_concentration().
+
+        Testing molar and carbon-equivalent total concentration.
+        """
+        out_molar = total_concentration(self.data1,name_list = ['benzene'],basis = 'molar').values
+        out_carbon = total_concentration(self.data1,name_list = ['benzene'],basis = 'carbon').values
+
+        assert np.allclose(out_molar,[263/78.,103/78.])
+        assert np.allclose(out_carbon,6*12.011*out_molar)
+
+    def test_total_concentration_07(self):
+        """Testing routine total_concentration().
+
+        Testing Error message that basis of total concentration is not known.
+        """
+        with pytest.raises(ValueError):
+            total_concentration(self.data1,basis = 'volume')
+
 
 class TestTotalContaminantConcentration:
     """Class for testing total concentration of contaminants from module concentation of mibipret."""
@@ -371,3 +391,54 @@ class TestTotalMetaboliteCount:
         out,err=capsys.readouterr()
 
         assert len(out)>0
+
+class TestTotalGroups:
+    """Class for testing total_groups() of mibiscreen."""
+
+    data = example_data(with_units = False)
+
+    def test_total_groups_01(self):
+        """Testing routine total_groups().
+
+        Testing that totals and counts of all groups agree with separate evaluation per group.
+        """
+        groups = ['BTEX','BTEXIIN','MAH','PAH','phenols']
+        out = total_groups(self.data,groups = groups)
+
+        for group in groups:
+            assert np.allclose(out['concentration_'+group],total_concentration(self.data,name_list = group))
+            assert np.all(out['count_'+group] == total_count(self.data,name_list = group))
+
+    def test_total_groups_02(self,capsys):
+        """Testing routine total_groups().
+
+        Testing zero totals and warning for group without quantities in data.
+        """
+        data = pd.DataFrame([['2000-001', 748, 263]],columns = ['sample_nr', 'sulfate', 'benzene'])
+        out = total_groups(data,groups = ['BTEX','phenols'])
+        captured = capsys.readouterr()
+
+        assert out.loc[0,'concentration_BTEX'] == 263
+        assert out.loc[0,'concentration_phenols'] == 0
+        assert out.loc[0,'count_phenols'] == 0
+        assert "phenols" in captured.out
+
+    def test_total_groups_03(self):
+        """Testing routine total_groups().
+
+        Testing Error message that given threshold value is not valid.
+        """
+        with pytest.raises(ValueError):
+            total_groups(self.data,threshold = -1)
+
+    def test_total_groups_04(self):
+        """Testing routine total_groups().
+
+        Testing totals on several basis at once agree with total_concentration().
+        """
+        out = total_groups(self.data,groups = ['BTEX','phenols'],basis = ['mass','molar','carbon'])
+
+        for basis,prefix in [('molar','molar_concentration_'),('carbon','carbon_concentration_')]:
+            for group in ['BTEX','phenols']:
+                assert np.allclose(out[prefix+group],
+                                   total_concentration(self.data,name_list = group,basis = basis))
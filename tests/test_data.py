@@ -2,26 +2,40 @@
 
 @author: Alraune Zech
 """
+import shutil
 import numpy as np
 import pandas as pd
 import pytest
+from mibiscreen.data.cache_data import cached_standardize
+from mibiscreen.data.cache_data import clear_cache
 from mibiscreen.data.check_data import _check_duplicates_in_list  # Replace with the actual module name
+from mibiscreen.data.check_data import _clean_values
 from mibiscreen.data.check_data import _generate_dict_other_names
+from mibiscreen.data.check_data import alias_index
 from mibiscreen.data.check_data import check_columns
 from mibiscreen.data.check_data import check_data_frame
 from mibiscreen.data.check_data import check_units
 from mibiscreen.data.check_data import check_values
+from mibiscreen.data.check_data import invalidate_alias_index
 from mibiscreen.data.check_data import standard_names
 from mibiscreen.data.check_data import standardize
+from mibiscreen.data.check_data import standardize_chunks
 from mibiscreen.data.example_data.example_data import example_data
 from mibiscreen.data.load_data import _check_duplicates_in_df
+from mibiscreen.data.load_data import _sniff_csv
 from mibiscreen.data.load_data import load_csv
+from mibiscreen.data.load_data import load_csv_chunks
 from mibiscreen.data.load_data import load_excel
+from mibiscreen.data.load_data import load_excel_batch
+from mibiscreen.data.load_data import load_standardized
+from mibiscreen.data.load_data import save_standardized
 from mibiscreen.data.set_data import compare_lists
 from mibiscreen.data.set_data import determine_quantities
 from mibiscreen.data.set_data import extract_data
 from mibiscreen.data.set_data import extract_settings
+from mibiscreen.data.set_data import group_membership
 from mibiscreen.data.set_data import merge_data
+from mibiscreen.data.settings.contaminants import properties_contaminants
 
 path_data = "./mibiscreen/data/example_data/"
 
@@ -63,6 +77,216 @@ class TestLoadData:
 
         assert len(out)>0
 
+    def test_load_csv_05(self,tmp_path):
+        """Testing routine load_csv().
+
+        Testing loading of semicolon delimited file with decimal comma.
+        """
+        file_path = tmp_path / "data_semicolon.csv"
+        file_path.write_text("sample_nr;pH;benzene\n;;ug/l\n2000-001;7,23;263\n2000-002;6,5;12,4\n",
+                             encoding = 'utf-8')
+        data,units = load_csv(file_path)
+
+        assert data.shape == (3,3)
+        assert data['pH'].iloc[1] == 7.23
+        assert units['benzene'].iloc[0] == 'ug/l'
+
+    def test_load_csv_06(self,tmp_path):
+        """Testing routine load_csv().
+
+        Testing that keyword arguments overrule the detected dialect.
+        """
+        file_path = tmp_path / "data_semicolon.csv"
+        file_path.write_text("sample_nr;pH\n;\n2000-001;7,23\n",encoding = 'utf-8')
+        data,units = load_csv(file_path,decimal = '.')
+
+        assert data['pH'].iloc[1] == '7,23'
+
+    def test_load_csv_07(self):
+        """Testing routine load_csv().
+
+        Testing option of reading units separately: numerical columns at load
+        time and same result of standardization as with units in data.
+        """
+        file_path = "{}/example_data.csv".format(path_data)
+        data_t1,units_t1 = load_csv(file_path,units_as_metadata = True)
+        data,units = load_csv(file_path)
+
+        assert data_t1.shape == (data.shape[0]-1,data.shape[1])
+        assert data_t1['benzene'].dtype == float
+        assert data_t1['sample_nr'].iloc[0] == '2000-001'
+        assert list(data_t1.index) == list(data.index[1:])
+
+        data_standard_t1,units_standard_t1 = standardize(data_t1,units = units_t1,verbose = False)
+        data_standard,units_standard = standardize(data,verbose = False)
+        pd.testing.assert_frame_equal(data_standard_t1,data_standard)
+        pd.testing.assert_frame_equal(units_standard_t1,units_standard)
+
+    def test_load_csv_08(self):
+        """Testing routine load_csv().
+
+        Testing reading only columns of requested groups of quantities
+        and sample settings.
+        """
+        data,units = load_csv("{}/example_data.csv".format(path_data),
+                              name_list = ['BTEX','ONS'])
+
+        assert list(data.columns) == ['sample_nr','obs_well','depth','oxygen','nitrate','sulfate',
+                                      'benzene','toluene','ethylbenzene','pm_xylene','o_xylene']
+        assert units.shape == (1,11)
+
+    def test_load_csv_09(self):
+        """Testing routine load_csv().
+
+        Testing Error message that no quantities of name list are in file.
+        """
+        with pytest.raises(ValueError):
+            load_csv("{}/example_data.csv".format(path_data),name_list = 'test_quantity')
+
+    def test_load_csv_10(self,tmp_path):
+        """Testing routine load_csv().
+
+        Testing Error message when reading units separately from file without
+        units row, instead of dropping the first sample.
+        """
+        file_path = tmp_path / "data_no_units.csv"
+        file_path.write_text("sample_nr,benzene\n2000-001,263\n2000-002,12\n")
+        data,_ = load_csv(file_path)
+
+        assert data.shape == (2,2)
+        with pytest.raises(ValueError,match = 'No units detected'):
+            load_csv(file_path,units_as_metadata = True)
+
+    def test_sniff_csv_01(self):
+        """Testing routine _sniff_csv().
+
+        Testing detection of dialect of example data.
+        """
+        dialect = _sniff_csv("{}/example_data.csv".format(path_data))
+
+        assert dialect == dict(sep = ',', decimal = '.', encoding = 'utf-8', units_row = True)
+
+    def test_sniff_csv_02(self,tmp_path):
+        """Testing routine _sniff_csv().
+
+        Testing detection of semicolon delimiter, decimal comma and latin-1
+        encoding.
+        """
+        file_path = tmp_path / "data_latin.csv"
+        file_path.write_bytes("sample_nr;benzene\n;\u00b5g/l\n2000-001;2,5\n".encode('latin-1'))
+        dialect = _sniff_csv(file_path)
+
+        assert dialect == dict(sep = ';', decimal = ',', encoding = 'latin-1', units_row = True)
+
+    def test_sniff_csv_03(self,tmp_path):
+        """Testing routines load_csv() and load_csv_chunks().
+
+        Testing that files with non utf-8 characters beyond the part of the
+        file inspected for the dialect are read with latin-1 encoding.
+        """
+        file_path = tmp_path / "data_latin.csv"
+        lines = ["sample_nr;benzene","-;ug/l"] + ["2000-{:04d};2,5".format(i) for i in range(8000)]
+        lines.append("caf\u00e9;1,0")
+        file_path.write_bytes("\n".join(lines).encode('latin-1'))
+
+        data,_ = load_csv(file_path)
+        chunks,_ = load_csv_chunks(file_path,chunksize = 3000)
+        data_chunks = pd.concat(chunks)
+
+        assert _sniff_csv(file_path)['encoding'] == 'utf-8'
+        assert data.shape == (8002,2)
+        assert data['sample_nr'].iloc[-1] == "caf\u00e9"
+        assert data_chunks.shape == (8001,2)
+        assert data_chunks['sample_nr'].iloc[-1] == "caf\u00e9"
+        assert data_chunks.index.is_unique
+
+    def test_load_csv_chunks_01(self):
+        """Testing routine load_csv_chunks().
+
+        Testing that units are read separately and data is provided in chunks.
+        """
+        chunks,units = load_csv_chunks("{}/example_data.csv".format(path_data),chunksize = 3)
+        data = example_data(with_units = True)
+        chunk_sizes = [chunk.shape for chunk in chunks]
+
+        assert units.shape == (1,data.shape[1])
+        assert chunk_sizes == [(3,data.shape[1]),(1,data.shape[1])]
+
+    def test_load_csv_chunks_02(self):
+        """Testing routine load_csv_chunks().
+
+        Testing Error message that given file path does not match.
+        """
+        with pytest.raises(OSError):
+            load_csv_chunks("ThisFileDoesNotExist.csv")
+
+    def test_load_csv_chunks_03(self,tmp_path):
+        """Testing routine load_csv_chunks().
+
+        Testing Error message for file without units row.
+        """
+        file_path = tmp_path / "data_no_units.csv"
+        file_path.write_text("sample_nr,benzene\n2000-001,263\n2000-002,12\n")
+
+        with pytest.raises(ValueError,match = 'No units detected'):
+            load_csv_chunks(file_path)
+
+    def test_load_standardized_01(self,tmp_path):
+        """Testing routine save_standardized() and load_standardized().
+
+        Testing that data types, units and detection limit flags are preserved
+        when storing standardized data in parquet and feather format.
+        """
+        pytest.importorskip("pyarrow")
+        data_raw = example_data(with_units = True)
+        data_raw.loc[1,'benzene'] = '<0.5'
+        data,units = standardize(data_raw,verbose = False)
+
+        for file_name in ["data.parquet","data.feather"]:
+            save_standardized(data,units,tmp_path / file_name)
+            data_t1,units_t1 = load_standardized(tmp_path / file_name)
+
+            pd.testing.assert_frame_equal(data_t1,data)
+            assert units_t1.iloc[0].to_list() == units.iloc[0].to_list()
+            assert data_t1.attrs['detection_limit_columns'] == ['benzene']
+
+    def test_load_standardized_02(self):
+        """Testing routine load_standardized().
+
+        Testing Error message that given file path does not match.
+        """
+        with pytest.raises(OSError):
+            load_standardized("ThisFileDoesNotExist.parquet")
+
+    def test_load_standardized_03(self,tmp_path):
+        """Testing routine save_standardized().
+
+        Testing Error message that file format is not supported.
+        """
+        data,units = standardize(example_data(with_units = True),verbose = False)
+        with pytest.raises(ValueError):
+            save_standardized(data,units,tmp_path / "data.csv",file_format = 'csv')
+
+    def test_load_standardized_04(self,tmp_path):
+        """Testing routine save_standardized() and load_standardized().
+
+        Testing that columns with values failing transformation to numerics
+        (e.g. 'n.a.') are stored and restored with their numeric values.
+        """
+        pytest.importorskip("pyarrow")
+        data_raw = pd.DataFrame({'sample_nr' : ['','2000-001','2000-002'],
+                                 'benzene' : ['ug/l','5','n.a.'],
+                                 'toluene' : ['ug/l','1','2']})
+        data = check_values(data_raw,verbose = False)
+        units = pd.DataFrame([{'sample_nr' : None,'benzene' : 'ug/l','toluene' : 'ug/l'}])
+
+        for file_name in ["data.parquet","data.feather"]:
+            save_standardized(data,units,tmp_path / file_name)
+            data_t1,_ = load_standardized(tmp_path / file_name)
+
+            pd.testing.assert_frame_equal(data_t1,data)
+            assert data_t1['benzene'].to_list() == [5.,'n.a.']
+
     def test_load_excel_01(self):
         """Testing routine load_excel().
 
@@ -110,6 +334,112 @@ class TestLoadData:
         assert "WARNING: Looks like duplicate column names detected." in captured
         assert " - 'naphthalene.1'" in captured
 
+    def test_load_excel_06(self):
+        """Testing routine load_excel().
+
+        Testing option of reading units separately.
+        """
+        file_path = "{}/example_data.xlsx".format(path_data)
+        data_t1,units_t1 = load_excel(file_path,sheet_name= 'contaminants',units_as_metadata = True)
+        data = example_data(data_type = 'contaminants',with_units = True)
+
+        assert data_t1.shape == (data.shape[0]-1,data.shape[1])
+        assert units_t1.shape == (1,data.shape[1])
+        assert data_t1['benzene'].dtype == float
+
+    def test_load_excel_07(self):
+        """Testing routine load_excel().
+
+        Testing reading only columns of requested quantities with alternative
+        names in file.
+        """
+        data_t1,units_t1 = load_excel("{}/example_data.xlsx".format(path_data),
+                                      sheet_name= 'contaminants',
+                                      name_list = ['Benzene','toluene'])
+
+        assert list(data_t1.columns) == ['sample_nr','obs_well','depth','benzene','toluene']
+
+    def test_load_excel_08(self,tmp_path):
+        """Testing routine load_excel().
+
+        Testing Error message when reading units separately from file without
+        units row.
+        """
+        file_path = tmp_path / "data_no_units.xlsx"
+        pd.DataFrame(dict(sample_nr = ['2000-001','2000-002'],benzene = [263.,12.])).to_excel(
+            file_path,index = False)
+
+        with pytest.raises(ValueError,match = 'No units detected'):
+            load_excel(file_path,units_as_metadata = True)
+
+    def test_load_excel_batch_01(self):
+        """Testing routine load_excel_batch().
+
+        Testing that all sheets of file are standardized and merged as with
+        sequential loading, standardization and merging.
+        """
+        file_path = "{}/example_data.xlsx".format(path_data)
+        data_t1,units_t1 = load_excel_batch(file_path,max_workers = 2)
+
+        data_sheets = []
+        for sheet in ['contaminants','environment','metabolites','isotopes']:
+            data,units = standardize(load_excel(file_path,sheet_name = sheet)[0],verbose = False)
+            data_sheets.append(data.reset_index(drop = True))
+        data = merge_data(data_sheets)
+
+        pd.testing.assert_frame_equal(data_t1,data)
+        assert list(units_t1.columns) == list(data.columns)
+
+    def test_load_excel_batch_02(self,tmp_path):
+        """Testing routine load_excel_batch().
+
+        Testing concatenation of same sheet from multiple files given by
+        wildcard pattern.
+        """
+        for i in range(2):
+            shutil.copy("{}/example_data.xlsx".format(path_data),tmp_path / "site_{}.xlsx".format(i))
+        data_t1,units_t1 = load_excel_batch(str(tmp_path / "site_*.xlsx"),
+                                            sheet_names = ['contaminants'],
+                                            max_workers = 1)
+        data = example_data(data_type = 'contaminants')
+
+        assert data_t1.shape == (2*data.shape[0],data.shape[1])
+
+    def test_load_excel_batch_03(self):
+        """Testing routine load_excel_batch().
+
+        Testing Error message that given file path does not match.
+        """
+        with pytest.raises(OSError):
+            load_excel_batch("ThisFileDoesNotExist.xlsx")
+
+    def test_load_excel_batch_04(self):
+        """Testing routine load_excel_batch().
+
+        Testing that units read as metadata (keyword 'units_as_metadata')
+        are forwarded to the standardization.
+        """
+        file_path = "{}/example_data.xlsx".format(path_data)
+        data_t1,units_t1 = load_excel_batch(file_path,sheet_names = ['contaminants'],
+                                            units_as_metadata = True,max_workers = 1)
+        data_t2,units_t2 = load_excel_batch(file_path,sheet_names = ['contaminants'],max_workers = 1)
+
+        pd.testing.assert_frame_equal(data_t1,data_t2,check_dtype = False)
+        assert units_t1.iloc[0].to_list() == units_t2.iloc[0].to_list()
+
+    def test_load_excel_batch_05(self,tmp_path):
+        """Testing routine load_excel_batch().
+
+        Testing Error message that units of a quantity differ between files.
+        """
+        shutil.copy("{}/example_data.xlsx".format(path_data),tmp_path / "site_0.xlsx")
+        data = pd.read_excel("{}/example_data.xlsx".format(path_data),sheet_name = 'contaminants')
+        data.loc[0,'benzene'] = 'mg/L'
+        data.to_excel(tmp_path / "site_1.xlsx",sheet_name = 'contaminants',index = False)
+
+        with pytest.raises(ValueError,match = "benzene"):
+            load_excel_batch(str(tmp_path / "site_*.xlsx"),sheet_names = ['contaminants'],max_workers = 1)
+
     def test_check_duplicates_in_df_01(self,capsys):
         """Testing routine _check_duplicates_in_df().
 
@@ -709,6 +1039,43 @@ class TestCheckDataValues:
 
         assert len(out)>0
 
+    def test_check_values_08(self):
+        """Testing check_values().
+
+        Testing that columns fully converted are of numeric type, while
+        columns with non-convertible values keep these as (stripped) strings.
+        """
+        data_clean = check_values(self.data_01,
+                                  dl_factor = 0.5,
+                                  verbose = False)
+
+        assert data_clean['naphtalene'].dtype == np.float64
+        assert data_clean['naphtalene'].to_list() == [2900., 0.01, 3400., 0.08]
+        assert data_clean['benzene'].to_list() == [50.,49.,'<<0.1','test']
+
+    def test_check_values_09(self):
+        """Testing check_values().
+
+        Testing replacement of placeholder values and infinity with NaN.
+        """
+        data = pd.DataFrame({'benzene' : ['1', '-', ' ', '--'],
+                             'toluene' : [1., np.inf, -np.inf, 2.]})
+        data_clean = check_values(data,verbose = False)
+
+        assert data_clean['benzene'].isna().sum() == 3
+        assert data_clean['toluene'].isna().sum() == 2
+
+    def test_clean_values_01(self):
+        """Testing routine _clean_values().
+
+        Testing flagging of columns with detection limits and failed conversions.
+        """
+        data = self.data_01.copy()
+        detection_limit_columns,failed_conversion_columns = _clean_values(data)
+
+        assert detection_limit_columns == ['naphtalene']
+        assert failed_conversion_columns == ['benzene']
+
 
 class TestDataStandardize:
     """Class for testing data module of mibiscreen."""
@@ -781,6 +1148,44 @@ class TestDataStandardize:
 
         assert len(out)>0
 
+    def test_standardize_chunks_01(self):
+        """Testing routine standardize_chunks().
+
+        Testing that concatenated chunks provide the same data as standardize().
+        """
+        data,_ = load_csv("{}/example_data.csv".format(path_data))
+        data_standard,_ = standardize(data, verbose = False)
+
+        chunks,units = load_csv_chunks("{}/example_data.csv".format(path_data),chunksize = 3)
+        data_chunks = pd.concat(standardize_chunks(chunks,units,verbose = False))
+
+        pd.testing.assert_frame_equal(data_standard,data_chunks)
+
+    def test_standardize_chunks_02(self):
+        """Testing routine standardize_chunks().
+
+        Testing reduction to known quantities and handling of detection limits.
+        """
+        units = self.data4standard_1.iloc[[0]]
+        chunk = pd.DataFrame([['2000-001', 'B-MLS1-3-12',-12, 7.23, -208, '<2', 748, 3,263,2207, 10., 20.,30.]],
+                             columns = self.columns_mod)
+        data_chunks = list(standardize_chunks([chunk],units,dl_factor = 0.5,verbose = False))
+
+        assert len(data_chunks) == 1
+        assert data_chunks[0].shape == (1,self.data4standard_1.shape[1]-1)
+        assert data_chunks[0]['sulfate'].iloc[0] == 1.
+
+    def test_standardize_chunks_03(self,capsys):
+        """Testing routine standardize_chunks().
+
+        Testing verbose flag.
+        """
+        units = self.data4standard_1.iloc[[0]]
+        list(standardize_chunks([self.data4standard_1.iloc[[1]]],units,verbose = True))
+        out,err=capsys.readouterr()
+
+        assert len(out)>0
+
 class TestGenerateDictOtherNames:
     """Class for testing data module of mibiscreen."""
 
@@ -821,6 +1226,160 @@ class TestGenerateDictOtherNames:
 
 
 
+class TestAliasIndex:
+    """Class for testing the shared name index of data module of mibiscreen."""
+
+    def test_alias_index_01(self):
+        """Testing routine alias_index().
+
+        Testing that index is built once and reused.
+        """
+        index_1 = alias_index()
+        index_2 = alias_index()
+
+        assert index_1 is index_2
+        assert index_1.names['c6h6'] == 'benzene'
+        assert index_1.isotopes['delta_13c'] == 'delta_13C'
+        assert index_1.standard_units['benzene'] == 'ug/l'
+
+    def test_alias_index_02(self):
+        """Testing routine alias_index().
+
+        Testing that index can not be modified.
+        """
+        index = alias_index()
+        with pytest.raises(TypeError):
+            index.names['new_name'] = 'benzene'
+
+    def test_alias_index_03(self):
+        """Testing routine alias_index().
+
+        Testing that index is rebuilt when settings dictionaries are extended.
+        """
+        version = alias_index().version
+        properties_contaminants['test_contaminant'] = dict(
+            other_names = ['test_contaminant','testcont'],
+            standard_unit = 'ug/l',
+            )
+        try:
+            index = alias_index()
+            assert index.version > version
+            assert standard_names('TestCont') == ['test_contaminant']
+        finally:
+            del properties_contaminants['test_contaminant']
+
+        assert 'testcont' not in alias_index().names
+
+    def test_invalidate_alias_index_01(self):
+        """Testing routine invalidate_alias_index().
+
+        Testing that modified alternative names are picked up after invalidation.
+        """
+        properties_contaminants['benzene']['other_names'].append('test_benzene')
+        try:
+            invalidate_alias_index()
+            assert standard_names('test_benzene') == ['benzene']
+        finally:
+            properties_contaminants['benzene']['other_names'].remove('test_benzene')
+            invalidate_alias_index()
+
+        assert standard_names('test_benzene') == ['test_benzene']
+
+    def test_alias_index_04(self):
+        """Testing routine alias_index().
+
+        Testing that fingerprint of settings changes with modified alternative names.
+        """
+        fingerprint = alias_index().fingerprint
+        properties_contaminants['benzene']['other_names'].append('test_benzene')
+        try:
+            invalidate_alias_index()
+            assert alias_index().fingerprint != fingerprint
+        finally:
+            properties_contaminants['benzene']['other_names'].remove('test_benzene')
+            invalidate_alias_index()
+
+        assert alias_index().fingerprint == fingerprint
+
+class TestCachedStandardize:
+    """Class for testing cache of standardized data of mibiscreen."""
+
+    def test_cached_standardize_01(self,tmp_path,capsys):
+        """Testing routine cached_standardize().
+
+        Testing that result is taken from cache for unchanged file and
+        identical to standardized data.
+        """
+        file_path = "{}/example_data.csv".format(path_data)
+        data_1,units_1 = cached_standardize(file_path,cache_dir = tmp_path,verbose = False)
+        data_2,units_2 = cached_standardize(file_path,cache_dir = tmp_path,verbose = True)
+        out,err=capsys.readouterr()
+        data,units = standardize(load_csv(file_path)[0],verbose = False)
+
+        assert 'from cache' in out
+        assert len(list(tmp_path.glob('*.parquet'))) == 1
+        pd.testing.assert_frame_equal(data_2,data)
+        pd.testing.assert_frame_equal(units_2,units)
+
+    def test_cached_standardize_02(self,tmp_path):
+        """Testing routine cached_standardize().
+
+        Testing that changed file content and arguments give new cache entries.
+        """
+        file_path = tmp_path / "data.csv"
+        file_path.write_text("sample_nr,benzene\n,ug/l\n2000-001,263\n")
+        cache_dir = tmp_path / "cache"
+        cached_standardize(file_path,cache_dir = cache_dir,verbose = False)
+        cached_standardize(file_path,cache_dir = cache_dir,verbose = False,dl_factor = 0.5)
+        file_path.write_text("sample_nr,benzene\n,ug/l\n2000-001,<2\n")
+        data,units = cached_standardize(file_path,cache_dir = cache_dir,verbose = False,dl_factor = 0.5)
+
+        assert len(list(cache_dir.glob('*.parquet'))) == 3
+        assert data['benzene'].iloc[0] == 1.
+
+    def test_cached_standardize_03(self,tmp_path):
+        """Testing routine cached_standardize().
+
+        Testing eviction of least recently used entries when exceeding maximal
+        cache size.
+        """
+        for i in range(3):
+            file_path = tmp_path / "data_{}.csv".format(i)
+            file_path.write_text("sample_nr,benzene\n,ug/l\n2000-001,{}\n".format(i))
+            cached_standardize(file_path,cache_dir = tmp_path / "cache",
+                               max_cache_size = 0.001,verbose = False)
+
+        assert len(list((tmp_path / "cache").glob('*.parquet'))) == 0
+
+    def test_cached_standardize_04(self,tmp_path):
+        """Testing routine cached_standardize().
+
+        Testing that an unreadable cache entry is treated as cache miss
+        and replaced by a valid entry.
+        """
+        file_path = "{}/example_data.csv".format(path_data)
+        cached_standardize(file_path,cache_dir = tmp_path,verbose = False)
+        cache_file = list(tmp_path.glob('*.parquet'))[0]
+        cache_file.write_bytes(b'corrupt entry')
+        data_1,units_1 = cached_standardize(file_path,cache_dir = tmp_path,verbose = False)
+        data_2,units_2 = cached_standardize(file_path,cache_dir = tmp_path,verbose = False)
+        data,units = standardize(load_csv(file_path)[0],verbose = False)
+
+        pd.testing.assert_frame_equal(data_1,data)
+        pd.testing.assert_frame_equal(data_2,data)
+        pd.testing.assert_frame_equal(units_2,units)
+
+    def test_clear_cache_01(self,tmp_path):
+        """Testing routine clear_cache().
+
+        Testing removal of all cache entries.
+        """
+        cached_standardize("{}/example_data.csv".format(path_data),
+                           cache_dir = tmp_path,verbose = False)
+        clear_cache(tmp_path)
+
+        assert len(list(tmp_path.glob('*.parquet'))) == 0
+
 class TestDataCompareLists:
     """Class for testing data module of mibiscreen."""
 
@@ -954,6 +1513,47 @@ class TestDetermineQuantities:
                                  name_list = 7.0,
                                  )
 
+    def test_determine_quantities_09(self):
+        """Testing routine determine_quantities().
+
+        Testing groups without xylene when xylene isomeres are in data and group of metabolites.
+        """
+        out_pah,_ = determine_quantities(cols = self.cols4,
+                                         name_list = 'PAH',
+                                         )
+        out_metabolites,_ = determine_quantities(cols = self.setting_data+['benzoic_acid','benzene'],
+                                                 name_list = 'metabolites',
+                                                 )
+        assert out_pah == ['indane']
+        assert out_metabolites == ['benzoic_acid']
+
+
+class TestGroupMembership:
+    """Class for testing group membership matrix of data module of mibiscreen."""
+
+    cols = ['sample_nr','oxygen','nitrate','sulfate','iron2','benzene','toluene']
+
+    def test_group_membership_01(self):
+        """Testing routine group_membership().
+
+        Testing membership matrix of quantities in groups.
+        """
+        membership = group_membership(self.cols,['ONS','all_ea','BTEX'])
+
+        assert list(membership.index) == self.cols[1:]
+        assert list(membership.columns) == ['ONS','all_ea','BTEX']
+        assert np.all(membership.sum().values == [3,4,2])
+
+    def test_group_membership_02(self,capsys):
+        """Testing routine group_membership().
+
+        Testing handling of groups without quantities in data.
+        """
+        membership = group_membership(self.cols,['PAH_total_16'])
+        out,err=capsys.readouterr()
+
+        assert membership.shape == (0,1)
+        assert "WARNING: No quantities of group 'PAH_total_16' in data." in out
 
 class TestExtractSettings:
     """Class for testing data module of mibipret."""
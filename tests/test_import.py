@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Testing lazy top-level imports of mibiscreen.
+
+@author: Alraune Zech
+"""
+
+import subprocess
+import sys
+import pytest
+import mibiscreen
+
+heavy_modules = ['sklearn','skbio','matplotlib','IPython','scipy','adjustText']
+
+def _run_python(code):
+    """Run code in fresh python process and return its output."""
+    result = subprocess.run([sys.executable, '-c', code],
+                            capture_output = True,
+                            text = True,
+                            check = True,
+                            )
+    return result.stdout.strip()
+
+class TestLazyImport:
+    """Class for testing lazy top-level imports of mibiscreen."""
+
+    def test_import_01(self):
+        """Testing import of mibiscreen.
+
+        Testing that data handling and NA screening do not import heavy
+        dependencies of ordination and plotting (import-time guard).
+        """
+        code = "\n".join([
+            "import sys, time",
+            "start = time.perf_counter()",
+            "import mibiscreen",
+            "mibiscreen.load_csv, mibiscreen.standardize, mibiscreen.sample_NA_screening",
+            "duration = time.perf_counter() - start",
+            "heavy = [m for m in {} if m in sys.modules]".format(heavy_modules),
+            "print(','.join(heavy), duration, sep = ';')",
+            ])
+        heavy, duration = _run_python(code).split(';')
+
+        assert heavy == '', "Heavy modules imported ({} s): {}".format(duration,heavy)
+
+    def test_import_02(self):
+        """Testing import of mibiscreen.
+
+        Testing that all public names are available and listed.
+        """
+        for name in mibiscreen.__all__:
+            assert callable(getattr(mibiscreen, name))
+        assert 'pca' in dir(mibiscreen)
+
+    def test_import_03(self):
+        """Testing import of mibiscreen.
+
+        Testing error message for unknown attribute.
+        """
+        with pytest.raises(AttributeError):
+            mibiscreen.this_function_does_not_exist
@@ -11,7 +11,9 @@ import pytest
 from mibiscreen.analysis.sample.screening_NA import electron_balance
 from mibiscreen.analysis.sample.screening_NA import oxidators
 from mibiscreen.analysis.sample.screening_NA import reductors
+from mibiscreen.analysis.sample.screening_NA import sample_NA_monte_carlo
 from mibiscreen.analysis.sample.screening_NA import sample_NA_screening
+from mibiscreen.analysis.sample.screening_NA import sample_NA_sweep
 from mibiscreen.analysis.sample.screening_NA import sample_NA_traffic
 from mibiscreen.data.example_data.example_data import example_data
 
@@ -87,6 +89,18 @@ class TestReductors:
 
         assert len(out)>0
 
+    def test_reductors_07(self):
+        """Testing routine reductors().
+
+        Testing calculation per sample from electron equivalents and handling
+        of missing values.
+        """
+        data_test = pd.DataFrame(dict(oxygen = [3.2,np.nan], nitrate = [6.2,6.2], sulfate = [9.6,9.6]))
+        tot_reduct = reductors(data_test)
+
+        assert np.abs(tot_reduct.iloc[0] - (4*3.2/32. + 5*6.2/62. + 8*9.6/96.1)) < 1e-10
+        assert np.isnan(tot_reduct.iloc[1])
+
 
 class TestOxidators:
     """Class for testing oxidators analysis module on NA screening of mibipret."""
@@ -169,6 +183,18 @@ class TestOxidators:
 
         assert len(out)>0
 
+    def test_oxidators_08(self):
+        """Testing routine oxidators().
+
+        Testing calculation per sample from electron equivalents for
+        contaminant concentrations in [ug/l].
+        """
+        data_test = pd.DataFrame(dict(benzene = [780.,0.], toluene = [920.,np.nan]))
+        tot_oxi = oxidators(data_test,contaminant_group = 'BTEX')
+
+        assert np.abs(tot_oxi.iloc[0] - (30*0.01 + 36*0.01)) < 1e-10
+        assert np.isnan(tot_oxi.iloc[1])
+
 
 class TestElectronBalance:
     """Class for testing electron_balance analysis module on NA screening of mibipret."""
@@ -298,3 +324,146 @@ class TestScreeningNA:
 
         assert len(out)>0
 
+    def test_sample_NA_screening_03(self):
+        """Testing routine sample_NA_screening().
+
+        Testing that electron balance and traffic light are based on the
+        requested groups of electron acceptors and contaminants.
+        """
+        na_data = sample_NA_screening(self.data,ea_group = 'ONSFe',contaminant_group = 'BTEX')
+        e_bal = reductors(self.data,ea_group = 'ONSFe')/oxidators(self.data,contaminant_group = 'BTEX')
+
+        assert np.allclose(na_data['e_balance'].values,e_bal.values)
+        assert np.all(na_data['na_traffic_light'].values == np.where(e_bal.values<1,'red','green'))
+
+    def test_sample_NA_screening_04(self):
+        """Testing routine sample_NA_screening().
+
+        Testing 'include' option adding calculated values as columns to data
+        and data not being modified otherwise.
+        """
+        data_test = self.data.copy()
+        sample_NA_screening(data_test)
+        assert data_test.shape == self.data.shape
+
+        sample_NA_screening(data_test,include = True)
+        assert data_test.shape[1] == self.data.shape[1]+4 and 'na_traffic_light' in data_test.columns
+
+    def test_sample_NA_screening_05(self):
+        """Testing routine sample_NA_screening().
+
+        Testing Error message that data is not in standard format.
+        """
+        data_nonstandard = pd.DataFrame([[' ','mg/L','mg/L','ug/L'],['2000-001',748,10,263]],
+                                        columns = ['sample_nr','sulfate','oxygen','benzene'])
+        with pytest.raises(ValueError):
+            sample_NA_screening(data_nonstandard)
+
+    def test_sample_NA_screening_06(self,capsys):
+        """Testing routine sample_NA_screening().
+
+        Testing that contaminants without electron equivalents (e.g. 'cresol'
+        in group 'phenols') are skipped with warning.
+        """
+        data_test = self.data.copy()
+        data_test['phenol'] = 10.
+        data_test['cresol'] = 20.
+        na_data = sample_NA_screening(data_test,contaminant_group = 'phenols')
+        out,_ = capsys.readouterr()
+
+        tot_oxi = oxidators(data_test,contaminant_group = 'phenol')
+        assert "cresol" in out
+        assert np.allclose(na_data['total_oxidators_phenols'],tot_oxi)
+
+class TestMonteCarloNA:
+    """Class for testing sample_NA_monte_carlo analysis module on NA screening of mibipret."""
+
+    data = example_data(with_units = False)
+
+    def test_sample_NA_monte_carlo_01(self):
+        """Testing routine sample_NA_monte_carlo().
+
+        Testing that without analytical errors results equal those of
+        deterministic screening.
+        """
+        na_mc = sample_NA_monte_carlo(self.data,relative_error = 0.,n_realizations = 10)
+        na_data = sample_NA_screening(self.data)
+
+        assert np.allclose(na_mc['e_balance_p50'].values,na_data['e_balance'].values)
+        assert np.all(na_mc['na_traffic_light_p_green'].values ==
+                      (na_data['na_traffic_light'].values == 'green'))
+
+    def test_sample_NA_monte_carlo_02(self):
+        """Testing routine sample_NA_monte_carlo().
+
+        Testing reproducibility with seed independent of batches and processes.
+        """
+        na_mc_1,e_bal = sample_NA_monte_carlo(self.data,n_realizations = 250,batch_size = 100,
+                                              seed = 42,return_realizations = True)
+        na_mc_2 = sample_NA_monte_carlo(self.data,n_realizations = 250,batch_size = 100,
+                                        seed = 42,max_workers = 2)
+
+        assert e_bal.shape == (4,250)
+        pd.testing.assert_frame_equal(na_mc_1,na_mc_2)
+
+    def test_sample_NA_monte_carlo_03(self):
+        """Testing routine sample_NA_monte_carlo().
+
+        Testing probabilities of traffic lights, including missing values
+        and values at detection limits.
+        """
+        data_test = self.data.copy()
+        data_test.loc[1,'sulfate'] = np.nan
+        na_mc = sample_NA_monte_carlo(data_test,n_realizations = 200,seed = 1,
+                                      detection_limits = dict(benzene = 1000.))
+        probabilities = na_mc[['na_traffic_light_p_green','na_traffic_light_p_red',
+                               'na_traffic_light_p_yellow']].values
+
+        assert np.allclose(probabilities.sum(axis = 1),1.)
+        assert na_mc['na_traffic_light_p_yellow'].iloc[0] == 1.
+
+    def test_sample_NA_monte_carlo_04(self):
+        """Testing routine sample_NA_monte_carlo().
+
+        Testing Error message for negative relative error.
+        """
+        with pytest.raises(ValueError):
+            sample_NA_monte_carlo(self.data,relative_error = -0.1)
+
+class TestSweepNA:
+    """Class for testing sample_NA_sweep analysis module on NA screening of mibipret."""
+
+    data = example_data(with_units = False)
+
+    def test_sample_NA_sweep_01(self):
+        """Testing routine sample_NA_sweep().
+
+        Testing that results per scenario equal those of sample_NA_screening().
+        """
+        na_sweep = sample_NA_sweep(self.data,
+                                   ea_groups = ['ONS','all_ea'],
+                                   contaminant_groups = ['BTEX','BTEXIIN','MAH'])
+
+        assert na_sweep.shape[0] == 6*self.data.shape[0]
+        for ea_group in ['ONS','all_ea']:
+            for contaminant_group in ['BTEX','BTEXIIN','MAH']:
+                scenario = na_sweep[(na_sweep['ea_group'] == ea_group) &
+                                    (na_sweep['contaminant_group'] == contaminant_group)]
+                na_data = sample_NA_screening(self.data,
+                                              ea_group = ea_group,
+                                              contaminant_group = contaminant_group)
+                assert np.allclose(scenario['e_balance'].values,na_data['e_balance'].values)
+                assert np.all(scenario['na_traffic_light'].values == na_data['na_traffic_light'].values)
+
+    def test_sample_NA_sweep_02(self):
+        """Testing routine sample_NA_sweep().
+
+        Testing handling of missing values and groups not present in data.
+        """
+        data_test = self.data.copy()
+        data_test.loc[1,'benzene'] = np.nan
+        na_sweep = sample_NA_sweep(data_test,
+                                   ea_groups = 'ONS',
+                                   contaminant_groups = ['BTEX','test_quantity'])
+
+        assert na_sweep['na_traffic_light'].to_list() == ['y','red','red','green'] + 4*['y']
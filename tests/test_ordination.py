@@ -4,11 +4,16 @@
 """
 
 import numpy as np
+import pandas as pd
 import pytest
+import skbio.stats.ordination as sciord
+from mibiscreen.analysis.reduction.ordination import ConstrainedOrdination
 from mibiscreen.analysis.reduction.ordination import _extract_variables
 from mibiscreen.analysis.reduction.ordination import cca
 from mibiscreen.analysis.reduction.ordination import constrained_ordination
 from mibiscreen.analysis.reduction.ordination import pca
+from mibiscreen.analysis.reduction.ordination import pca_incremental
+from mibiscreen.analysis.reduction.ordination import permutation_test
 from mibiscreen.analysis.reduction.ordination import rda
 from mibiscreen.data.example_data.example_data import example_data
 
@@ -128,6 +133,86 @@ class Test_PCA:
 
         assert len(out)>0
 
+    def test_pca_07(self):
+        """Testing routine pca().
+
+        Check that truncated solvers computing only the reported components
+        agree with full decomposition.
+        """
+        rng = np.random.default_rng(1)
+        values = rng.normal(size = (600,3)) @ rng.normal(size = (3,20)) * 5 + rng.normal(size = (600,20))
+        data_test = pd.DataFrame(values,columns = ['quantity_{}'.format(i) for i in range(20)])
+
+        out_full = pca(data_test,svd_solver = 'full')
+        for svd_solver in ['randomized','arpack','auto']:
+            out = pca(data_test,svd_solver = svd_solver)
+            assert len(out['percent_explained']) == 2
+            assert np.allclose(out['percent_explained'],out_full['percent_explained'][:2])
+            assert np.allclose(np.abs(out['scores']),np.abs(out_full['scores']))
+            assert np.allclose(np.abs(out['loadings_independent']),np.abs(out_full['loadings_independent']))
+
+    def test_pca_08(self):
+        """Testing routine pca().
+
+        Correct error message when svd solver is not known.
+        """
+        with pytest.raises(ValueError):
+            pca(self.data,
+                independent_variables = self.environment_01,
+                svd_solver = 'test',
+                )
+
+class Test_PCA_Incremental:
+    """Class for testing incremental PCA on streamed chunks of data."""
+
+    rng = np.random.default_rng(1)
+    values = rng.normal(size = (600,3)) @ rng.normal(size = (3,10)) * 5 + rng.normal(size = (600,10))
+    data = pd.DataFrame(values,columns = ['quantity_{}'.format(i) for i in range(10)])
+
+    def test_pca_incremental_01(self):
+        """Testing routine pca_incremental().
+
+        Check that decomposition from chunks of data frame, array and
+        callable agrees with pca().
+        """
+        out_pca = pca(self.data,svd_solver = 'full')
+        def chunks():
+            return (self.data.iloc[start:start+70] for start in range(0,600,70))
+
+        for out in [pca_incremental(self.data,batch_size = 100),
+                    pca_incremental(self.values,batch_size = 55),
+                    pca_incremental(chunks)]:
+            assert np.allclose(out['percent_explained'],out_pca['percent_explained'])
+            assert np.allclose(out['scores'],out_pca['scores'])
+            assert np.allclose(out['loadings_independent'],out_pca['loadings_independent'])
+            assert len(out['sample_index']) == 600
+
+    def test_pca_incremental_02(self):
+        """Testing routine pca_incremental().
+
+        Check selection of independent and dependent variables from list of chunks.
+        """
+        chunks = [self.data.iloc[:300],self.data.iloc[300:]]
+        out = pca_incremental(chunks,
+                              independent_variables = ['quantity_0','quantity_1','quantity_2'],
+                              dependent_variables = ['quantity_3','quantity_4'],
+                              )
+        assert out['loadings_independent'].shape == (3,2)
+        assert out['loadings_dependent'].shape == (2,2)
+
+    def test_pca_incremental_03(self):
+        """Testing routine pca_incremental().
+
+        Correct error messages for chunks that can not be iterated twice
+        and chunks with missing values.
+        """
+        data_nan = self.data.copy()
+        data_nan.iloc[0,0] = np.nan
+        with pytest.raises(ValueError):
+            pca_incremental(iter([self.data]))
+        with pytest.raises(ValueError):
+            pca_incremental(data_nan)
+
 class Test_Constrained_Ordination:
     """Class for testing constrained ordination functions."""
 
@@ -310,3 +395,137 @@ class TestExtractVariables:
         """
         with pytest.raises(ValueError):
             _extract_variables(self.cols,np.array(self.environment_00))
+
+class Test_Permutation_Test:
+    """Class for testing permutation test of constrained ordination."""
+
+    def test_permutation_test_01(self,ordination_data):
+        """Testing routine permutation_test().
+
+        Check that inertia of constrained axes agrees with skbio and
+        strong relation of species to environment is significant.
+        """
+        data, environment, species = ordination_data
+        for method in ['cca','rda']:
+            out = permutation_test(data,environment,species,method = method,
+                                   n_permutations = 199,seed = 1)
+            ordination = getattr(sciord,method)(data[species],data[environment])
+            eigvals = ordination.eigvals.to_numpy()[:3]
+            if method == 'rda':
+                eigvals = eigvals**2/(len(data)-1)
+
+            assert out.index.to_list() == ['global','axis_1','axis_2','axis_3']
+            assert np.allclose(out['inertia'].values[1:],eigvals)
+            assert out.loc['global','p_value'] == 1/200
+
+    def test_permutation_test_02(self,ordination_data):
+        """Testing routine permutation_test().
+
+        Check reproducibility of results with seed independent of number of processes.
+        """
+        data, environment, species = ordination_data
+        out_1 = permutation_test(data,environment,species,
+                                 n_permutations = 150,batch_size = 50,seed = 3)
+        out_2 = permutation_test(data,environment,species,
+                                 n_permutations = 150,batch_size = 50,seed = 3,max_workers = 2)
+
+        assert out_1.equals(out_2)
+
+    def test_permutation_test_03(self,ordination_data):
+        """Testing routine permutation_test().
+
+        Correct error message when ordination method is not known.
+        """
+        data, environment, species = ordination_data
+        with pytest.raises(ValueError):
+            permutation_test(data,environment,species,method = 'test')
+
+    def test_permutation_test_04(self,ordination_data):
+        """Testing routine permutation_test().
+
+        Check that axes beyond the single axis of species dependence (oxygen)
+        are not significant in the sequential test of axes.
+        """
+        data, environment, species = ordination_data
+        for method in ['cca','rda']:
+            out = permutation_test(data,environment,species,method = method,
+                                   n_permutations = 199,seed = 1)
+
+            assert out.loc['axis_1','p_value'] == 1/200
+            assert np.all(out['p_value'].values[2:] > 0.1)
+            assert np.allclose(out['F'].values[1:],out['inertia'].values[1:] * out.loc['axis_1','F'] /
+                               out.loc['axis_1','inertia'])
+
+class Test_ConstrainedOrdination:
+    """Class for testing numpy implementation of constrained ordination."""
+
+    def test_constrained_ordination_engine_01(self,ordination_data):
+        """Testing class ConstrainedOrdination.
+
+        Check equivalence of results with skbio.stats.ordination (up to sign of axes).
+        """
+        data, environment, species = ordination_data
+        for method in ['cca','rda']:
+            for scaling in [1,2]:
+                out = ConstrainedOrdination(data[environment].to_numpy(),
+                                            method = method,
+                                            scaling = scaling,
+                                            ).fit(data[species].to_numpy())
+                ordination = getattr(sciord,method)(data[species],
+                                                    data[environment],
+                                                    scaling = scaling)
+                signs = np.sign(out['features'][0]) * np.sign(ordination.features.to_numpy()[0,:2])
+
+                assert np.allclose(out['eigenvalues'],ordination.eigvals.to_numpy()[:2])
+                assert np.allclose(out['samples'],signs * ordination.samples.to_numpy()[:,:2])
+                assert np.allclose(out['features'],signs * ordination.features.to_numpy()[:,:2])
+                assert np.allclose(out['biplot_scores'],signs * ordination.biplot_scores.to_numpy()[:,:2])
+
+    def test_constrained_ordination_engine_02(self,ordination_data):
+        """Testing class ConstrainedOrdination.
+
+        Check that batched fit of several response matrices agrees with single fits.
+        """
+        data, environment, species = ordination_data
+        values = data[species].to_numpy()
+        responses = np.stack([values,values[::-1],values**2])
+        for method in ['cca','rda']:
+            engine = ConstrainedOrdination(data[environment].to_numpy(),method = method)
+            out_batch = engine.fit(responses)
+
+            assert out_batch['samples'].shape == (3,40,2)
+            for i in range(3):
+                out = engine.fit(responses[i])
+                for key in out:
+                    assert np.allclose(out_batch[key][i],out[key])
+
+    def test_constrained_ordination_engine_03(self,ordination_data):
+        """Testing routine constrained_ordination().
+
+        Check numpy engine of constrained_ordination() agrees with skbio engine.
+        """
+        data, environment, species = ordination_data
+        out_numpy = constrained_ordination(data,environment,species,
+                                           method = 'rda',engine = 'numpy')
+        out_skbio = constrained_ordination(data,environment,species,
+                                           method = 'rda')
+
+        assert np.allclose(np.abs(out_numpy['scores']),np.abs(out_skbio['scores']))
+        with pytest.raises(ValueError):
+            constrained_ordination(data,environment,species,engine = 'test')
+
+    def test_constrained_ordination_engine_04(self,ordination_data):
+        """Testing class ConstrainedOrdination.
+
+        Check that fit on stack of independent variables agrees with single fits.
+        """
+        data, environment, species = ordination_data
+        independent = data[environment].to_numpy()
+        dependent = data[species].to_numpy()
+        indices = np.random.default_rng(1).integers(0,40,(3,40))
+        for method in ['cca','rda']:
+            out_batch = ConstrainedOrdination(independent[indices],method = method).fit(dependent[indices])
+            for i in range(3):
+                out = ConstrainedOrdination(independent[indices[i]],method = method).fit(dependent[indices[i]])
+                for key in out:
+                    assert np.allclose(out_batch[key][i],out[key])
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Testing analysis module on incremental screening sessions of mibiscreen.
+
+@author: Alraune Zech
+"""
+
+import numpy as np
+import pandas as pd
+import pytest
+from mibiscreen.analysis.sample.screening_NA import sample_NA_screening
+from mibiscreen.analysis.sample.session import ScreeningSession
+from mibiscreen.data.example_data.example_data import example_data
+
+
+class TestScreeningSession:
+    """Class for testing ScreeningSession of mibiscreen."""
+
+    data = example_data(with_units = False)
+
+    def test_screening_session_01(self):
+        """Testing class ScreeningSession.
+
+        Testing that only appended samples are computed and results equal
+        those of screening all samples.
+        """
+        session = ScreeningSession()
+        session.update(self.data.iloc[:2])
+        results = session.update(self.data)
+        na_data = sample_NA_screening(self.data)
+
+        assert session.recomputed == ['2000-003','2000-004']
+        assert list(results.index) == self.data['sample_nr'].to_list()
+        assert np.allclose(results['e_balance'].values,na_data['e_balance'].values)
+        assert 'intervention_traffic' in results.columns
+        assert 'concentration_BTEXIIN' in results.columns
+
+    def test_screening_session_02(self):
+        """Testing class ScreeningSession.
+
+        Testing recomputation of modified samples and removal of samples no
+        longer in data.
+        """
+        session = ScreeningSession()
+        session.update(self.data)
+        data_modified = self.data.iloc[1:].copy()
+        data_modified.loc[3,'benzene'] = 0.
+        results = session.update(data_modified)
+        na_data = sample_NA_screening(data_modified)
+
+        assert session.recomputed == ['2000-003']
+        assert results.shape[0] == 3
+        assert np.allclose(results['e_balance'].values,na_data['e_balance'].values)
+
+    def test_screening_session_03(self):
+        """Testing class ScreeningSession.
+
+        Testing Error message for duplicate sample names.
+        """
+        session = ScreeningSession()
+        with pytest.raises(ValueError):
+            session.update(pd.concat([self.data,self.data]))
@@ -6,9 +6,13 @@
 import numpy as np
 import pandas as pd
 import pytest
+from mibiscreen.analysis.sample.intervention import decode_intervention_contaminants
+from mibiscreen.analysis.sample.intervention import threshold_registry
 from mibiscreen.analysis.sample.intervention import thresholds_for_intervention_ratio
 from mibiscreen.analysis.sample.intervention import thresholds_for_intervention_traffic
+from mibiscreen.analysis.sample.intervention import thresholds_for_regulations
 from mibiscreen.data.example_data.example_data import example_data
+from mibiscreen.data.settings.contaminants import contaminant_groups
 
 data = example_data(with_units = False,data_type = 'contaminants')
 
@@ -177,3 +181,106 @@ class TestThresholdsForIntervention:
         out,err=capsys.readouterr()
 
         assert len(out)>0
+
+    def test_thresholds_for_intervention_traffic_10(self):
+        """Testing routine thresholds_for_intervention_traffic().
+
+        Testing bitmask output and its decoding to lists of contaminants.
+        """
+        out_list = thresholds_for_intervention_traffic(self.data)
+        out_mask = thresholds_for_intervention_traffic(self.data,decode = False)
+        contaminants = out_mask.attrs['intervention_contaminants']
+        decoded = decode_intervention_contaminants(out_mask['intervention_contaminants'],contaminants)
+
+        assert out_mask['intervention_contaminants'].dtype == np.uint64
+        assert decoded == out_list['intervention_contaminants'].to_list()
+
+    def test_thresholds_for_intervention_traffic_11(self):
+        """Testing routine thresholds_for_intervention_traffic().
+
+        Testing yellow traffic light for samples without exceedance but missing values.
+        """
+        data_test = self.data.copy()
+        data_test.loc[2,'benzene'] = np.nan
+        data_test.loc[2,['ethylbenzene','naphthalene','indane','pm_xylene','o_xylene']] = 0.
+        out = thresholds_for_intervention_traffic(data_test)
+
+        assert out['intervention_traffic'].to_list() == ['red','y','red','red']
+        assert out['intervention_number'].to_list() == [4,0,6,5]
+
+    def test_thresholds_for_intervention_traffic_12(self):
+        """Testing routine thresholds_for_intervention_traffic().
+
+        Testing that bits of bitmask follow fixed order of contaminant group.
+        """
+        out = thresholds_for_intervention_traffic(self.data,decode = False)
+        contaminants = [cont for cont in contaminant_groups['BTEXIIN'] if cont in self.data.columns]
+
+        assert out.attrs['intervention_contaminants'] == contaminants
+        assert out['intervention_contaminants'].to_list() == [165,189,189,173]
+
+class TestThresholdsForRegulations:
+    """Class for testing threshold_registry() and thresholds_for_regulations() of mibiscreen."""
+
+    data = example_data(with_units = False)
+
+    registry_csv = "contaminant,intervention_NL,limit_test\nBenzene,30,0.2\ntoluene,1000,\nunknown_quantity,1,1\n"
+
+    def test_threshold_registry_01(self):
+        """Testing routine threshold_registry().
+
+        Testing default registry with Dutch intervention values.
+        """
+        registry = threshold_registry()
+
+        assert registry.columns.to_list() == ['intervention_NL']
+        assert registry.loc['benzene','intervention_NL'] == 30
+
+    def test_threshold_registry_02(self,tmp_path,capsys):
+        """Testing routine threshold_registry().
+
+        Testing loading registry from csv-file with standardization of names.
+        """
+        file_path = tmp_path / 'registry.csv'
+        file_path.write_text(self.registry_csv)
+        registry = threshold_registry(str(file_path))
+        out,err=capsys.readouterr()
+
+        assert registry.index.to_list() == ['benzene','toluene']
+        assert np.isnan(registry.loc['toluene','limit_test'])
+        assert 'unknown_quantity' in out
+
+    def test_thresholds_for_regulations_01(self):
+        """Testing routine thresholds_for_regulations().
+
+        Testing that default registry reproduces thresholds_for_intervention_traffic().
+        """
+        out = thresholds_for_regulations(self.data)
+        out_traffic = thresholds_for_intervention_traffic(self.data)
+
+        assert out['intervention_traffic_intervention_NL'].to_list() == out_traffic['intervention_traffic'].to_list()
+        assert out['intervention_number_intervention_NL'].to_list() == out_traffic['intervention_number'].to_list()
+
+    def test_thresholds_for_regulations_02(self,tmp_path):
+        """Testing routine thresholds_for_regulations().
+
+        Testing 3-D array of ratios for several regulations.
+        """
+        file_path = tmp_path / 'registry.csv'
+        file_path.write_text(self.registry_csv)
+        registry = threshold_registry(str(file_path))
+        out, ratio = thresholds_for_regulations(self.data,registry = registry,return_ratio = True)
+
+        assert ratio.shape == (4,2,2)
+        assert out.attrs['intervention_contaminants'] == ['benzene','toluene']
+        assert np.isnan(ratio[:,1,1]).all()
+        assert np.allclose(ratio[:,0,1],self.data['benzene']/0.2)
+
+    def test_thresholds_for_regulations_03(self):
+        """Testing routine thresholds_for_regulations().
+
+        Testing Error message that no thresholds are given for contaminants of group.
+        """
+        registry = pd.DataFrame({'limit_test': [1.]},index = ['sulfate'])
+        with pytest.raises(ValueError):
+            thresholds_for_regulations(self.data,registry = registry)
@@ -4,7 +4,9 @@
 """
 
 import numpy as np
+import pandas as pd
 import pytest
+from mibiscreen.analysis.reduction.transformation import ValueTransformer
 from mibiscreen.analysis.reduction.transformation import filter_values
 from mibiscreen.analysis.reduction.transformation import transform_values
 from mibiscreen.data.example_data.example_data import example_data
@@ -251,3 +253,61 @@ class Test_Transformation:
         out,err=capsys.readouterr()
 
         assert len(out)>0
+
+class TestValueTransformer:
+    """Class for testing fitted data transformation for ordination."""
+
+    data = example_data(with_units = False).iloc[:,0:19]
+
+    def test_value_transformer_01(self):
+        """Testing class ValueTransformer.
+
+        Check that fitted transformation reproduces transform_values() on reference data.
+        """
+        for how in ['center','standardize']:
+            data_trans = ValueTransformer(how = how).fit_transform(self.data)
+            data_test = transform_values(self.data,how = how)
+
+            assert np.allclose(data_trans.iloc[:,3:].to_numpy(float),data_test.iloc[:,3:].to_numpy(float))
+
+    def test_value_transformer_02(self):
+        """Testing class ValueTransformer.
+
+        Check that new data is transformed with parameters of reference data
+        and missing values are replaced by fitted median.
+        """
+        transformer = ValueTransformer(how = 'center',name_list = ['benzene'],replace_NaN = 'median')
+        transformer.fit(self.data)
+        data_new = pd.DataFrame({'sample_nr' : ['new_1','new_2'], 'benzene' : [np.nan, 100.]})
+        data_trans = transformer.transform(data_new)
+
+        median = self.data['benzene'].median()
+        mean = self.data['benzene'].mean()
+        assert np.allclose(data_trans['benzene'].values,[median-mean,100.-mean])
+
+    def test_value_transformer_03(self,tmp_path):
+        """Testing class ValueTransformer.
+
+        Check saving and loading fitted transformer and transforming chunks.
+        """
+        transformer = ValueTransformer(how = 'standardize').fit(self.data)
+        file_path = str(tmp_path / 'transformer.json')
+        transformer.save(file_path)
+        transformer_loaded = ValueTransformer.load(file_path)
+
+        data_trans = transformer.transform(self.data)
+        chunks = [self.data.iloc[:2],self.data.iloc[2:]]
+        data_chunks = pd.concat(list(transformer_loaded.transform_chunks(chunks)))
+
+        assert transformer_loaded.quantities == transformer.quantities
+        assert np.allclose(data_chunks.iloc[:,3:].to_numpy(float),data_trans.iloc[:,3:].to_numpy(float))
+
+    def test_value_transformer_04(self):
+        """Testing class ValueTransformer.
+
+        Correct handling when transformer not fitted or option not known.
+        """
+        with pytest.raises(ValueError):
+            ValueTransformer(how = 'test')
+        with pytest.raises(ValueError):
+            ValueTransformer().transform(self.data)